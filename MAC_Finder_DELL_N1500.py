@@ -1,19 +1,31 @@
-import paramiko
 import time
 import getpass
+import argparse
 import sys
 import re
+import codecs
+import socket
+import sqlite3
+import csv
+import json
+import queue
+import bisect
+import fnmatch
+import ipaddress
+import importlib.util
+from array import array
+import threading
+import atexit
+from collections import deque
+from contextlib import closing, contextmanager, redirect_stdout
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import os # Import os module to check for Windows and potentially enable ANSI codes
-from switch_config import switch_inventory # Import switch_inventory from config file
+import network_sweep
 
 
 ############ TODO ############
 #
-# - add the functionality to enter multiple MAC addresses simultaneously to let the script search the switches for those all at once
-#     - output a summary after the search has finished
-# - parallelize
-# - add function to output all macs connected to switch
-# - add basic networking functions like pinging and querying for hostname
+# - add querying for hostname (pinging is done by network_sweep.py, see "Sweep IP range" in the menu)
 #
 
 ##############################
@@ -36,7 +48,12 @@ from switch_config import switch_inventory # Import switch_inventory from config
 # --- ANSI Color Codes ---
 # Check if running on Windows and enable ANSI escape codes if necessary (for older Windows versions)
 if os.name == 'nt':
-    os.system('') # Enables ANSI escape codes on Windows 10+
+    try:
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        kernel32.SetConsoleMode(kernel32.GetStdHandle(-11), 7) # ENABLE_VIRTUAL_TERMINAL_PROCESSING on stdout, without starting a shell
+    except Exception:
+        os.system('') # Enables ANSI escape codes on Windows 10+
 
 GREEN = '\033[92m'
 RED = '\033[91m'
@@ -47,6 +64,36 @@ RESET = '\033[0m' # Reset to default color
 # Global variable to control debug mode
 debug_mode_enabled = False
 
+# files that have to survive restarts (e.g. the stack cache) are kept next to the script, or next to the .exe when built
+#   with PyInstaller: a onefile build runs from a temporary directory (__file__ points there) that is deleted on exit
+DATA_DIRECTORY = os.path.dirname(sys.executable) if getattr(sys, 'frozen', False) else os.path.dirname(os.path.abspath(__file__))
+
+
+# paramiko and the cryptography stack behind it make up most of the start-up time, so they are only imported
+#   when the first SSH connection is made (or in the background while the password is typed in, see preload_ssh_modules)
+# PyInstaller still finds the import inside the function and bundles paramiko
+_paramiko_module = None
+_paramiko_lock = threading.Lock()
+
+def import_paramiko():
+    global _paramiko_module
+    if _paramiko_module is None:
+        with _paramiko_lock:
+            if _paramiko_module is None:
+                import paramiko
+                _paramiko_module = paramiko
+    return _paramiko_module
+
+
+# start importing paramiko right away, but without making the user wait for it
+def preload_ssh_modules():
+    def preload():
+        try:
+            import_paramiko()
+        except ImportError:
+            pass # reported on the first connection
+    threading.Thread(target=preload, name="preload-ssh-modules", daemon=True).start()
+
 
 # This function is not really in use, it was just a test to get very long outputs to work
 # The dell switches truncate output as soon as it gets too long and then you'll have to press enter (possibly multiple times)
@@ -55,6 +102,7 @@ debug_mode_enabled = False
 #   output showing all mac-addresses known to the switch from the complete network.
 # While collecting the output, a loading indicator is being shown to the user.
 def ssh_test(ip, username, password):
+    paramiko = import_paramiko()
     try:
         ssh_client = paramiko.SSHClient()
         ssh_client.load_system_host_keys()
@@ -133,147 +181,870 @@ def get_switch_identifier(ip, switch_details_map):
     return f"{MAGENTA}{ip}{RESET}"
 
 
-# connect to the switch via SSH and the previously specified username and password
-# execute the command
-# get all the output
-# return the output
-def exec_ssh_command(command, switch_IP, username, password):
-    try:
-        ssh_client = paramiko.SSHClient()
-        ssh_client.load_system_host_keys()
-        ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        # Increased timeout for connect and banner
-        ssh_client.connect(switch_IP, port=22, username=username, password=password, timeout=20, banner_timeout=20)
+############ Switch Inventory ############
+#
+# The switches are read from an inventory file: switch_config.py (a Python list called switch_inventory, see README)
+#   or a JSON, YAML or CSV file with the same keys (ip, location, rack_details, model, query, notes, optional layer3/hostname).
+# The file is only read when the inventory is used for the first time and read again as soon as it changes on disk
+#   (checked at most every INVENTORY_RELOAD_CHECK_INTERVAL seconds), so even thousands of switches don't slow down the start.
+# Lookups by IP, location, model and rack use indexes instead of going through the whole list.
+#
+# Selectors pick switches from the inventory (only queryable ones), several can be combined:
+#   192.168.23.40           a single switch
+#   192.168.23.0/24         all switches in a subnet
+#   location=Fertigung      all switches of a location (also model=..., rack=..., ip=...), * and ? can be used as wildcards
+#   Fertigung               a bare word is looked up as location, model and rack
+#   all                     all queryable switches
+#
+##########################################
+
+# another inventory file can be set with this environment variable (or --inventory on the command line)
+INVENTORY_PATH = os.environ.get("MAC_FINDER_INVENTORY") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "switch_config.py")
+INVENTORY_RELOAD_CHECK_INTERVAL = 5 # seconds
+INVENTORY_INDEX_KEYS = {'location': 'location', 'model': 'model', 'rack': 'rack_details'} # selector key -> inventory key
+
+
+# all values become strings, like in switch_config.py (e.g. "query": true in JSON -> 'yes')
+def normalize_inventory_entry(entry):
+    if not isinstance(entry, dict):
+        raise ValueError(f"every switch must be a mapping of keys to values, got {entry!r}")
+    normalized = {}
+    for key, value in entry.items():
+        if key is None:
+            continue # surplus CSV columns
+        if isinstance(value, bool):
+            value = "yes" if value else "no"
+        normalized[str(key).strip()] = str(value).strip() if value is not None else ""
+    if 'rack' in normalized and 'rack_details' not in normalized:
+        normalized['rack_details'] = normalized.pop('rack')
+    normalized.setdefault('query', "yes")
+    return normalized
+
+
+def load_inventory_file(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".py":
+        spec = importlib.util.spec_from_file_location("switch_config", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        entries = module.switch_inventory
+    elif extension == ".json":
+        with open(path, encoding='utf-8') as f:
+            entries = json.load(f)
+    elif extension in (".yaml", ".yml"):
+        try:
+            import yaml # only needed for YAML inventories
+        except ImportError:
+            raise ValueError("reading a YAML inventory needs PyYAML (pip install pyyaml)")
+        with open(path, encoding='utf-8') as f:
+            entries = yaml.safe_load(f)
+    elif extension == ".csv":
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            entries = list(csv.DictReader(f))
+    else:
+        raise ValueError(f"unknown inventory format '{extension}', use .py, .json, .yaml or .csv")
+    if isinstance(entries, dict): # e.g. {"switches": [...]}
+        entries = entries.get('switches', entries.get('switch_inventory'))
+    if not isinstance(entries, list):
+        raise ValueError("the inventory must be a list of switches")
+    return [normalize_inventory_entry(entry) for entry in entries]
+
+
+class SwitchInventory:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._next_check = 0.0
+        self._error = None
+        self._entries = []
+        self._by_ip = {}
+        self._queryable_IPs = []
+        self._queryable_set = set()
+        self._addresses = {}
+        self._indexes = {key: {} for key in INVENTORY_INDEX_KEYS}
+
+    # (re)load the file if it is used for the first time or has changed since it was loaded
+    def _refresh(self):
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        with self._lock:
+            if now < self._next_check:
+                return
+            self._next_check = now + INVENTORY_RELOAD_CHECK_INTERVAL
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+                if mtime == self._mtime:
+                    return
+                entries = load_inventory_file(self.path)
+            except Exception as e: # also syntax errors in switch_config.py
+                error = f"Could not load the switch inventory {self.path}: {e}"
+                if error != self._error:
+                    print(f"{RED}{error}{' (keeping the previously loaded switches)' if self._mtime else ''}{RESET}")
+                self._error = error
+                return
+            reloaded = self._mtime is not None
+            self._build_indexes(entries)
+            self._mtime = mtime
+            self._error = None
+            if reloaded:
+                print(f"{BLUE}Switch inventory reloaded from {self.path} ({len(self._queryable_IPs)} queryable switches).{RESET}")
+
+    # entries without a usable IP (e.g. 'no IP set' for stack members) are listed, but can't be queried or selected
+    def _build_indexes(self, entries):
+        by_ip = {}
+        queryable_IPs = []
+        addresses = {}
+        indexes = {key: {} for key in INVENTORY_INDEX_KEYS}
+        for entry in entries:
+            ip = entry.get('ip', "")
+            if not ip or " " in ip or ip in by_ip:
+                continue
+            by_ip[ip] = entry
+            if entry['query'].lower() != "yes":
+                continue
+            queryable_IPs.append(ip)
+            try:
+                addresses[ip] = ipaddress.ip_address(ip)
+            except ValueError:
+                pass # host name
+            for key, inventory_key in INVENTORY_INDEX_KEYS.items():
+                value = entry.get(inventory_key, "").lower()
+                if value:
+                    indexes[key].setdefault(value, []).append(ip)
+        self._entries, self._by_ip, self._addresses, self._indexes = entries, by_ip, addresses, indexes
+        self._queryable_IPs, self._queryable_set = queryable_IPs, set(queryable_IPs)
+
+    def __iter__(self):
+        self._refresh()
+        return iter(self._entries)
+
+    def __len__(self):
+        self._refresh()
+        return len(self._entries)
+
+    # the inventory entry of a switch, same as switch_details_by_ip.get(ip) used to be
+    def get(self, ip, default=None):
+        self._refresh()
+        return self._by_ip.get(ip, default)
+
+    # in the order of the inventory
+    def queryable_ips(self):
+        self._refresh()
+        return list(self._queryable_IPs)
+
+    def is_queryable(self, ip):
+        self._refresh()
+        return ip in self._queryable_set
+
+    def select(self, selectors, within=None):
+        """
+        Returns (IPs, unmatched) for the given selectors (see above): the queryable switches matched by any of them,
+        in the order of the inventory (or of within, if given, which also limits the result), and the selectors that matched nothing.
+        """
+        self._refresh()
+        selected = set()
+        unmatched = []
+        for selector in selectors:
+            selector = selector.strip()
+            if not selector:
+                continue
+            matches = self._match(selector)
+            if matches:
+                selected |= matches
+            else:
+                unmatched.append(selector)
+        return [ip for ip in (self._queryable_IPs if within is None else within) if ip in selected], unmatched
+
+    def _match(self, selector):
+        if selector.lower() in ("all", "*"):
+            return self._queryable_set
+        key, separator, value = selector.partition("=")
+        if separator:
+            key, value = key.strip().lower(), value.strip()
+            if key == "ip":
+                return self._match_ip(value)
+            return self._match_index(key, value) if key in self._indexes else set()
+        return self._match_ip(selector) or set().union(*(self._match_index(key, selector) for key in self._indexes))
+
+    def _match_ip(self, value):
+        if "/" in value:
+            try:
+                network = ipaddress.ip_network(value, strict=False)
+            except ValueError:
+                return set()
+            return {ip for ip, address in self._addresses.items() if address in network}
+        if any(c in value for c in "*?["):
+            return {ip for ip in self._queryable_IPs if fnmatch.fnmatchcase(ip, value)}
+        return {value} if value in self._queryable_set else set()
+
+    def _match_index(self, key, value):
+        index = self._indexes[key]
+        value = value.lower()
+        if any(c in value for c in "*?["):
+            return {ip for name, IPs in index.items() if fnmatch.fnmatchcase(name, value) for ip in IPs}
+        return set(index.get(value, ()))
+
+
+switch_inventory = SwitchInventory(INVENTORY_PATH)
+# get_switch_identifier() and the workflows look up the details of a switch here (benchmark.py replaces it with a dict)
+switch_details_by_ip = switch_inventory
+
+
+############ SSH Timing Metrics ############
+#
+# To find out where the time goes when a search is slow, every SSH session records a timing span for each phase:
+# - tcp_connect, kex (key exchange), auth, shell (opening the shell up to the first prompt), enable, terminal_length
+# - session_wait (waiting for a pooled session that is busy with another command)
+# - command (one span per show command) and config (one span per configuration command)
+# For every span the bytes received from the switch and the number of recv() calls are counted as well.
+# Start the program with the "timing" argument to see a summary table after each workflow, or look at the metrics
+#   of the whole run from the menu and export them as JSON or in Prometheus text format.
+#
+###########################################
+
+SSH_TIMING_SUMMARY = False # print a summary table after each workflow, enabled with the "timing" argument
+SSH_METRICS_MAX_SPANS = 100000 # only the most recent spans are kept in detail, the totals include all of them
+
+SSH_PHASES = ["tcp_connect", "kex", "auth", "shell", "enable", "terminal_length", "session_wait", "command", "config"]
+
+
+class SSHMetrics:
+    """Collects timing spans of all SSH sessions per switch, phase and command."""
+
+    def __init__(self, max_spans=SSH_METRICS_MAX_SPANS):
+        self._lock = threading.Lock()
+        self._spans = deque(maxlen=max_spans)
+        self._totals = {} # (switch IP, phase) -> aggregated values of all spans ever recorded
+
+    def record(self, switch_IP, phase, duration, command=None, received_bytes=0, recv_calls=0, error=None, started=None):
+        span = {'switch': switch_IP, 'phase': phase, 'command': command,
+                'started': started if started is not None else time.time() - duration, 'duration': duration,
+                'bytes': received_bytes, 'recvs': recv_calls, 'error': error}
+        with self._lock:
+            self._spans.append(span)
+            self._add_to_totals(self._totals, span)
+
+    @staticmethod
+    def _add_to_totals(totals, span):
+        total = totals.setdefault((span['switch'], span['phase']),
+                                  {'count': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'bytes': 0, 'recvs': 0, 'errors': 0})
+        total['count'] += 1
+        total['seconds'] += span['duration']
+        total['max_seconds'] = max(total['max_seconds'], span['duration'])
+        total['bytes'] += span['bytes']
+        total['recvs'] += span['recvs']
+        total['errors'] += span['error'] is not None
+
+    # time the code inside the with block as one span
+    # the yielded dict is used to add the bytes received and the number of recv() calls made during the span
+    @contextmanager
+    def span(self, switch_IP, phase, command=None):
+        counters = {'bytes': 0, 'recvs': 0}
+        started = time.time()
+        start = time.perf_counter()
+        error = None
+        try:
+            yield counters
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            self.record(switch_IP, phase, time.perf_counter() - start, command, counters['bytes'], counters['recvs'], error, started)
+
+    def spans(self, since=None):
+        with self._lock:
+            return [span for span in self._spans if since is None or span['started'] >= since]
+
+    # aggregated values per (switch IP, phase), either of the whole run or of the spans started after "since"
+    def totals(self, since=None):
+        if since is None:
+            with self._lock:
+                return {key: dict(total) for key, total in self._totals.items()}
+        totals = {}
+        for span in self.spans(since):
+            self._add_to_totals(totals, span)
+        return totals
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+            self._totals.clear()
+
+    def print_summary(self, since=None, slowest=5):
+        totals = self.totals(since)
+        if not totals:
+            print("No SSH activity recorded.")
+            return
+        print(f"\n{'Switch':<17} {'Phase':<16} {'Count':>6} {'Total s':>9} {'Avg s':>8} {'Max s':>8} {'KB recv':>9} {'recv()':>7} {'Errors':>6}")
+        print("-" * 94)
+        phase_order = {phase: i for i, phase in enumerate(SSH_PHASES)}
+        for (switch_IP, phase), total in sorted(totals.items(), key=lambda item: (item[0][0], phase_order.get(item[0][1], len(SSH_PHASES)))):
+            print(f"{switch_IP:<17} {phase:<16} {total['count']:>6} {total['seconds']:>9.3f} {total['seconds'] / total['count']:>8.3f} "
+                  f"{total['max_seconds']:>8.3f} {total['bytes'] / 1024:>9.1f} {total['recvs']:>7} "
+                  f"{total['errors']:>6}")
+
+        # the slowest single commands point directly at slow switches
+        commands = sorted((span for span in self.spans(since) if span['phase'] == 'command'), key=lambda span: span['duration'], reverse=True)
+        if commands:
+            print("\nSlowest commands:")
+            for span in commands[:slowest]:
+                print(f"  {span['duration']:8.3f}s  {span['switch']:<17} {span['command']}")
+
+    def to_json(self, since=None):
+        totals = [{'switch': switch_IP, 'phase': phase, **total} for (switch_IP, phase), total in sorted(self.totals(since).items())]
+        return json.dumps({'generated_at': time.time(), 'totals': totals, 'spans': self.spans(since)}, indent=2)
+
+    # Prometheus text exposition format, e.g. to be picked up by the node exporter's textfile collector
+    def to_prometheus(self):
+        metrics = [
+            ('mac_finder_ssh_phase_seconds_total', 'counter', 'Time spent in the SSH phase.', 'seconds'),
+            ('mac_finder_ssh_phase_count_total', 'counter', 'Number of times the SSH phase was run.', 'count'),
+            ('mac_finder_ssh_phase_max_seconds', 'gauge', 'Longest single run of the SSH phase.', 'max_seconds'),
+            ('mac_finder_ssh_received_bytes_total', 'counter', 'Bytes received from the switch during the SSH phase.', 'bytes'),
+            ('mac_finder_ssh_recv_calls_total', 'counter', 'Number of recv() calls during the SSH phase.', 'recvs'),
+            ('mac_finder_ssh_phase_errors_total', 'counter', 'Number of failed runs of the SSH phase.', 'errors'),
+        ]
+        totals = sorted(self.totals().items())
+        lines = []
+        for name, metric_type, help_text, key in metrics:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for (switch_IP, phase), total in totals:
+                lines.append(f'{name}{{switch="{switch_IP}",phase="{phase}"}} {total[key]}')
+        return "\n".join(lines) + "\n"
 
-        channel = ssh_client.invoke_shell(width=200, height=1000) # Set large term size
+    # the format is chosen by the file extension: *.prom or *.txt for Prometheus, JSON otherwise
+    def export(self, output_path):
+        content = self.to_prometheus() if output_path.lower().endswith((".prom", ".txt")) else self.to_json()
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(content)
 
-        # Wait for initial prompt and clear buffer
-        output_buffer = ""
-        time.sleep(1) # Wait for shell to be ready
-        while channel.recv_ready():
-            output_buffer += channel.recv(4096).decode('utf-8', errors='ignore')
-        # print(f"DEBUG: Initial buffer from {switch_IP}: {output_buffer}")
 
-        channel.send("enable\n")
-        time.sleep(0.5)
-        enable_output_buffer = ""
-        while channel.recv_ready(): # Clear enable output
-            enable_output_buffer += channel.recv(4096).decode('utf-8', errors='ignore')
-        # print(f"DEBUG: Enable output from {switch_IP}: {enable_output_buffer}")
-
-
-        channel.send("terminal length 0\n") # Disable pagination
-        time.sleep(0.5)
-        term_len_buffer = ""
-        while channel.recv_ready(): # Clear terminal length output
-            term_len_buffer += channel.recv(4096).decode('utf-8', errors='ignore')
-        # print(f"DEBUG: Term len output from {switch_IP}: {term_len_buffer}")
-
-        channel.send(command + "\n")
-
-        full_output = ""
-        end_time = time.time() + 30 # Timeout for command execution (e.g., 30 seconds for show commands)
-
-        # Read output until no more data for a certain period or prompt detected
-        # This loop tries to ensure all output is captured.
-        read_chunk = ""
-        last_data_time = time.time()
-        while time.time() < end_time:
-            if channel.recv_ready():
-                read_chunk = channel.recv(8192).decode('utf-8', errors='ignore')
-                full_output += read_chunk
-                last_data_time = time.time()
-                # print(f"DEBUG: exec_ssh_command received chunk: {read_chunk}")
+ssh_metrics = SSHMetrics()
+
+
+############ Switch Health ############
+#
+# A switch that is switched off or unreachable used to cost a full connect timeout in every search.
+# Now the TCP connection to port 22 (the first step of every SSH connection) may only take SSH_PROBE_TIMEOUT seconds,
+#   and switches that couldn't be reached are skipped for a while (circuit breaker): HEALTH_BACKOFF_INITIAL seconds
+#   after the first failure, twice as long after every further one, at most HEALTH_BACKOFF_MAX seconds.
+# Once that time is over the next connection attempt is let through again, a success closes the circuit.
+# Only failures before the authentication count, a wrong password doesn't make a switch unhealthy.
+#
+#######################################
+
+SSH_PROBE_TIMEOUT = 0.8 # seconds for the TCP connect, raise it for switches behind slow links
+HEALTH_BACKOFF_INITIAL = 30 # seconds
+HEALTH_BACKOFF_MAX = 1800 # seconds
+
+
+class SwitchUnreachableError(ConnectionError):
+    pass
+
+
+class SwitchHealth:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states = {} # switch IP -> {'failures', 'open_until', 'last_error', 'failed_at'}
+
+    def record_success(self, ip):
+        with self._lock:
+            self._states.pop(ip, None)
+
+    def record_failure(self, ip, error):
+        now = time.time()
+        with self._lock:
+            state = self._states.setdefault(ip, {'failures': 0})
+            state['failures'] += 1
+            state['open_until'] = now + min(HEALTH_BACKOFF_MAX, HEALTH_BACKOFF_INITIAL * 2 ** (state['failures'] - 1))
+            state['last_error'] = str(error) or type(error).__name__
+            state['failed_at'] = now
+        if debug_mode_enabled: print(f"{BLUE}DEBUG: {ip} is unreachable ({error}), skipping it for {round(state['open_until'] - now)}s.{RESET}")
+
+    # why the switch is skipped right now, None if it may be connected to
+    def skip_reason(self, ip):
+        with self._lock:
+            state = self._states.get(ip)
+            if not state or time.time() >= state['open_until']:
+                return None
+            return (f"unreachable since {time.strftime('%H:%M:%S', time.localtime(state['failed_at']))} ({state['last_error']}), "
+                    f"next attempt in {round(state['open_until'] - time.time())}s")
+
+    # raises SwitchUnreachableError while the circuit of the switch is open
+    def check(self, ip):
+        reason = self.skip_reason(ip)
+        if reason:
+            raise SwitchUnreachableError(f"{ip} {reason}")
+
+    # returns (IPs to query, {skipped IP: reason})
+    def partition(self, switch_IPs):
+        reachable_IPs = []
+        skipped = {}
+        for ip in switch_IPs:
+            reason = self.skip_reason(ip)
+            if reason:
+                skipped[ip] = reason
             else:
-                # If no data, wait a bit. If no data for ~1s after last receive, assume done.
-                if time.time() - last_data_time > 1.5:
-                    break
-                time.sleep(0.1)
+                reachable_IPs.append(ip)
+        return reachable_IPs, skipped
 
-        ssh_client.close()
+    def reset(self):
+        with self._lock:
+            self._states.clear()
 
-        # Clean up the output: remove command echo and prompt
-        lines = full_output.splitlines()
-        cleaned_lines = []
-
-        # Normalize the command sent for matching in output (e.g. remove extra spaces)
-        normalized_command_sent = ' '.join(command.strip().split())
-
-        command_echo_found = False
-        # Regex for typical switch prompts (e.g., switch#, switch(config)#, switch>)
-        prompt_pattern = re.compile(r"^\S+(?:\([^\)]+\))?[#>] ?$")
-
-        for i, line_content in enumerate(lines):
-            stripped_line = line_content.strip()
-            # Attempt to remove command echo more reliably
-            if not command_echo_found and normalized_command_sent in stripped_line:
-                 # Check if this line is ONLY the command or command + prompt
-                if stripped_line == normalized_command_sent or prompt_pattern.match(stripped_line.replace(normalized_command_sent, "").strip()):
-                    command_echo_found = True
-                    # If next line is blank, skip it too (often follows command echo)
-                    if i + 1 < len(lines) and not lines[i+1].strip():
-                        lines[i+1] = "" # Mark for skipping
-                    continue
 
-            if prompt_pattern.match(stripped_line):
-                continue # Skip prompt lines
+switch_health = SwitchHealth()
 
-            if line_content: # Add non-empty, non-prompt, non-echo lines
-                 cleaned_lines.append(line_content)
 
-        final_cleaned_output = '\n'.join(cleaned_lines).strip()
-        if debug_mode_enabled: print(f"{BLUE}DEBUG: Raw output for '{command.strip()}' on {get_switch_identifier(switch_IP, switch_details_by_ip)}:{RESET}\n{full_output}")
-        if debug_mode_enabled: print(f"{BLUE}DEBUG: Cleaned output for '{command.strip()}' on {get_switch_identifier(switch_IP, switch_details_by_ip)}:{RESET}\n{final_cleaned_output}")
-        return final_cleaned_output, None
+# for "Switches checked"
+def describe_unreachable(skipped):
+    return [f"{get_switch_identifier(ip, switch_details_by_ip)} (skipped: {reason})" for ip, reason in skipped.items()]
 
-    except Exception as e:
-        # print(f"Error in exec_ssh_command for {get_switch_identifier(switch_IP, switch_details_by_ip)} with command {command}: {e}")
-        return "", f"SSH/command execution error: {str(e)}"
 
+############ SSH Session Pool ############
+#
+# Opening a new SSH connection for every single command is slow: TCP connect, key exchange, authentication,
+#   "enable" and "terminal length 0" have to be done again each time.
+# Instead, one authenticated and already enabled shell per switch is kept open and reused across menu actions.
+# - sessions that have not been used for SSH_SESSION_IDLE_TIMEOUT seconds are closed
+# - a keepalive is sent every SSH_KEEPALIVE_INTERVAL seconds so the switch doesn't drop sessions in between
+# - a session that died in the meantime (switch reboot, timeout, ...) is reconnected automatically
+#
+# Output is read expect-style: on login the switch's prompt (e.g. "dell-n1548p-1#") is learned once and every
+#   read returns as soon as that prompt shows up again. The timeouts are only a safety net for hung switches.
+#
+##########################################
+
+SSH_PORT = 22
+SSH_SESSION_IDLE_TIMEOUT = 300 # seconds
+SSH_KEEPALIVE_INTERVAL = 30 # seconds
+SSH_SETUP_TIMEOUT = 10 # seconds to wait for a prompt during login, enable and terminal length
+SSH_CONFIG_COMMAND_TIMEOUT = 5 # seconds to wait for the prompt after a single config command
+
+# matches any prompt at the very end of the output, e.g. "dell-n1548p-1>", "dell-n1548p-1#" or "dell-n1548p-1(config-if-Gi1/0/8)#"
+# group 1 is the switch's hostname
+generic_prompt_pattern = re.compile(r"(?:^|[\r\n])([^\s#>()]+)(?:\([^)\r\n]*\))?[#>] ?$")
+
+
+# host keys of switches that are already known from OpenSSH's known_hosts file
+# unknown switches are accepted (like paramiko's AutoAddPolicy), but a known switch presenting a different key is refused
+system_host_keys = None
+system_host_keys_lock = threading.Lock()
+
+def check_host_key(switch_IP, server_key):
+    global system_host_keys
+    paramiko = import_paramiko()
+    with system_host_keys_lock:
+        if system_host_keys is None:
+            system_host_keys = paramiko.HostKeys()
+            try:
+                system_host_keys.load(os.path.expanduser("~/.ssh/known_hosts"))
+            except IOError:
+                pass
+    host = switch_IP if SSH_PORT == 22 else f"[{switch_IP}]:{SSH_PORT}"
+    known_keys = system_host_keys.lookup(host)
+    known_key = known_keys.get(server_key.get_name()) if known_keys else None
+    if known_key is not None and known_key != server_key:
+        raise paramiko.BadHostKeyException(host, server_key, known_key)
+
+
+# after a "--More--" prompt the switch erases it again using carriage returns/backspaces
+# only keep what would be visible on a terminal
+def clean_terminal_line(line):
+    line = line.rstrip("\r").replace("\x08", "")
+    return line.rsplit("\r", 1)[-1]
+
+
+class SSHSession:
+    """An authenticated interactive shell on one switch that is already in privileged (enable) mode."""
+
+    def __init__(self, switch_IP, username, password):
+        self.switch_IP = switch_IP
+        self.username = username
+        self.password = password
+        self.transport = None
+        self.channel = None
+        self.lock = threading.Lock() # a shell can only run one command at a time
+        self.hostname = None # learned from the first prompt, e.g. "dell-n1548p-1"
+        self.prompt_pattern = None
+        self.prompt_or_more_pattern = None
+        self.last_used = time.time()
+        self.bytes_received = 0 # counted over the whole lifetime of the session, for the timing metrics
+        self.recv_count = 0
+
+    # record the code inside the with block as a span in the SSH timing metrics, including the data received meanwhile
+    @contextmanager
+    def timed(self, phase, command=None):
+        bytes_before, recvs_before = self.bytes_received, self.recv_count
+        with ssh_metrics.span(self.switch_IP, phase, command) as counters:
+            try:
+                yield
+            finally:
+                counters['bytes'] = self.bytes_received - bytes_before
+                counters['recvs'] = self.recv_count - recvs_before
+
+    # the connection is set up step by step (instead of using paramiko.SSHClient) so that each phase can be timed
+    def connect(self):
+        self.close()
+        try:
+            paramiko = import_paramiko()
+            # an unreachable switch fails here within SSH_PROBE_TIMEOUT (instead of 20s) and is then skipped for a while
+            try:
+                with self.timed("tcp_connect"):
+                    sock = socket.create_connection((self.switch_IP, SSH_PORT), timeout=SSH_PROBE_TIMEOUT)
+                sock.settimeout(20)
+                self.transport = paramiko.Transport(sock)
+                self.transport.banner_timeout = 20 # Increased timeout for banner
+                with self.timed("kex"):
+                    self.transport.start_client(timeout=20)
+            except Exception as e:
+                switch_health.record_failure(self.switch_IP, e)
+                raise
+            switch_health.record_success(self.switch_IP)
+            check_host_key(self.switch_IP, self.transport.get_remote_server_key())
+            with self.timed("auth"):
+                self.transport.auth_password(self.username, self.password)
+            self.transport.set_keepalive(SSH_KEEPALIVE_INTERVAL)
+
+            with self.timed("shell"):
+                self.channel = self.transport.open_session(timeout=20)
+                self.channel.get_pty(width=200, height=1000) # Set large term size
+                self.channel.invoke_shell()
+
+                # Wait for the initial prompt (e.g. "dell-n1548p-1>") and learn the switch's hostname from it
+                banner, prompt_match = self.read_until(generic_prompt_pattern, timeout=SSH_SETUP_TIMEOUT)
+                if not prompt_match:
+                    raise TimeoutError(f"no prompt received from {self.switch_IP} within {SSH_SETUP_TIMEOUT}s")
+        except Exception:
+            self.close()
+            raise
+        self.hostname = prompt_match.group(1)
+        self.prompt_pattern = re.compile(r"(?:^|[\r\n])" + re.escape(self.hostname) + r"(?:\([^)\r\n]*\))?[#>] ?$")
+        self.prompt_or_more_pattern = re.compile(self.prompt_pattern.pattern + r"|--More--.*$")
+        if debug_mode_enabled: print(f"{BLUE}DEBUG: Learned prompt '{self.hostname}' for {self.switch_IP}.{RESET}")
+
+        with self.timed("enable"):
+            self.channel.send("enable\n")
+            self.expect_prompt(SSH_SETUP_TIMEOUT)
+
+        with self.timed("terminal_length"):
+            self.channel.send("terminal length 0\n") # Disable pagination
+            self.expect_prompt(SSH_SETUP_TIMEOUT)
+
+    def is_alive(self):
+        if self.transport is None or self.channel is None:
+            return False
+        return self.transport.is_active() and not self.channel.closed
+
+    # receive from the channel and count the data for the timing metrics
+    def recv(self, size):
+        data = self.channel.recv(size)
+        self.bytes_received += len(data)
+        self.recv_count += 1
+        return data
+
+    # read and return everything that is currently waiting in the channel without blocking
+    def drain(self):
+        buffer = ""
+        while self.channel.recv_ready():
+            buffer += self.recv(4096).decode('utf-8', errors='ignore')
+        return buffer
+
+    # read from the channel until the output ends with the given pattern or the timeout is reached
+    # returns the output read so far and the regex match (None if the timeout was hit)
+    # the timeout is only a safety net - normally this returns as soon as the switch has answered
+    def read_until(self, pattern, timeout):
+        buffer = ""
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore') # multibyte characters can be split across recv() calls
+        end_time = time.time() + timeout
+        while True:
+            # only the tail of the output can contain the prompt, no need to search everything again
+            match = pattern.search(buffer[-256:])
+            if match:
+                return buffer, match
+            remaining = end_time - time.time()
+            if remaining <= 0:
+                return buffer, None
+            self.channel.settimeout(remaining)
+            try:
+                data = self.recv(8192)
+            except socket.timeout:
+                return buffer, None
+            if not data: # channel was closed by the switch
+                raise EOFError(f"connection to {self.switch_IP} was closed by the switch")
+            buffer += decoder.decode(data)
+
+    # read until this switch's prompt (in any mode: ">", "#", "(config)#", ...) shows up again
+    def expect_prompt(self, timeout):
+        output, match = self.read_until(self.prompt_pattern, timeout)
+        if not match and debug_mode_enabled:
+            print(f"{BLUE}DEBUG: No prompt from {self.switch_IP} after {timeout}s, continuing with partial output.{RESET}")
+        return output
+
+    # send a single command and yield its raw output line by line (including command echo) as it arrives
+    # stops as soon as the prompt shows up again, the prompt itself is not yielded
+    # only the current incomplete line is kept in memory, so even huge outputs don't have to be buffered
+    # if the output is paged anyway (e.g. "terminal length 0" didn't work), the "--More--" prompts are answered automatically
+    def iter_output_lines(self, command, timeout=30):
+        with self.timed("command", command):
+            self.drain() # discard anything left over from a previous command
+            self.channel.send(command + "\n")
+
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore') # multibyte characters can be split across recv() calls
+            pending = "" # the last, incomplete line
+            end_time = time.time() + timeout # Timeout for command execution (e.g., 30 seconds for show commands)
+            try:
+                while not self.prompt_pattern.search(pending):
+                    remaining = end_time - time.time()
+                    if remaining <= 0:
+                        break
+                    self.channel.settimeout(remaining)
+                    try:
+                        data = self.recv(8192)
+                    except socket.timeout:
+                        break
+                    if not data: # channel was closed by the switch
+                        raise EOFError(f"connection to {self.switch_IP} was closed by the switch")
+                    *lines, pending = (pending + decoder.decode(data)).split("\n")
+                    for line in lines:
+                        yield clean_terminal_line(line)
+                    if "--More--" in pending:
+                        pending = pending[:pending.index("--More--")]
+                        self.channel.send(" ") # Send space for the next page
+                else:
+                    return
+                if debug_mode_enabled: print(f"{BLUE}DEBUG: No prompt from {self.switch_IP} after {timeout}s, continuing with partial output.{RESET}")
+                if pending:
+                    yield clean_terminal_line(pending)
+            except GeneratorExit:
+                # the caller stopped reading early, skip the rest of the output so that the next command starts clean
+                # the prompt or a "--More--" might already be in the last line that was received
+                output = pending
+                while not self.prompt_pattern.search(output):
+                    if "--More--" in output:
+                        self.channel.send("q") # quit the paged output
+                    output, match = self.read_until(self.prompt_or_more_pattern, max(0.0, end_time - time.time()))
+                    if not match:
+                        break
+                raise
+
+    # enter configuration mode, send all config commands and return to privileged mode again
+    # returns the complete output of the config session
+    def run_config_commands(self, config_commands):
+        self.drain()
+
+        with self.timed("config", "configure terminal"):
+            self.channel.send("configure terminal\n")
+            full_debug_output = self.expect_prompt(SSH_CONFIG_COMMAND_TIMEOUT) # Capture (config)# prompt and any messages
+
+        for cmd in config_commands:
+            if debug_mode_enabled: print(f"{BLUE}DEBUG: Sending config command to {get_switch_identifier(self.switch_IP, switch_details_by_ip)}: {cmd}{RESET}")
+            with self.timed("config", cmd):
+                self.channel.send(cmd + "\n")
+                full_debug_output += self.expect_prompt(SSH_CONFIG_COMMAND_TIMEOUT) # Read output/prompt after each command
+
+        with self.timed("config", "end"):
+            self.channel.send("end\n")
+            full_debug_output += self.expect_prompt(SSH_CONFIG_COMMAND_TIMEOUT)
+        return full_debug_output
+
+    def close(self):
+        if self.transport is not None:
+            try:
+                self.transport.close()
+            except Exception:
+                pass
+        self.transport = None
+        self.channel = None
+
+
+class SSHSessionPool:
+    """Keeps one SSHSession per switch IP alive and hands it out to whoever needs to talk to that switch."""
+
+    def __init__(self, idle_timeout=SSH_SESSION_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self._sessions = {} # switch IP -> SSHSession
+        self._lock = threading.Lock()
+
+    def _get_session(self, switch_IP, username, password):
+        with self._lock:
+            session = self._sessions.get(switch_IP)
+            if session is None or session.username != username or session.password != password:
+                if session is not None:
+                    session.close()
+                session = SSHSession(switch_IP, username, password)
+                self._sessions[switch_IP] = session
+            return session
+
+    # run action(session) on the switch's session, (re)connecting it if needed
+    # if a reused session turns out to be broken, it is reconnected and the action is retried once
+    def run(self, switch_IP, username, password, action):
+        self.evict_idle()
+        session = self._get_session(switch_IP, username, password)
+        wait_started = time.perf_counter()
+        with session.lock:
+            ssh_metrics.record(switch_IP, "session_wait", time.perf_counter() - wait_started)
+            reused = session.is_alive()
+            if not reused:
+                switch_health.check(switch_IP)
+                session.connect()
+            try:
+                result = action(session)
+            except Exception:
+                session.close()
+                if not reused:
+                    raise
+                if debug_mode_enabled: print(f"{BLUE}DEBUG: Pooled session to {switch_IP} is broken, reconnecting...{RESET}")
+                session.connect()
+                result = action(session)
+            session.last_used = time.time()
+            return result
+
+    # like run(), but for generator actions: yields whatever action(session) yields while holding the session
+    # a broken reused session is only retried if nothing has been yielded yet
+    # the session stays locked until the generator is exhausted or closed: callers that may stop reading early have to
+    #   close it (e.g. with contextlib.closing), otherwise every other command to that switch waits until it is garbage collected
+    def stream(self, switch_IP, username, password, action):
+        self.evict_idle()
+        session = self._get_session(switch_IP, username, password)
+        wait_started = time.perf_counter()
+        with session.lock:
+            ssh_metrics.record(switch_IP, "session_wait", time.perf_counter() - wait_started)
+            try:
+                reused = session.is_alive()
+                if not reused:
+                    switch_health.check(switch_IP)
+                    session.connect()
+                yielded = False
+                items = action(session)
+                try:
+                    for item in items:
+                        yielded = True
+                        yield item
+                except Exception:
+                    session.close()
+                    if not reused or yielded:
+                        raise
+                    if debug_mode_enabled: print(f"{BLUE}DEBUG: Pooled session to {switch_IP} is broken, reconnecting...{RESET}")
+                    session.connect()
+                    items = action(session)
+                    yield from items
+                finally:
+                    items.close() # if the caller stopped early, the rest of the output is skipped before the session is released
+            finally:
+                session.last_used = time.time() # also if the caller closed the generator early
+
+    # the hostname learned from the switch's prompt, None if there was no session yet
+    def hostname_of(self, switch_IP):
+        with self._lock:
+            session = self._sessions.get(switch_IP)
+        return session.hostname if session else None
+
+    # close sessions that have not been used for longer than the idle timeout
+    # sessions that are currently in use are left alone
+    def evict_idle(self):
+        now = time.time()
+        with self._lock:
+            sessions = list(self._sessions.values())
+        for session in sessions:
+            if now - session.last_used > self.idle_timeout and session.lock.acquire(blocking=False):
+                try:
+                    if session.is_alive():
+                        if debug_mode_enabled: print(f"{BLUE}DEBUG: Closing idle session to {session.switch_IP}.{RESET}")
+                        session.close()
+                finally:
+                    session.lock.release()
+
+    def close_all(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+
+ssh_session_pool = SSHSessionPool()
+atexit.register(ssh_session_pool.close_all) # close all open sessions when the program exits
+
+
+# Regex for typical switch prompts (e.g., switch#, switch(config)#, switch>)
+prompt_line_pattern = re.compile(r"^\S+(?:\([^\)]+\))?[#>] ?$")
+
+# Clean up the output on the fly: remove command echo and prompt lines
+def clean_output_lines(lines, command):
+    # Normalize the command sent for matching in output (e.g. remove extra spaces)
+    normalized_command_sent = ' '.join(command.strip().split())
+
+    command_echo_found = False
+    skip_blank_line = False
+    for line_content in lines:
+        stripped_line = line_content.strip()
+        # Attempt to remove command echo more reliably
+        if not command_echo_found and normalized_command_sent in stripped_line:
+            # Check if this line is ONLY the command or command + prompt
+            if stripped_line == normalized_command_sent or prompt_line_pattern.match(stripped_line.replace(normalized_command_sent, "").strip()):
+                command_echo_found = True
+                skip_blank_line = True # If next line is blank, skip it too (often follows command echo)
+                continue
 
-def exec_ssh_config_commands(config_commands, switch_IP, username, password):
-    try:
-        ssh_client = paramiko.SSHClient()
-        ssh_client.load_system_host_keys()
-        ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        ssh_client.connect(switch_IP, port=22, username=username, password=password, timeout=20, banner_timeout=20) # Increased timeout
+        if skip_blank_line:
+            skip_blank_line = False
+            if not stripped_line:
+                continue
 
-        channel = ssh_client.invoke_shell(width=200, height=1000)
+        if prompt_line_pattern.match(stripped_line):
+            continue # Skip prompt lines
 
-        full_debug_output = ""
+        if line_content: # Add non-empty, non-prompt, non-echo lines
+            yield line_content
 
-        def read_channel_buffer(timeout=0.5):
-            nonlocal full_debug_output
-            buffer = ""
-            start_time = time.time()
-            while time.time() - start_time < timeout:
-                if channel.recv_ready():
-                    data = channel.recv(4096).decode('utf-8', errors='ignore')
-                    buffer += data
-                    full_debug_output += data
-                else:
-                    time.sleep(0.05) # Small pause
-            return buffer
 
-        read_channel_buffer(timeout=1.5) # Clear initial banner
+# execute the command on the switch using its pooled SSH session
+# (the session is opened with the previously specified username and password on first use)
+# yield the cleaned output line by line while it is still being received
+# errors are raised as exceptions
+# the switch's session is locked until the generator is exhausted or closed, so stop early only inside contextlib.closing()
+def stream_ssh_command(command, switch_IP, username, password, timeout=30):
+    return ssh_session_pool.stream(switch_IP, username, password,
+                                   lambda session: clean_output_lines(session.iter_output_lines(command, timeout), command))
 
-        channel.send("enable\n")
-        read_channel_buffer()
 
-        channel.send("configure terminal\n")
-        read_channel_buffer() # Capture (config)# prompt and any messages
+# execute the command on the switch
+# get all the output
+# return the output
+def exec_ssh_command(command, switch_IP, username, password, timeout=30):
+    try:
+        final_cleaned_output = '\n'.join(stream_ssh_command(command, switch_IP, username, password, timeout)).strip()
+        if debug_mode_enabled: print(f"{BLUE}DEBUG: Cleaned output for '{command.strip()}' on {get_switch_identifier(switch_IP, switch_details_by_ip)}:{RESET}\n{final_cleaned_output}")
+        return final_cleaned_output, None
 
-        for i, cmd in enumerate(config_commands):
-            if debug_mode_enabled: print(f"{BLUE}DEBUG: Sending config command to {get_switch_identifier(switch_IP, switch_details_by_ip)}: {cmd}{RESET}")
-            channel.send(cmd + "\n")
-            # Wait slightly longer after the last command or for commands that might take time
-            sleep_time = 0.7 if i == len(config_commands) -1 else 0.4
-            read_channel_buffer(timeout=sleep_time) # Read output/prompt after each command
+    except Exception as e:
+        # print(f"Error in exec_ssh_command for {get_switch_identifier(switch_IP, switch_details_by_ip)} with command {command}: {e}")
+        return "", f"SSH/command execution error: {str(e)}"
 
-        channel.send("end\n")
-        read_channel_buffer()
 
-        ssh_client.close()
+# execute several commands one after the other on the switch's session without letting other threads in between
+# returns ({command: output}, error), the outputs of the commands before a failure are kept
+def exec_ssh_commands(commands, switch_IP, username, password, timeout=30):
+    outputs = {}
+    def run_commands(session):
+        for command in commands:
+            if command not in outputs:
+                outputs[command] = '\n'.join(clean_output_lines(session.iter_output_lines(command, timeout), command)).strip()
+        return outputs
+    try:
+        ssh_session_pool.run(switch_IP, username, password, run_commands)
+        return outputs, None
+    except Exception as e:
+        return outputs, f"SSH/command execution error: {str(e)}"
+
+
+def exec_ssh_config_commands(config_commands, switch_IP, username, password):
+    try:
+        full_debug_output = ssh_session_pool.run(switch_IP, username, password, lambda session: session.run_config_commands(config_commands))
 
         # More specific Dell error patterns
         error_patterns = [
@@ -299,138 +1070,455 @@ def exec_ssh_config_commands(config_commands, switch_IP, username, password):
 
 # the Dell Switches need MAC addresses in a specific format (XXXX.XXXX.XXXX) where X can be a digit or an uppercase letter from the range A-F (hex)
 # this function brings the MAC address that the user entered into the correct format for further processing
+non_alnum_pattern = re.compile(r"[^0-9A-Za-z]")
+hex_mac_pattern = re.compile(r"[0-9A-F]{12}")
+
 def format_mac_address(mac):
-    # Remove all non-hexadecimal characters
-    mac = ''.join(c for c in mac if c.isalnum())
+    # Remove all separators (".", ":", "-", spaces, ...)
+    mac = non_alnum_pattern.sub("", mac)
     
     mac = mac.upper()
 
     # Format the MAC address in xxxx.xxxx.xxxx format
-    if len(mac) == 12:
+    if hex_mac_pattern.fullmatch(mac):
         formatted_mac = f"{mac[:4]}.{mac[4:8]}.{mac[8:]}"
         return formatted_mac
     else:
         print(f"{RED}Error: The provided MAC address is not in the correct format.{RESET}")
         return None
+
+
+# MACs as 48 bit integers, used wherever lots of them have to be stored
+def mac_to_int(formatted_mac):
+    return int(formatted_mac.replace(".", ""), 16)
+
+def int_to_mac(mac_int):
+    mac = f"{mac_int:012X}"
+    return f"{mac[:4]}.{mac[4:8]}.{mac[8:]}"
     
 
 # get port ("Gi1/0/32") based on regex pattern
+# output can be a string or an iterable of lines (e.g. from stream_ssh_command), the latter is only read up to the match
 def get_port_from_output(output):
-    port_regex_pattern = r"\bGi\d+/\d+/\d+\b"  # supports stacks where the port might be "Gi2/0/xx"
-    match = re.search(port_regex_pattern, output)
-    if match:
-        port = match.group(0)
-        print(f"Port found using regex pattern: {port}")
-        return port
-    else:
-        return
+    port_regex_pattern = re.compile(r"\bGi\d+/\d+/\d+\b")  # supports stacks where the port might be "Gi2/0/xx"
+    lines = output.splitlines() if isinstance(output, str) else output
+    for line in lines:
+        match = port_regex_pattern.search(line)
+        if match:
+            port = match.group(0)
+            print(f"Port found using regex pattern: {port}")
+            return port
+    return
     
 port_id_pattern = re.compile(r"^(Gi|Te|Po)\d+((/\d+)?/\d+|\d+)$") # Gi1/0/1, Te1/0/1, Po1, Gi1/0/10, Po12
 
+############ VLAN and Port Sets ############
+#
+# VLAN lists ("1010,1100-1199") and port lists ("Gi1/0/1-24,Po1-8") show up everywhere in the switch's output and commands.
+# Both are stored as bitsets in plain integers (bit n set = VLAN/port number n is in the set), so union, difference
+#   and membership tests are single integer operations, even for a trunk carrying all 4094 VLANs.
+# Both types parse and render the Dell range syntax.
+#
+############################################
+
+# the (first, last) tuples of all runs of set bits, e.g. 0b1110 -> [(1, 3)]
+def bits_to_ranges(bits):
+    ranges = []
+    while bits:
+        start = (bits & -bits).bit_length() - 1
+        run = (bits >> start) ^ ((bits >> start) + 1) # ones up to and including the first gap
+        length = run.bit_length() - 1
+        ranges.append((start, start + length - 1))
+        bits &= ~(((1 << length) - 1) << start)
+    return ranges
+
+# "1-3,5" -> bits 1, 2, 3 and 5 set, numbers outside of min_number..max_number raise a ValueError
+def parse_range_bits(ranges_str, min_number, max_number):
+    bits = 0
+    for part in ranges_str.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        first, last = int(first), int(last or first)
+        if not min_number <= first <= last <= max_number:
+            raise ValueError(f"invalid range '{part}', must be within {min_number}-{max_number}")
+        bits |= ((1 << (last - first + 1)) - 1) << first
+    return bits
+
+def range_strings(ranges, prefix=""):
+    return [f"{prefix}{first}" if first == last else f"{prefix}{first}-{last}" for first, last in ranges]
+
+
+class VlanSet:
+    """A set of VLAN IDs (1-4094) stored as a bitset in a single integer."""
+    __slots__ = ('bits',)
+
+    MAX_VLAN_ID = 4094
+
+    def __init__(self, vlan_ids=()):
+        bits = 0
+        for vlan_id in vlan_ids:
+            vlan_id = int(vlan_id)
+            if not 1 <= vlan_id <= self.MAX_VLAN_ID:
+                raise ValueError(f"invalid VLAN ID {vlan_id}, must be between 1 and {self.MAX_VLAN_ID}")
+            bits |= 1 << vlan_id
+        self.bits = bits
+
+    # Dell range syntax, e.g. "1010,1100-1199" (a ValueError is raised for anything else)
+    @classmethod
+    def parse(cls, vlans_str):
+        return cls._from_bits(parse_range_bits(vlans_str, 1, cls.MAX_VLAN_ID))
+
+    @classmethod
+    def _from_bits(cls, bits):
+        vlan_set = cls()
+        vlan_set.bits = bits
+        return vlan_set
+
+    def __or__(self, other):
+        return VlanSet._from_bits(self.bits | other.bits)
+
+    def __sub__(self, other):
+        return VlanSet._from_bits(self.bits & ~other.bits)
+
+    def __and__(self, other):
+        return VlanSet._from_bits(self.bits & other.bits)
+
+    def __eq__(self, other):
+        return isinstance(other, VlanSet) and self.bits == other.bits
+
+    def __hash__(self):
+        return hash(self.bits)
+
+    def __contains__(self, vlan_id):
+        return bool(self.bits >> int(vlan_id) & 1)
+
+    def __bool__(self):
+        return self.bits != 0
+
+    def __len__(self):
+        return bin(self.bits).count("1")
+
+    def __iter__(self):
+        bits = self.bits
+        while bits:
+            lowest = bits & -bits
+            yield lowest.bit_length() - 1
+            bits ^= lowest
+
+    # consecutive VLANs as (first, last) tuples, e.g. [(1, 1), (1100, 1199)]
+    def ranges(self):
+        return bits_to_ranges(self.bits)
+
+    # Dell range syntax, e.g. "1,1100-1199"
+    # if max_length is given, the list is split into several strings that are not longer than that
+    def to_range_strings(self, max_length=None):
+        strings = []
+        for part in range_strings(self.ranges()):
+            if strings and (max_length is None or len(strings[-1]) + 1 + len(part) <= max_length):
+                strings[-1] += "," + part
+            else:
+                strings.append(part)
+        return strings
+
+    def __str__(self):
+        return ",".join(self.to_range_strings())
+
+    def __repr__(self):
+        return f"VlanSet('{self}')"
+
+
+# "Gi1/0/12" -> ("Gi1/0/", 12), "Po1" -> ("Po", 1)
+port_name_pattern = re.compile(r"^([A-Za-z]+(?:\d+/)*)(\d+)$")
+
+class PortSet:
+    """
+    A set of ports such as "Gi1/0/1-24,Po1-8": one bitset of port numbers per prefix ("Gi1/0/", "Gi2/0/", "Po", ...).
+    The prefixes keep the order in which they were added, which is also the order they are rendered in.
+    """
+    __slots__ = ('groups',)
+
+    MAX_PORT_NUMBER = 4096
+
+    def __init__(self, ports=()):
+        self.groups = {} # prefix -> bits
+        for port in ports:
+            self.add(port)
+
+    # Dell range syntax, e.g. "Gi1/0/1-24,Po1-8" (a ValueError is raised for anything else)
+    @classmethod
+    def parse(cls, ports_str):
+        port_set = cls()
+        for part in ports_str.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            first, _, last = part.partition("-")
+            match = port_name_pattern.match(first)
+            if not match or (last and not last.isdigit()):
+                raise ValueError(f"invalid port range '{part}'")
+            prefix, number = match.group(1), match.group(2)
+            bits = parse_range_bits(f"{number}-{last or number}", 0, cls.MAX_PORT_NUMBER)
+            port_set.groups[prefix] = port_set.groups.get(prefix, 0) | bits
+        return port_set
+
+    def add(self, port):
+        match = port_name_pattern.match(port)
+        if not match:
+            raise ValueError(f"invalid port '{port}'")
+        self.groups[match.group(1)] = self.groups.get(match.group(1), 0) | 1 << int(match.group(2))
+
+    def _combine(self, other, operation):
+        port_set = PortSet()
+        for prefix in list(self.groups) + [p for p in other.groups if p not in self.groups]:
+            bits = operation(self.groups.get(prefix, 0), other.groups.get(prefix, 0))
+            if bits:
+                port_set.groups[prefix] = bits
+        return port_set
+
+    def __or__(self, other):
+        return self._combine(other, lambda a, b: a | b)
+
+    def __sub__(self, other):
+        return self._combine(other, lambda a, b: a & ~b)
+
+    def __and__(self, other):
+        return self._combine(other, lambda a, b: a & b)
+
+    def __eq__(self, other):
+        return isinstance(other, PortSet) and {p: b for p, b in self.groups.items() if b} == {p: b for p, b in other.groups.items() if b}
+
+    def __contains__(self, port):
+        match = port_name_pattern.match(port)
+        return bool(match) and bool(self.groups.get(match.group(1), 0) >> int(match.group(2)) & 1)
+
+    def __bool__(self):
+        return any(self.groups.values())
+
+    def __len__(self):
+        return sum(bin(bits).count("1") for bits in self.groups.values())
+
+    def __iter__(self):
+        for prefix, bits in self.groups.items():
+            for first, last in bits_to_ranges(bits):
+                for number in range(first, last + 1):
+                    yield f"{prefix}{number}"
+
+    def __str__(self):
+        return ",".join(part for prefix, bits in self.groups.items() for part in range_strings(bits_to_ranges(bits), prefix))
+
+    def __repr__(self):
+        return f"PortSet('{self}')"
+
+
 def parse_vlan_info(output_show_vlan):
     """
-    Parses the output of 'show vlan' to extract VLAN IDs and Names.
-    Uses an iterative approach based on column positions determined from the header/separator lines.
+    Parses the output of 'show vlan' into a dict VLAN ID (int) -> {'name', 'type', 'ports' (PortSet)}.
+    The column positions are taken from the separator line, the order of the columns from the header line.
+    The port list of a VLAN can be continued on the following lines, e.g.:
+
+    VLAN   Name                             Ports          Type
+    -----  ---------------                  -------------  --------------
+    1      default                          Po1-128,       Default
+                                            Gi1/0/1-7,
+                                            Gi1/0/9-48
+    1010   Clients                          Gi1/0/8        Static
     """
-    vlans = {} # id -> name
+    vlans = {}
     lines = output_show_vlan.splitlines()
-    header_found = False
-    separator_line = None
-    data_lines_start_index = -1
-
-    # Find header and separator lines to determine column positions
-    # VLAN ID  Name                             Type    Ports
-    # -------  -------------------------------- ------- -------------------
-    # 1        default                          Default Gi1/0/1-24,Po1-8
+    header_line = None
+    columns = None # list of (column name, start, end)
+    current_vlan = None
+
     for line in lines:
-        line = line.rstrip() # Keep leading spaces for alignment if needed, but strip trailing
-        if not header_found:
-            if "VLAN ID" in line and "Name" in line and "Type" in line:
-                header_found = True
+        line = line.rstrip() # Keep leading spaces for alignment
+        if columns is None:
+            if re.match(r"^\s*VLAN\b", line) and "Name" in line:
+                header_line = line
+            elif header_line and line.strip().startswith("---"):
+                # every group of dashes in the separator line is one column
+                starts = [match.start() for match in re.finditer(r"-+", line)]
+                ends = starts[1:] + [None]
+                columns = []
+                for start, end in zip(starts, ends):
+                    title = header_line[start:end].strip().lower()
+                    name = next((key for key in ("name", "ports", "type") if title.startswith(key)), "vlan" if title.startswith("vlan") else title)
+                    columns.append((name, start, end))
+            continue
+
+        if not line.strip():
             continue
-        if header_found and "-------" in line:
-            separator_line = line
-            data_lines_start_index = lines.index(line) + 1
-            break # Found header and separator, stop searching
-
-    if not header_found or not separator_line or data_lines_start_index == -1:
-        # Could not find the expected header/separator format
-        print("DEBUG: Could not find VLAN header or separator.")
-        return {} # Return empty dict, indicating failure to parse
-
-    # Determine column start indices based on the separator line
-    # Look for at least two spaces separating the column separators (---)
-    name_start_index = -1
-    ports_start_index = -1
-    type_start_index = -1
-
-    # Find the positions of the column separators in the separator line
-    vlan_sep_end = separator_line.find("-----") + 5
-    name_sep_end = separator_line.find("---------------") + 15
-    ports_sep_end = separator_line.find("-------------") + 13
-
-    # Find the start of the next column by looking for >=2 spaces after the previous separator ends
-    match_name_sep = re.search(r"\s{2,}", separator_line[vlan_sep_end:])
-    if match_name_sep: name_start_index = vlan_sep_end + match_name_sep.start() + len(match_name_sep.group(0))
-
-    match_ports_sep = re.search(r"\s{2,}", separator_line[name_sep_end:])
-    if match_ports_sep: ports_start_index = name_sep_end + match_ports_sep.start() + len(match_ports_sep.group(0))
-
-    match_type_sep = re.search(r"\s{2,}", separator_line[ports_sep_end:])
-    if match_type_sep: type_start_index = ports_sep_end + match_type_sep.start() + len(match_type_sep.group(0))
-
-    if name_start_index == -1 or ports_start_index == -1 or type_start_index == -1:
-        print("DEBUG: Could not determine column positions from separator line.")
-        print(f"DEBUG: Separator line: '{separator_line}'")
-        print(f"DEBUG: name_start_index={name_start_index}, ports_start_index={ports_start_index}, type_start_index={type_start_index}")
-        return {} # Return empty dict, indicating failure to parse
-
-    # Regex to find VLAN ID at the start of a line (only digits followed by space)
-    vlan_id_line_re = re.compile(r"^\s*(\d+)\s+")
-
-    # Simplified: Return empty dict as parsing is too complex/unreliable for now.
-    # The display_vlan_names function will show raw output.
-    return {}
+        fields = {name: line[start:end].strip() for name, start, end in columns}
+        if fields.get("vlan", "").isdigit():
+            current_vlan = {'name': fields.get("name", ""), 'type': fields.get("type", ""), 'ports': fields.get("ports", "")}
+            vlans[int(fields["vlan"])] = current_vlan
+        elif current_vlan is not None and fields.get("ports"):
+            current_vlan['ports'] += fields["ports"] # continuation line with more ports
+
+    if columns is None and debug_mode_enabled:
+        print(f"{BLUE}DEBUG: Could not find VLAN header or separator.{RESET}")
+    for vlan_id, vlan in vlans.items():
+        try:
+            vlan['ports'] = PortSet.parse(vlan['ports'])
+        except ValueError:
+            if debug_mode_enabled: print(f"{BLUE}DEBUG: Could not parse the ports of VLAN {vlan_id}: '{vlan['ports']}'{RESET}")
+            vlan['ports'] = PortSet()
+    return vlans
+
+
+############ VLAN Database ############
+#
+# The VLANs of every switch (parsed from "show vlan") are cached for VLAN_DB_TTL seconds, so that VLAN names can be shown,
+#   VLAN IDs entered by the user can be checked and questions like "which switches have VLAN 1722?" can be answered
+#   without asking the switches again every time.
+# The data of a switch is dropped as soon as its port configuration is changed by this program.
+#
+#######################################
+
+VLAN_DB_TTL = 600 # seconds
+
+class VlanDatabase:
+    """Cached VLANs of every switch: switch IP -> VLAN ID -> {'name', 'type', 'ports'}."""
+
+    def __init__(self, ttl=VLAN_DB_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._switches = {} # switch IP -> {'fetched_at': ..., 'vlans': ...}
+
+    def update_switch(self, ip, vlans, fetched_at=None):
+        with self._lock:
+            self._switches[ip] = {'fetched_at': fetched_at or time.time(), 'vlans': vlans}
+
+    def invalidate(self, ip):
+        with self._lock:
+            self._switches.pop(ip, None)
+
+    def cached(self, ip):
+        with self._lock:
+            info = self._switches.get(ip)
+        if info and time.time() - info['fetched_at'] < self.ttl:
+            return info['vlans']
+        return None
+
+    # the VLANs of the switch, from the cache if still fresh
+    # returns (vlans, error)
+    def get(self, ip, username, password, refresh=False):
+        vlans = None if refresh else self.cached(ip)
+        if vlans is not None:
+            return vlans, None
+        output, error = exec_ssh_command("show vlan", ip, username, password)
+        if error:
+            return {}, error
+        vlans = parse_vlan_info(output)
+        if not vlans:
+            return {}, "could not parse the output of 'show vlan'"
+        self.update_switch(ip, vlans)
+        return vlans, None
+
+    # the VLANs of several switches, switches without fresh data are asked in parallel
+    # returns (dict switch IP -> vlans, dict switch IP -> error)
+    def get_many(self, switch_IPs, username, password, refresh=False):
+        results = {}
+        errors = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(MAX_PARALLEL_SWITCHES, len(switch_IPs)))) as executor:
+            for ip, (vlans, error) in zip(switch_IPs, executor.map(lambda ip: self.get(ip, username, password, refresh), switch_IPs)):
+                if error:
+                    errors[ip] = error
+                else:
+                    results[ip] = vlans
+        return results, errors
+
+    def vlan_name(self, ip, vlan_id):
+        vlans = self.cached(ip) or {}
+        vlan = vlans.get(int(vlan_id))
+        return vlan['name'] if vlan else None
+
+    # all switches from the list that have the VLAN, as dict switch IP -> VLAN details
+    def switches_with_vlan(self, vlan_id, switch_IPs, username, password):
+        results, errors = self.get_many(switch_IPs, username, password)
+        return {ip: vlans[int(vlan_id)] for ip, vlans in results.items() if int(vlan_id) in vlans}, errors
+
+
+vlan_database = VlanDatabase()
+
+
+# "1010" -> "1010 (Clients)" if the name of the VLAN is known
+def describe_vlan(switch_ip, vlan_id):
+    name = vlan_database.vlan_name(switch_ip, vlan_id)
+    return f"{vlan_id} ({name})" if name else str(vlan_id)
+
+# a few VLANs are listed with their names, large sets only in range syntax
+def describe_vlans(switch_ip, vlan_set):
+    if len(vlan_set) > 10:
+        return str(vlan_set)
+    return ", ".join(describe_vlan(switch_ip, vlan_id) for vlan_id in vlan_set)
+
 
 def display_vlan_names(switch_ip, username, password):
     print(f"\n{BLUE}Fetching VLAN configuration from {get_switch_identifier(switch_ip, switch_details_by_ip)}...{RESET}")
-    output, error = exec_ssh_command("show vlan", switch_ip, username, password)
+    vlans, error = vlan_database.get(switch_ip, username, password, refresh=True)
     if error:
         print(f"{RED}Error fetching VLANs from {get_switch_identifier(switch_ip, switch_details_by_ip)}: {error}{RESET}")
         return # Exit the function on error
-    
-    if not output or output.strip() == "":
-        print(f"No output received for 'show vlan' from {switch_ip}.")
+
     print(f"\n--- VLAN Configuration on {switch_ip} ---")
-    print(output)
+    print(f"{'VLAN':<6} {'Name':<32} {'Type':<10} Ports")
+    for vlan_id, vlan in sorted(vlans.items()):
+        print(f"{vlan_id:<6} {vlan['name']:<32} {vlan['type']:<10} {vlan['ports']}")
     print(f"--- End of VLAN Configuration ---")
 
+# returns {'pvid': VLAN ID (int) or None, 'untagged_vlans': VlanSet, 'tagged_vlans': VlanSet}
 def parse_port_vlan_config(output_show_int_switchport):
     config = {
         'pvid': None,
-        'untagged_vlans': [],
-        'tagged_vlans': []
+        'untagged_vlans': VlanSet(),
+        'tagged_vlans': VlanSet()
     }
     for line in output_show_int_switchport.splitlines():
         line = line.strip()
         if line.startswith("General Mode PVID:"):
             match = re.search(r'General Mode PVID:\s*(\d+)', line)
             if match:
-                config['pvid'] = match.group(1)
-        elif line.startswith("General Mode Untagged VLANs:"):
-            match = re.search(r'General Mode Untagged VLANs:\s*(.*)', line)
-            if match:
-                vlans_str = match.group(1).strip()
-                if vlans_str: # Check if not empty
-                    config['untagged_vlans'] = [v.strip() for v in vlans_str.split(',') if v.strip().isdigit()]
-        elif line.startswith("General Mode Tagged VLANs:"):
-            match = re.search(r'General Mode Tagged VLANs:\s*(.*)', line)
-            if match:
-                vlans_str = match.group(1).strip()
-                if vlans_str: # Check if not empty
-                    config['tagged_vlans'] = [v.strip() for v in vlans_str.split(',') if v.strip().isdigit()]
+                config['pvid'] = int(match.group(1))
+        elif line.startswith("General Mode Untagged VLANs:") or line.startswith("General Mode Tagged VLANs:"):
+            key = 'untagged_vlans' if line.startswith("General Mode Untagged") else 'tagged_vlans'
+            vlans_str = line.split(":", 1)[1].strip() # e.g. "1010,1100-1199", can be empty
+            try:
+                config[key] = VlanSet.parse(vlans_str)
+            except ValueError:
+                print(f"{RED}Could not parse the VLAN list '{vlans_str}'.{RESET}")
     return config
 
+# maximum length of the VLAN list in a single "switchport general allowed vlan ..." command
+VLAN_LIST_MAX_LENGTH = 200
+
+# the config commands that change the port from its current VLANs (parsed by parse_port_vlan_config) to the new ones
+# new_pvid is a VLAN ID (int) or None (no untagged VLAN), new_tagged_vlans a VlanSet
+# only the difference is sent, as VLAN ranges (e.g. "remove 1100-1199"), VLANs that are already set up correctly are left alone
+# VLANs that are on the port now but not in the new configuration are removed
+# the first two commands are always "interface ..." and "switchport mode general"
+def plan_vlan_commands(port_id, current_vlans, new_pvid, new_tagged_vlans):
+    commands = []
+    commands.append(f"interface {port_id}")
+    commands.append("switchport mode general")
+
+    current_untagged = current_vlans['untagged_vlans']
+    current_tagged = current_vlans['tagged_vlans']
+    new_untagged = VlanSet([new_pvid] if new_pvid else [])
+    new_tagged = new_tagged_vlans
+
+    if new_pvid and new_pvid != current_vlans.get('pvid'):
+        commands.append(f"switchport general pvid {new_pvid}")
+    # adding a VLAN that is already on the port with the other tagging just changes the tagging
+    for vlan_list in (new_untagged - current_untagged).to_range_strings(VLAN_LIST_MAX_LENGTH):
+        commands.append(f"switchport general allowed vlan add {vlan_list} untagged")
+    for vlan_list in (new_tagged - current_tagged).to_range_strings(VLAN_LIST_MAX_LENGTH):
+        commands.append(f"switchport general allowed vlan add {vlan_list} tagged")
+    for vlan_list in ((current_untagged | current_tagged) - (new_untagged | new_tagged)).to_range_strings(VLAN_LIST_MAX_LENGTH):
+        commands.append(f"switchport general allowed vlan remove {vlan_list}")
+    return commands
+
 def configure_vlans_on_port(switch_ip, port_id, username, password):
     print(f"\n{BLUE}Configuring VLANs for port {port_id} on switch {get_switch_identifier(switch_ip, switch_details_by_ip)}.{RESET}")
 
@@ -443,11 +1531,16 @@ def configure_vlans_on_port(switch_ip, port_id, username, password):
         print(f"{RED}Could not fetch current configuration for port {port_id}.{RESET}")
         return
 
+    # the VLANs that exist on the switch, to check the entered VLAN IDs and to show the VLAN names (usually cached)
+    switch_vlans, vlan_error = vlan_database.get(switch_ip, username, password)
+    if vlan_error:
+        print(f"{BLUE}Could not read the VLANs of the switch ({vlan_error}), VLAN IDs will not be checked.{RESET}")
+
     current_vlans = parse_port_vlan_config(current_config_output)
     print("Current VLAN configuration:")
-    print(f"  PVID: {current_vlans.get('pvid', 'Not set')}")
-    print(f"  Untagged VLANs: {', '.join(current_vlans.get('untagged_vlans', [])) or 'None'}")
-    print(f"  Tagged VLANs: {', '.join(current_vlans.get('tagged_vlans', [])) or 'None'}")
+    print(f"  PVID: {describe_vlan(switch_ip, current_vlans['pvid']) if current_vlans.get('pvid') else 'Not set'}")
+    print(f"  Untagged VLANs: {describe_vlans(switch_ip, current_vlans['untagged_vlans']) or 'None'}")
+    print(f"  Tagged VLANs: {describe_vlans(switch_ip, current_vlans['tagged_vlans']) or 'None'}")
 
     new_pvid_str = ""
     while True:
@@ -457,70 +1550,46 @@ def configure_vlans_on_port(switch_ip, port_id, username, password):
             print(f"{BLUE}PVID/Untagged VLAN configuration will not be changed, or will be derived if clearing all.{RESET}")
             break
         if new_pvid_str.isdigit() and 1 <= int(new_pvid_str) <= 4094:
-            new_pvid = new_pvid_str
+            if switch_vlans and int(new_pvid_str) not in switch_vlans:
+                print(f"{RED}VLAN {new_pvid_str} does not exist on this switch.{RESET}")
+                continue
+            new_pvid = int(new_pvid_str)
             break
         else:
             print(f"{RED}Invalid VLAN ID. Must be a number between 1 and 4094.{RESET}")
             
-    new_tagged_vlans_list = []
+    new_tagged_vlans = VlanSet()
     while True:
-        new_tagged_vlans_str = input("Enter new Tagged VLAN IDs (comma-separated, e.g., 1020,1030, press Enter for none/to clear existing): ").strip()
+        new_tagged_vlans_str = input("Enter new Tagged VLAN IDs (comma-separated, ranges allowed, e.g., 1020,1030,1100-1199, press Enter for none/to clear existing): ").strip()
         if not new_tagged_vlans_str:
             print("No new tagged VLANs specified. Existing tagged VLANs (if any, not matching new PVID) will be removed.")
             break
         
-        temp_tagged_list = []
-        valid_tagged_input = True
-        for v_id_str in new_tagged_vlans_str.split(','):
-            v_id = v_id_str.strip()
-            if v_id.isdigit() and 1 <= int(v_id) <= 4094: # Check only for valid range
-                if new_pvid and v_id == new_pvid:
-                    print(f"Error: VLAN {v_id} cannot be both untagged (as PVID) and explicitly tagged.")
-                    valid_tagged_input = False # Mark as invalid input
-                    break
-                temp_tagged_list.append(v_id)
-            else:
-                print(f"{RED}Invalid VLAN ID '{v_id}' in tagged list. Must be a number between 1 and 4094.{RESET}")
-                valid_tagged_input = False # Mark as invalid input
-                break
-        if valid_tagged_input:
-            new_tagged_vlans_list = temp_tagged_list
-            break
-        # else, loop again for tagged VLAN input
+        try:
+            temp_tagged_vlans = VlanSet.parse(new_tagged_vlans_str)
+        except ValueError:
+            print(f"{RED}Invalid tagged VLAN list '{new_tagged_vlans_str}'. VLAN IDs must be numbers between 1 and 4094.{RESET}")
+            continue
+        if new_pvid and new_pvid in temp_tagged_vlans:
+            print(f"Error: VLAN {new_pvid} cannot be both untagged (as PVID) and explicitly tagged.")
+            continue
+        unknown_vlans = temp_tagged_vlans - VlanSet(switch_vlans) if switch_vlans else VlanSet()
+        if unknown_vlans:
+            print(f"{RED}VLAN(s) {unknown_vlans} do not exist on this switch.{RESET}")
+            continue
+        new_tagged_vlans = temp_tagged_vlans
+        break
 
     if new_pvid is None and not new_tagged_vlans_str: # User skipped PVID and entered nothing for tagged
         confirm_clear = input("No new PVID and no new tagged VLANs specified. This might clear existing VLANs or set to default. Continue? [y|n]: ").lower()
         if confirm_clear not in ['y', 'yes']:
             print(f"{BLUE}Configuration aborted by user.{RESET}")
             return
-        if not new_pvid and not new_tagged_vlans_list: # If user wants to clear, PVID 1 is a safe default
+        if not new_pvid and not new_tagged_vlans: # If user wants to clear, PVID 1 is a safe default
             print(f"{BLUE}Setting PVID to 1 and removing other VLANs as no specific configuration was provided.{RESET}")
-            new_pvid = "1"
-
-    commands = []
-    commands.append(f"interface {port_id}")
-    commands.append("switchport mode general")
+            new_pvid = 1
 
-    old_vlans_on_port = set()
-    if current_vlans.get('pvid'): old_vlans_on_port.add(current_vlans['pvid'])
-    for v in current_vlans.get('untagged_vlans', []): old_vlans_on_port.add(v)
-    for v in current_vlans.get('tagged_vlans', []): old_vlans_on_port.add(v)
-
-    all_new_final_vlans = set()
-    if new_pvid:
-        commands.append(f"switchport general pvid {new_pvid}")
-        commands.append(f"switchport general allowed vlan add {new_pvid} untagged")
-        all_new_final_vlans.add(new_pvid)
-
-    for vlan_id in new_tagged_vlans_list:
-        commands.append(f"switchport general allowed vlan add {vlan_id} tagged")
-        all_new_final_vlans.add(vlan_id)
-
-    vlans_to_remove = old_vlans_on_port - all_new_final_vlans
-    for v_rem in vlans_to_remove:
-        if v_rem == "1" and new_pvid == "1": # Don't try to remove VLAN 1 if it's the new PVID
-             continue
-        commands.append(f"switchport general allowed vlan remove {v_rem}")
+    commands = plan_vlan_commands(port_id, current_vlans, new_pvid, new_tagged_vlans)
 
     if not commands[2:]: # Only interface and switchport mode general
         print(f"{BLUE}No effective configuration changes to apply based on input.{RESET}")
@@ -533,6 +1602,7 @@ def configure_vlans_on_port(switch_ip, port_id, username, password):
     if confirm in ['y', 'yes']:
         print(f"{BLUE}Applying configuration...{RESET}")
         output, error = exec_ssh_config_commands(commands, switch_ip, username, password)
+        vlan_database.invalidate(switch_ip) # the ports of the VLANs have changed
         if error:
             print(f"{RED}Error during configuration: {error}{RESET}")
             if "debug" in sys.argv or output: print(f"Full switch output:\n{output}")
@@ -549,7 +1619,1016 @@ def configure_vlans_on_port(switch_ip, port_id, username, password):
         print(f"{BLUE}Configuration aborted by user.{RESET}")
 
 
-def mac_search_workflow(switch_IPs, username, password):
+############ Bulk VLAN Changes ############
+#
+# Re-patching many ports one by one means a read, a config session and a read-back per port plus a round of
+#   questions each time. Instead, a change list can be loaded from a CSV file with the columns
+#   switch, port, pvid, tagged (tagged VLANs separated by spaces or semicolons, e.g. "1020;1030"), e.g.:
+#       switch,port,pvid,tagged
+#       192.168.23.39,Gi1/0/8,1010,1020;1030
+#       192.168.23.39,Gi1/0/9,1722,
+# 1. the current configuration of all ports of a switch is read in one go
+# 2. the commands of all ports of a switch are sent in a single config session (switches in parallel)
+# 3. everything is read back once more and compared to the requested configuration
+# If any line of the file is invalid, nothing is changed (on the command line --force applies the valid lines anyway).
+#
+###########################################
+
+# returns (changes, problems): the valid rows as dicts switch/port/pvid (int or None)/tagged (VlanSet) and a list of messages for invalid rows
+# tagged VLANs are separated by ";" or spaces and may contain ranges, e.g. "1020;1100-1199"
+def read_vlan_change_list(path, switch_IPs):
+    changes = []
+    problems = []
+    known_IPs = set(switch_IPs)
+    listed_ports = set()
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        for line_number, row in enumerate(csv.reader(f), start=1):
+            if not row or not "".join(row).strip() or row[0].strip().startswith("#"):
+                continue
+            if line_number == 1 and row[0].strip().lower() == "switch":
+                continue # header
+            row = [cell.strip() for cell in row] + [""] * (4 - len(row))
+            switch_IP, port_id, pvid_str, tagged_str = row[:4]
+            try:
+                pvid = int(pvid_str) if pvid_str else None
+                tagged = VlanSet.parse(",".join(re.split(r"[\s,;]+", tagged_str)))
+                VlanSet([pvid] if pvid is not None else []) # an empty PVID means "no PVID", 0 is invalid
+                vlans_valid = True
+            except ValueError:
+                vlans_valid = False
+            if switch_IP not in known_IPs:
+                problems.append(f"line {line_number}: unknown switch '{switch_IP}'")
+            elif not port_id_pattern.match(port_id):
+                problems.append(f"line {line_number}: invalid port '{port_id}'")
+            elif not vlans_valid:
+                problems.append(f"line {line_number}: invalid VLAN ID, must be a number between 1 and 4094")
+            elif pvid and pvid in tagged:
+                problems.append(f"line {line_number}: VLAN {pvid} cannot be both untagged (as PVID) and tagged")
+            elif (switch_IP, port_id) in listed_ports:
+                problems.append(f"line {line_number}: {port_id} on {switch_IP} is listed more than once")
+            else:
+                listed_ports.add((switch_IP, port_id))
+                # like in configure_vlans_on_port: without any VLAN the port goes back to PVID 1
+                changes.append({'switch': switch_IP, 'port': port_id, 'pvid': pvid or (1 if not tagged else None), 'tagged': tagged})
+    return changes, problems
+
+
+# read the configuration of the given (switch IP, port) pairs, one pass per switch, switches in parallel
+# returns {(switch IP, port): (parsed configuration, error)}
+def read_port_vlan_configs(switch_ports, username, password):
+    ports_by_switch = {}
+    for switch_IP, port_id in switch_ports:
+        ports_by_switch.setdefault(switch_IP, []).append(port_id)
+
+    def read_switch(switch_IP):
+        return exec_ssh_commands([f"show interfaces switchport {port_id}" for port_id in ports_by_switch[switch_IP]], switch_IP, username, password)
+
+    configs = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_PARALLEL_SWITCHES, len(ports_by_switch)))) as executor:
+        for switch_IP, (outputs, error) in zip(ports_by_switch, executor.map(read_switch, ports_by_switch)):
+            for port_id in ports_by_switch[switch_IP]:
+                output = outputs.get(f"show interfaces switchport {port_id}")
+                configs[(switch_IP, port_id)] = (parse_port_vlan_config(output), None) if output is not None else (None, error)
+    return configs
+
+
+# does the port configuration (parsed by parse_port_vlan_config) already look like requested?
+def port_vlans_match(config, pvid, tagged):
+    if not config or (pvid and config.get('pvid') != pvid):
+        return False
+    return config['untagged_vlans'] == VlanSet([pvid] if pvid else []) and config['tagged_vlans'] == tagged
+
+
+# add the current configuration of every port as 'current' and the commands needed as 'commands'
+#   (empty if the port is already configured as requested)
+# changes of switches that could not be read get an 'error'
+def plan_vlan_changes(changes, username, password):
+    configs = read_port_vlan_configs([(change['switch'], change['port']) for change in changes], username, password)
+    switch_vlans, _ = vlan_database.get_many(list({change['switch']: None for change in changes}), username, password)
+    for change in changes:
+        change['current'], change['error'] = configs[(change['switch'], change['port'])]
+        if not change['error'] and change['current'].get('pvid') is None:
+            change['error'] = "could not read the port configuration" # e.g. the port doesn't exist on the switch
+        vlans = switch_vlans.get(change['switch'])
+        missing = (VlanSet([change['pvid']] if change['pvid'] else []) | change['tagged']) - VlanSet(vlans) if vlans else VlanSet()
+        if not change['error'] and missing:
+            change['error'] = f"VLAN(s) {missing} do not exist on the switch"
+        if change['error'] or port_vlans_match(change['current'], change['pvid'], change['tagged']):
+            change['commands'] = []
+        else:
+            change['commands'] = plan_vlan_commands(change['port'], change['current'], change['pvid'], change['tagged'])
+    return changes
+
+
+# send the commands of all changes, one config session per switch, switches in parallel
+# sets 'error' on the changes of a switch whose configuration failed
+def apply_vlan_changes(changes, username, password):
+    commands_by_switch = {}
+    for change in changes:
+        if change['commands'] and not change['error']:
+            # "exit" leaves the interface again before the next port's "interface ..." command
+            commands_by_switch.setdefault(change['switch'], []).extend(change['commands'] + ["exit"])
+
+    def apply_switch(switch_IP):
+        return exec_ssh_config_commands(commands_by_switch[switch_IP], switch_IP, username, password)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_PARALLEL_SWITCHES, len(commands_by_switch)))) as executor:
+        results = dict(zip(commands_by_switch, executor.map(apply_switch, commands_by_switch)))
+    for switch_IP in commands_by_switch:
+        vlan_database.invalidate(switch_IP) # the ports of the VLANs have changed
+    for change in changes:
+        if change['switch'] in results and change['commands'] and not change['error']:
+            change['error'] = results[change['switch']][1]
+    return changes
+
+
+# read all changed ports back (one pass per switch) and check that they look like requested
+# sets 'after' and 'verified' on every change that was sent, even if the config session reported an error,
+#   because the commands of the other ports in the same session might have worked
+def verify_vlan_changes(changes, username, password):
+    applied = [change for change in changes if change['commands']]
+    configs = read_port_vlan_configs([(change['switch'], change['port']) for change in applied], username, password)
+    for change in applied:
+        change['after'], _ = configs[(change['switch'], change['port'])]
+        change['verified'] = port_vlans_match(change['after'], change['pvid'], change['tagged'])
+    return changes
+
+
+def bulk_vlan_change_workflow(switch_IPs, username, password):
+    path = input("Enter the path of the CSV file with the changes (switch, port, pvid, tagged): ").strip()
+    try:
+        changes, problems = read_vlan_change_list(path, switch_IPs)
+    except OSError as e:
+        print(f"{RED}Could not read {path}: {e}{RESET}")
+        return
+    # a change list is applied completely or not at all
+    if problems:
+        for problem in problems:
+            print(f"{RED}{problem}{RESET}")
+        print(f"{RED}Please correct {path} first, nothing was changed.{RESET}")
+        return
+    if not changes:
+        print(f"{RED}No valid changes found in {path}.{RESET}")
+        return
+
+    print(f"{BLUE}Reading the current configuration of {len(changes)} port(s)...{RESET}")
+    plan_vlan_changes(changes, username, password)
+    to_apply = [change for change in changes if change['commands'] and not change['error']]
+    for change in changes:
+        if change['error']:
+            print(f"{RED}{get_switch_identifier(change['switch'], switch_details_by_ip)}{RED} {change['port']}: {change['error']}{RESET}")
+        elif not change['commands']:
+            print(f"  {get_switch_identifier(change['switch'], switch_details_by_ip)} {change['port']}: already configured, nothing to do")
+        else:
+            print(f"  {get_switch_identifier(change['switch'], switch_details_by_ip)} {change['port']}: {len(change['commands']) - 2} change(s)")
+            if debug_mode_enabled:
+                for cmd in change['commands']: print(f"    {cmd}")
+    if not to_apply:
+        print(f"{BLUE}No effective configuration changes to apply.{RESET}")
+        return
+
+    switch_count = len({change['switch'] for change in to_apply})
+    confirm = input(f"Apply the changes to {len(to_apply)} port(s) on {switch_count} switch(es)? [y|n]: ").lower()
+    if confirm not in ['y', 'yes']:
+        print(f"{BLUE}Configuration aborted by user.{RESET}")
+        return
+
+    print(f"{BLUE}Applying configuration...{RESET}")
+    apply_vlan_changes(changes, username, password)
+    print("Verifying...")
+    verify_vlan_changes(changes, username, password)
+
+    print("\nSummary:")
+    print(f"{'Switch':<18} | {'Port':<10} | {'PVID':<6} | {'Tagged VLANs':<30} | Result")
+    print("-" * 90)
+    for change in to_apply:
+        if change.get('verified'):
+            result = f"{GREEN}OK{RESET}"
+        elif change['error']:
+            result = f"{RED}failed: {change['error']}{RESET}"
+        else:
+            result = f"{RED}not as requested, please check{RESET}"
+        print(f"{change['switch']:<18} | {change['port']:<10} | {change['pvid'] or '':<6} | {str(change['tagged']):<30} | {result}")
+
+
+# parse the entries of a "show mac address-table" output into dicts
+# 1010     0000.0000.0000        Dynamic     Gi1/0/8
+mac_table_entry_pattern = re.compile(r"^\s*(\d+)\s+([0-9A-Fa-f]{4}\.[0-9A-Fa-f]{4}\.[0-9A-Fa-f]{4})\s+(\S+)\s+(\S+)\s*$")
+
+def parse_mac_table_line(line):
+    match = mac_table_entry_pattern.match(line)
+    if not match:
+        return None
+    return {
+        'vlan': match.group(1),
+        'mac': match.group(2).upper(),
+        'type': match.group(3),
+        'port': match.group(4),
+        'line': line.strip()
+    }
+
+# output can be a string or an iterable of lines (e.g. from stream_ssh_command)
+def iter_mac_table_entries(output):
+    lines = output.splitlines() if isinstance(output, str) else output
+    for line in lines:
+        entry = parse_mac_table_line(line)
+        if entry:
+            yield entry
+
+def parse_mac_table_output(output):
+    return list(iter_mac_table_entries(output))
+
+
+# a MAC is considered directly connected to a switch if it was learned dynamically on a Gi (access) port
+# entries on uplinks (Po1, Te1/0/1, ...) only mean that the MAC is known somewhere behind that uplink
+def is_edge_port_entry(entry):
+    return entry['type'].lower() == "dynamic" and entry['port'].startswith("Gi")
+
+
+# query a single switch for the MAC address
+# returns a dict with the switch IP, the error (if any), the raw output and the matching edge port entries
+def query_switch_for_mac(ip, formatted_mac, username, password):
+    command = f"show mac address-table address {formatted_mac}"
+    output, error = exec_ssh_command(command, ip, username, password)
+    result = {'ip': ip, 'error': error, 'output': output, 'edge_entries': []}
+    if not error:
+        entries = [entry for entry in parse_mac_table_output(output) if entry['mac'] == formatted_mac]
+        if mac_history_store:
+            mac_history_store.record(ip, entries)
+        result['edge_entries'] = [entry for entry in entries if is_edge_port_entry(entry)]
+    return result
+
+
+# maximum number of switches that are queried at the same time
+MAX_PARALLEL_SWITCHES = 8
+
+def concurrent_mac_search(formatted_mac, switch_IPs, username, password, stop_on_first_hit=True):
+    """
+    Queries all given switches for the MAC address in parallel (at most MAX_PARALLEL_SWITCHES at once)
+    and prints the result of every switch as soon as it answers.
+    If stop_on_first_hit is set, queries that have not started yet are cancelled as soon as the MAC
+    was found on a Gi access port.
+    Returns (hits, checked_IPs, skipped_IPs) where hits is a list of query_switch_for_mac results.
+    """
+    hits = []
+    checked_IPs = []
+    stop_event = threading.Event()
+
+    def search_task(ip):
+        if stop_event.is_set():
+            return None # MAC was already found, don't bother this switch anymore
+        return query_switch_for_mac(ip, formatted_mac, username, password)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_PARALLEL_SWITCHES, len(switch_IPs)))) as executor:
+        futures = [executor.submit(search_task, ip) for ip in switch_IPs]
+        for future in as_completed(futures):
+            if future.cancelled() or future.result() is None:
+                continue
+            result = future.result()
+            ip = result['ip']
+            checked_IPs.append(ip)
+            if result['error']:
+                print(f"{RED}Error when checking {get_switch_identifier(ip, switch_details_by_ip)}: {result['error']}{RESET}")
+            elif result['edge_entries']:
+                print(f"{GREEN}  {get_switch_identifier(ip, switch_details_by_ip)}{GREEN}: found on port {result['edge_entries'][0]['port']}{RESET}")
+                hits.append(result)
+                if stop_on_first_hit and not stop_event.is_set():
+                    stop_event.set()
+                    for pending_future in futures:
+                        pending_future.cancel()
+            else:
+                print(f"  {get_switch_identifier(ip, switch_details_by_ip)}: not directly connected")
+                if debug_mode_enabled and result['output']:
+                    print(f"{BLUE}Debug output for switch {get_switch_identifier(ip, switch_details_by_ip)} (MAC {formatted_mac}):{RESET}\n{result['output']}")
+
+    # keep the order of the inventory for the summary
+    checked_set = set(checked_IPs)
+    checked_IPs = [ip for ip in switch_IPs if ip in checked_set]
+    skipped_IPs = [ip for ip in switch_IPs if ip not in checked_set]
+    return hits, checked_IPs, skipped_IPs
+
+
+############ MAC Location Index ############
+#
+# Every full MAC address table that is fetched from a switch is kept in memory so that repeated lookups during
+#   a troubleshooting session can be answered without asking the switches again.
+# The data of a switch is only trusted for MAC_INDEX_TTL seconds. By default this is the MAC aging time the
+#   switch reports ("Aging time is 300 Sec"), because after that an entry may have aged out on the switch anyway.
+#
+############################################
+
+MAC_INDEX_TTL = None # seconds, None = use the aging time reported by the switch
+DEFAULT_MAC_AGING_TIME = 300 # seconds, used if the switch didn't report its aging time
+
+def parse_mac_aging_time(output):
+    match = re.search(r"Aging time is (\d+) Sec", output, re.IGNORECASE)
+    return int(match.group(1)) if match else None
+
+
+class _NamePool:
+    """Maps the few distinct port and type names ("Gi1/0/8", "Dynamic", ...) to small integers and back."""
+
+    def __init__(self):
+        self._names = []
+        self._ids = {}
+        self._lock = threading.Lock()
+
+    def id_of(self, name):
+        name_id = self._ids.get(name)
+        if name_id is None:
+            with self._lock:
+                name_id = self._ids.get(name)
+                if name_id is None:
+                    name_id = len(self._names)
+                    self._names.append(name)
+                    self._ids[name] = name_id
+        return name_id
+
+    def name_of(self, name_id):
+        return self._names[name_id]
+
+
+port_name_pool = _NamePool()
+entry_type_pool = _NamePool()
+
+
+class CompactMacTable:
+    """
+    The MAC table of one switch stored in parallel typed arrays, sorted by MAC:
+    13 bytes per entry instead of a dict with several strings. Lookups use binary search.
+    """
+    __slots__ = ('macs', 'vlans', 'port_ids', 'type_ids')
+
+    def __init__(self):
+        self.macs = array('Q') # MAC as 48 bit integer
+        self.vlans = array('H')
+        self.port_ids = array('H') # see port_name_pool
+        self.type_ids = array('B') # see entry_type_pool
+
+    @classmethod
+    def from_entries(cls, entries):
+        table = cls()
+        for entry in entries:
+            table.append(mac_to_int(entry['mac']), int(entry['vlan']), entry['type'], entry['port'])
+        return table.finish()
+
+    def append(self, mac_int, vlan, type_name, port):
+        self.macs.append(mac_int)
+        self.vlans.append(vlan)
+        self.port_ids.append(port_name_pool.id_of(port))
+        self.type_ids.append(entry_type_pool.id_of(type_name))
+
+    # sort all arrays by MAC, has to be called once after the last append()
+    def finish(self):
+        macs = self.macs
+        if any(macs[i] > macs[i + 1] for i in range(len(macs) - 1)):
+            order = sorted(range(len(macs)), key=macs.__getitem__)
+            self.macs = array('Q', (macs[i] for i in order))
+            self.vlans = array('H', (self.vlans[i] for i in order))
+            self.port_ids = array('H', (self.port_ids[i] for i in order))
+            self.type_ids = array('B', (self.type_ids[i] for i in order))
+        return self
+
+    def __len__(self):
+        return len(self.macs)
+
+    def _entry(self, i):
+        return {
+            'vlan': str(self.vlans[i]),
+            'mac': int_to_mac(self.macs[i]),
+            'type': entry_type_pool.name_of(self.type_ids[i]),
+            'port': port_name_pool.name_of(self.port_ids[i])
+        }
+
+    # all entries of the MAC (it can be in several VLANs)
+    def lookup(self, mac_int):
+        i = bisect.bisect_left(self.macs, mac_int)
+        entries = []
+        while i < len(self.macs) and self.macs[i] == mac_int:
+            entries.append(self._entry(i))
+            i += 1
+        return entries
+
+    def __iter__(self):
+        return (self._entry(i) for i in range(len(self.macs)))
+
+
+class MacLocationIndex:
+    """In-memory index MAC -> locations (switch, port, VLAN, type, fetched at), filled from full MAC table dumps."""
+
+    def __init__(self, ttl=MAC_INDEX_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock() # tables of several switches are fetched (and added) in parallel
+        self._switches = {} # switch IP -> {'fetched_at': ..., 'ttl': ..., 'table': CompactMacTable}
+
+    # replace everything known about a switch with a freshly fetched table
+    # table is a CompactMacTable or a list of parsed entries
+    def update_switch(self, ip, table, aging_time=None, fetched_at=None):
+        if not isinstance(table, CompactMacTable):
+            table = CompactMacTable.from_entries(table)
+        fetched_at = fetched_at or time.time()
+        ttl = self.ttl if self.ttl is not None else (aging_time or DEFAULT_MAC_AGING_TIME)
+        with self._lock:
+            self._switches[ip] = {'fetched_at': fetched_at, 'ttl': ttl, 'table': table}
+
+    def is_fresh(self, ip, now=None):
+        info = self._switches.get(ip)
+        return info is not None and (now or time.time()) - info['fetched_at'] < info['ttl']
+
+    # switches from the list that have no (or only outdated) data in the index
+    def stale_switches(self, switch_IPs):
+        now = time.time()
+        with self._lock:
+            return [ip for ip in switch_IPs if not self.is_fresh(ip, now)]
+
+    # all locations of the MAC on switches whose data is still fresh
+    def lookup(self, formatted_mac, switch_IPs=None):
+        mac_int = mac_to_int(formatted_mac)
+        now = time.time()
+        with self._lock:
+            switches = [(ip, info) for ip, info in self._switches.items()
+                        if self.is_fresh(ip, now) and (switch_IPs is None or ip in switch_IPs)]
+        locations = []
+        for ip, info in switches:
+            for entry in info['table'].lookup(mac_int):
+                locations.append({
+                    'switch': ip,
+                    'port': entry['port'],
+                    'vlan': entry['vlan'],
+                    'type': entry['type'],
+                    'fetched_at': info['fetched_at']
+                })
+        return locations
+
+    def clear(self):
+        with self._lock:
+            self._switches.clear()
+
+    # fetch the tables of the given switches again (in parallel), regardless of their age
+    def refresh(self, switch_IPs, username, password):
+        return fetch_mac_tables(switch_IPs, username, password)
+
+
+mac_location_index = MacLocationIndex()
+
+
+############ MAC History ############
+#
+# Optional persistent store (SQLite) of every MAC location the tool has ever seen, so that it is possible to tell
+#   where a device was connected even after it went offline and aged out of the switches' tables.
+# For every (MAC, switch, port, VLAN) the first and the last time it was seen are kept.
+# Enable it by starting the program with the "history" argument.
+#
+#####################################
+
+MAC_HISTORY_DB_PATH = os.path.join(DATA_DIRECTORY, "mac_history.sqlite3") # not the working directory, which depends on how the program was started
+
+class MacHistoryStore:
+    """Persistent first-seen/last-seen store of MAC locations."""
+
+    def __init__(self, db_path=MAC_HISTORY_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock() # tables of several switches are recorded from parallel threads
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            # the primary key starts with the MAC, so lookups by MAC don't need an extra index
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS mac_sightings (
+                    mac TEXT NOT NULL,
+                    switch_ip TEXT NOT NULL,
+                    port TEXT NOT NULL,
+                    vlan INTEGER NOT NULL,
+                    type TEXT,
+                    first_seen REAL NOT NULL,
+                    last_seen REAL NOT NULL,
+                    PRIMARY KEY (mac, switch_ip, port, vlan)
+                ) WITHOUT ROWID""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS mac_sightings_last_seen ON mac_sightings (last_seen)")
+
+    # record all entries of one switch in a single transaction
+    def record(self, ip, entries, seen_at=None):
+        if not entries:
+            return
+        seen_at = seen_at or time.time()
+        rows = [(entry['mac'], ip, entry['port'], int(entry['vlan']), entry['type'], seen_at, seen_at) for entry in entries]
+        with self._lock, self._conn:
+            self._conn.executemany("""
+                INSERT INTO mac_sightings (mac, switch_ip, port, vlan, type, first_seen, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (mac, switch_ip, port, vlan) DO UPDATE SET
+                    type = excluded.type,
+                    last_seen = max(last_seen, excluded.last_seen)""", rows)
+
+    # all locations of the MAC that were seen in the given time range (unix timestamps, None = open end)
+    # newest first
+    def locations_between(self, formatted_mac, since=None, until=None):
+        query = "SELECT switch_ip, port, vlan, type, first_seen, last_seen FROM mac_sightings WHERE mac = ?"
+        params = [formatted_mac]
+        if since is not None:
+            query += " AND last_seen >= ?"
+            params.append(since)
+        if until is not None:
+            query += " AND first_seen <= ?"
+            params.append(until)
+        query += " ORDER BY last_seen DESC"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [{'switch': r[0], 'port': r[1], 'vlan': str(r[2]), 'type': r[3], 'first_seen': r[4], 'last_seen': r[5]} for r in rows]
+
+    # the most recent edge port (Gi, dynamic) the MAC was seen on, or None
+    def last_known_location(self, formatted_mac):
+        for location in self.locations_between(formatted_mac):
+            if is_edge_port_entry(location):
+                return location
+        return None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+mac_history_store = None # MacHistoryStore, only set if the history is enabled
+
+
+def format_timestamp(timestamp):
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))
+
+
+# fetch and parse the complete MAC address table of a switch
+# every fetched table is also put into the MAC location index (and the MAC history, if enabled)
+# the output is parsed while it is received, the raw table never has to be held in memory as a whole
+# returns (CompactMacTable, error)
+def fetch_mac_table(ip, username, password):
+    table = CompactMacTable()
+    aging_time = None
+    try:
+        with closing(stream_ssh_command("show mac address-table", ip, username, password, timeout=120)) as lines: # large tables take a while
+            for line in lines:
+                match = mac_table_entry_pattern.match(line)
+                if match:
+                    table.append(mac_to_int(match.group(2)), int(match.group(1)), match.group(3), match.group(4))
+                elif aging_time is None:
+                    aging_time = parse_mac_aging_time(line)
+    except Exception as e:
+        return CompactMacTable(), f"SSH/command execution error: {str(e)}"
+    table.finish()
+    mac_location_index.update_switch(ip, table, aging_time)
+    if mac_history_store:
+        mac_history_store.record(ip, table)
+    return table, None
+
+
+# fetch the MAC address tables of all given switches in parallel
+# returns (tables, errors): dicts switch IP -> CompactMacTable / switch IP -> error message
+def fetch_mac_tables(switch_IPs, username, password):
+    tables = {}
+    errors = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_PARALLEL_SWITCHES, len(switch_IPs)))) as executor:
+        futures = {executor.submit(fetch_mac_table, ip, username, password): ip for ip in switch_IPs}
+        for future in as_completed(futures):
+            ip = futures[future]
+            entries, error = future.result()
+            if error:
+                errors[ip] = error
+                print(f"{RED}Error fetching MAC table from {get_switch_identifier(ip, switch_details_by_ip)}: {error}{RESET}")
+            else:
+                tables[ip] = entries
+                print(f"  {get_switch_identifier(ip, switch_details_by_ip)}: {len(entries)} entries")
+    return tables, errors
+
+
+############ Prewarming ############
+#
+# Optional: right after the password is entered, sessions to all queryable switches are opened (and enabled) in the
+#   background while the menu waits for input, so the first search doesn't have to wait for the SSH handshakes.
+# With "prewarm-macs" the MAC address tables are fetched into the MAC index afterwards as well, so the first
+#   searches are answered from the index.
+# Enable it by starting the program with the "prewarm" or "prewarm-macs" argument. The progress is shown in the menu.
+#
+# The background work uses its own daemon threads (not a ThreadPoolExecutor), so exiting the program never waits for it.
+# A search that needs a switch the prewarming is busy with just waits for that session (visible as "session_wait").
+#
+####################################
+
+PREWARM_PARALLEL_SWITCHES = MAX_PARALLEL_SWITCHES
+
+
+class SessionPrewarmer:
+    def __init__(self):
+        self.started = False
+        self.mac_tables = False
+        self.switch_count = 0
+        self.sessions_ready = 0
+        self.tables_ready = 0
+        self.failed = {} # switch IP -> error
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._pending = 0
+
+    def start(self, switch_IPs, username, password, mac_tables=False):
+        self.started = True
+        self.mac_tables = mac_tables
+        self.switch_count = len(switch_IPs)
+        self._pending = len(switch_IPs) * (2 if mac_tables else 1)
+        # first all sessions, then the (slow) MAC tables
+        for ip in switch_IPs:
+            self._queue.put(("session", ip))
+        if mac_tables:
+            for ip in switch_IPs:
+                self._queue.put(("mac_table", ip))
+        for number in range(max(1, min(PREWARM_PARALLEL_SWITCHES, len(switch_IPs)))):
+            threading.Thread(target=self._worker, args=(username, password), name=f"prewarm-{number}", daemon=True).start()
+
+    def _worker(self, username, password):
+        while True:
+            try:
+                task, ip = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                if ip in self.failed:
+                    pass # the session could not be opened, so there is no MAC table either
+                elif task == "session":
+                    ssh_session_pool.run(ip, username, password, lambda session: None)
+                    with self._lock:
+                        self.sessions_ready += 1
+                elif mac_location_index.is_fresh(ip):
+                    with self._lock:
+                        self.tables_ready += 1 # fetched by a search in the meantime
+                else:
+                    _, error = fetch_mac_table(ip, username, password)
+                    if error:
+                        raise RuntimeError(error)
+                    with self._lock:
+                        self.tables_ready += 1
+            except Exception as e:
+                with self._lock:
+                    self.failed[ip] = str(e)
+                if debug_mode_enabled: print(f"{BLUE}DEBUG: Prewarming {ip} failed: {e}{RESET}")
+            finally:
+                with self._lock:
+                    self._pending -= 1
+
+    def is_done(self):
+        with self._lock:
+            return self.started and self._pending == 0
+
+    def status_line(self):
+        with self._lock:
+            status = f"{self.sessions_ready}/{self.switch_count} sessions open"
+            if self.mac_tables:
+                status += f", {self.tables_ready}/{self.switch_count} MAC tables loaded"
+            if self.failed:
+                status += f", {len(self.failed)} switch(es) failed"
+            state = "done" if self._pending == 0 else "in progress"
+        return f"Prewarming ({state}): {status}"
+
+
+prewarmer = SessionPrewarmer()
+
+
+############ Topology (LLDP) ############
+#
+# A MAC that is not directly connected to a switch shows up on the uplink it was learned on (e.g. "Po1").
+# Instead of asking every switch, the search can follow that uplink to the neighboring switch (found via LLDP)
+#   until the MAC shows up on an access port. On a tree topology this needs far fewer queries.
+# The neighbor information of every switch is cached for TOPOLOGY_CACHE_TTL seconds.
+#
+########################################
+
+TOPOLOGY_CACHE_TTL = 3600 # seconds
+TOPOLOGY_ROOT_SWITCH = None # IP of the switch the walk starts at (usually the core switch), None = first queryable switch
+
+# Local
+# Interface RemID   Chassis ID          Port ID           System Name
+# --------- ------- ------------------- ----------------- -----------------
+# Gi1/0/48  2       F8:B1:56:6D:1A:2B   Gi1/0/48          dell-n1548p-2
+lldp_remote_device_pattern = re.compile(r"^\s*((?:Gi|Te|Po)\d+(?:/\d+)*)\s+(\d+)\s+(\S+)\s+(\S+)(?:\s+(\S+))?\s*$")
+
+def parse_lldp_remote_devices(output):
+    neighbors = {} # local port -> list of {'chassis_id', 'port_id', 'system_name'}
+    for line in output.splitlines():
+        match = lldp_remote_device_pattern.match(line)
+        if match:
+            neighbors.setdefault(match.group(1), []).append({
+                'chassis_id': match.group(3),
+                'port_id': match.group(4),
+                'system_name': match.group(5) or ""
+            })
+    return neighbors
+
+
+# Channel   Ports                             Ch-Type Hash Type Min-links Local Prf
+# -------   -----------------------------     -------- --------- --------- ---------
+# Po1       Active: Gi1/0/47, Gi1/0/48        Dynamic  7         1         Disabled
+def parse_port_channel_members(output):
+    members = {} # port channel -> list of member ports
+    current_channel = None
+    for line in output.splitlines():
+        channel_match = re.match(r"^(Po\d+)\b", line)
+        if channel_match:
+            current_channel = channel_match.group(1)
+            members[current_channel] = []
+        elif not line.startswith((" ", "\t")):
+            current_channel = None # member lists can continue on indented lines only
+        if current_channel:
+            members[current_channel].extend(re.findall(r"\b(?:Gi|Te)\d+/\d+/\d+\b", line))
+    return members
+
+
+class TopologyMap:
+    """Cached LLDP neighbor and port channel information per switch."""
+
+    def __init__(self, ttl=TOPOLOGY_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._switches = {} # switch IP -> {'fetched_at', 'neighbors', 'port_channels'}
+        self._management_IPs = {} # (switch IP, local port) -> neighbor switch IP, learned from LLDP details
+
+    def _get_switch(self, ip, username, password):
+        with self._lock:
+            info = self._switches.get(ip)
+        if info and time.time() - info['fetched_at'] < self.ttl:
+            return info
+        lldp_output, error = exec_ssh_command("show lldp remote-device all", ip, username, password)
+        if error:
+            raise RuntimeError(error)
+        channel_output, error = exec_ssh_command("show interfaces port-channel", ip, username, password)
+        if error:
+            raise RuntimeError(error)
+        info = {
+            'fetched_at': time.time(),
+            'neighbors': parse_lldp_remote_devices(lldp_output),
+            'port_channels': parse_port_channel_members(channel_output)
+        }
+        with self._lock:
+            self._switches[ip] = info
+        return info
+
+    # switch hostnames known so far: from the prompts of the pooled sessions and the optional 'hostname' in the inventory
+    def _known_hostnames(self, switch_IPs):
+        hostnames = {}
+        for ip in switch_IPs:
+            hostname = switch_details_by_ip.get(ip, {}).get('hostname') or ssh_session_pool.hostname_of(ip)
+            if hostname:
+                hostnames[hostname.lower()] = ip
+        return hostnames
+
+    # the LLDP details of the port contain the management address of the neighbor
+    def _neighbor_ip_from_details(self, ip, port, switch_IPs, username, password):
+        key = (ip, port)
+        if key not in self._management_IPs:
+            output, error = exec_ssh_command(f"show lldp remote-device detail {port}", ip, username, password)
+            if error:
+                return None
+            candidates = [address for address in re.findall(r"\b\d{1,3}(?:\.\d{1,3}){3}\b", output) if address in switch_IPs]
+            self._management_IPs[key] = candidates[0] if candidates else None
+        return self._management_IPs[key]
+
+    # returns the IP of the (queryable) switch that is connected to the given port, None if there is none
+    # port channels are resolved to their member ports first
+    def neighbor_switch(self, ip, port, switch_IPs, username, password):
+        info = self._get_switch(ip, username, password)
+        ports = info['port_channels'].get(port) or [port]
+        hostnames = self._known_hostnames(switch_IPs)
+        for member_port in ports:
+            for neighbor in info['neighbors'].get(member_port, []):
+                neighbor_ip = hostnames.get(neighbor['system_name'].lower())
+                if neighbor_ip and neighbor_ip != ip:
+                    return neighbor_ip
+        for member_port in ports:
+            if info['neighbors'].get(member_port):
+                neighbor_ip = self._neighbor_ip_from_details(ip, member_port, switch_IPs, username, password)
+                if neighbor_ip and neighbor_ip != ip:
+                    return neighbor_ip
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._switches.clear()
+            self._management_IPs.clear()
+
+
+topology_map = TopologyMap()
+
+
+############ Stacks ############
+#
+# Several N1500 units can be stacked and are then managed (and queried) as one switch through the stack master.
+# If the inventory has more than one IP that leads to the same stack, asking all of them only returns the same
+#   MAC table again. Instead of keeping 'query': 'no' flags up to date by hand, the units of every switch are read
+#   from "show switch" and its burned in MAC from "show system". IPs that turn out to be the same stack (same burned in MAC)
+#   are only queried once. Hostnames and models are not enough, e.g. several standalone switches can still be called "console".
+# The port names tell which unit a MAC is connected to (Gi2/0/5 -> unit 2). An inventory entry with
+#   'stack_master': '<IP of the stack>' and 'stack_unit': '2' describes where that unit is mounted, hits on it are shown with its location.
+# The result is cached for STACK_CACHE_TTL seconds in STACK_CACHE_PATH, so it survives restarts of the program.
+#
+################################
+
+STACK_CACHE_TTL = 24 * 3600 # seconds, stacks don't change often
+STACK_CACHE_PATH = os.path.join(DATA_DIRECTORY, "stack_cache.json")
+
+stack_port_pattern = re.compile(r"^[A-Za-z]+(\d+)/\d+/\d+$")
+
+# Gi2/0/5 -> 2, None for ports without a unit number (e.g. Po1)
+def port_unit(port):
+    match = stack_port_pattern.match(port)
+    return int(match.group(1)) if match else None
+
+
+#     Management Standby   Preconfig     Plugged-in    Switch        Code
+# SW  Status     Status    Model ID      Model ID      Status        Version
+# --- ---------- --------- ------------- ------------- ------------- -----------
+# 1   Mgmt Sw              N1548P        N1548P        OK            6.6.0.2
+# 2   Stack Mbr  Oper Stby N1524P        N1524P        OK            6.6.0.2
+# the columns are cut at the positions of the separator line, as the standby status is often empty
+def parse_stack_units(output_show_switch):
+    units = {} # unit number -> {'management', 'model', 'status'}
+    columns = None
+    for line in output_show_switch.splitlines():
+        if columns is None:
+            if line.startswith("---"):
+                columns = [match.span() for match in re.finditer(r"-+", line)]
+            continue
+        if len(columns) < 6 or not line[:columns[0][1]].strip().isdigit():
+            continue
+        starts = [start for start, _ in columns] + [None]
+        values = [line[starts[i]:starts[i + 1]].strip() for i in range(len(columns))]
+        units[int(values[0])] = {'management': values[1], 'model': values[4] or values[3], 'status': values[5]}
+    return units
+
+
+# "Burned In MAC Address: F8B1.5656.7B29" from "show system", the MAC of the switch (of the stack for stacks)
+# returns the MAC in xxxx.xxxx.xxxx format or None
+def parse_stack_mac(output_show_system):
+    match = re.search(r"Burned In MAC Address[\s.:]*([0-9A-Fa-f.:-]+)", output_show_system, re.IGNORECASE)
+    if not match:
+        return None
+    mac = non_alnum_pattern.sub("", match.group(1)).upper()
+    return int_to_mac(int(mac, 16)) if hex_mac_pattern.fullmatch(mac) else None
+
+
+class StackMap:
+    """Cached stack units per switch IP, used to query every stack only once."""
+
+    def __init__(self, path=STACK_CACHE_PATH, ttl=STACK_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._switches = None # switch IP -> {'fetched_at', 'hostname', 'stack_mac', 'units'}, loaded on first use
+
+    def _load(self):
+        if self._switches is None:
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    switches = json.load(f)
+                # entries of older versions without the stack MAC are discovered again
+                switches = {ip: info for ip, info in switches.items() if 'stack_mac' in info}
+                for info in switches.values():
+                    info['units'] = {int(unit): details for unit, details in info['units'].items()}
+            except (OSError, ValueError, KeyError, AttributeError):
+                switches = {}
+            self._switches = switches
+        return self._switches
+
+    def _save(self):
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self._switches, f, indent=1)
+        except OSError as e:
+            if debug_mode_enabled: print(f"{BLUE}DEBUG: Could not write the stack cache {self.path}: {e}{RESET}")
+
+    def info(self, ip):
+        with self._lock:
+            info = self._load().get(ip)
+        if info and time.time() - info['fetched_at'] < self.ttl:
+            return info
+        return None
+
+    # read "show switch" and "show system" from the switches that are not cached (in parallel)
+    # called after a search with the switches that answered, so their sessions are still open and this is quick
+    def discover(self, switch_IPs, username, password):
+        unknown_IPs = [ip for ip in switch_IPs if self.info(ip) is None]
+        if not unknown_IPs:
+            return
+
+        # returns (units, stack MAC), the stack MAC is None if it couldn't be read
+        def discover_switch(ip):
+            output, error = exec_ssh_command("show switch", ip, username, password)
+            if error:
+                return None, None
+            units = parse_stack_units(output)
+            output, error = exec_ssh_command("show system", ip, username, password)
+            return units, None if error else parse_stack_mac(output)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(MAX_PARALLEL_SWITCHES, len(unknown_IPs)))) as executor:
+            results = list(executor.map(discover_switch, unknown_IPs))
+        with self._lock:
+            switches = self._load()
+            for ip, (units, stack_mac) in zip(unknown_IPs, results):
+                if units: # unreachable switches are tried again next time
+                    switches[ip] = {'fetched_at': time.time(), 'hostname': ssh_session_pool.hostname_of(ip), 'stack_mac': stack_mac, 'units': units}
+            self._save()
+
+    def invalidate(self, ip=None):
+        with self._lock:
+            switches = self._load()
+            if ip is None:
+                switches.clear()
+            else:
+                switches.pop(ip, None)
+            self._save()
+
+    def plan(self, switch_IPs):
+        """
+        Returns (query_IPs, duplicates): the switches to query, one per stack, in the given order,
+        and {skipped IP: IP of the same stack that is queried instead}.
+        Only cached information is used, switches that were never discovered (or without a known stack MAC) are always queried.
+        """
+        query_IPs = []
+        duplicates = {}
+        stacks = {} # stack MAC -> queried IP
+        for ip in switch_IPs:
+            info = self.info(ip)
+            if not info or not info.get('stack_mac'):
+                query_IPs.append(ip) # unknown, better ask it
+                continue
+            if info['stack_mac'] in stacks:
+                duplicates[ip] = stacks[info['stack_mac']]
+            else:
+                stacks[info['stack_mac']] = ip
+                query_IPs.append(ip)
+        return query_IPs, duplicates
+
+    # "unit 2, N1524P" / "unit 2: Fertigung - Verteiler 1.2" for ports of stacks with more than one unit, "" otherwise
+    def describe_port(self, ip, port):
+        info = self.info(ip)
+        unit = port_unit(port)
+        if not info or len(info['units']) < 2 or unit is None:
+            return ""
+        for entry in switch_inventory:
+            if entry.get('stack_master') == ip and entry.get('stack_unit') == str(unit):
+                return f"unit {unit}: {entry.get('location', 'N/A')} - {entry.get('rack_details', 'N/A')}"
+        model = info['units'].get(unit, {}).get('model')
+        return f"unit {unit}, {model}" if model else f"unit {unit}"
+
+
+stack_map = StackMap()
+
+
+# for "Switches checked"
+def describe_stack_duplicates(duplicates):
+    return [f"{get_switch_identifier(ip, switch_details_by_ip)} (same stack as {master_ip})" for ip, master_ip in duplicates.items()]
+
+
+# the port with the stack unit it belongs to, e.g. "Gi2/0/5 (unit 2, N1524P)"
+def describe_switch_port(ip, port):
+    unit_details = stack_map.describe_port(ip, port)
+    return f"{port} ({unit_details})" if unit_details else port
+
+
+def topology_mac_search(formatted_mac, switch_IPs, username, password):
+    """
+    Starts at the root switch and follows the port the MAC was learned on from switch to switch
+    until the MAC shows up on an access port (a Gi port without a neighboring switch).
+    Returns (hit, visited_IPs). hit is a query_switch_for_mac result or None if the walk got stuck.
+    """
+    current_ip = TOPOLOGY_ROOT_SWITCH if TOPOLOGY_ROOT_SWITCH in switch_IPs else switch_IPs[0]
+    visited_IPs = []
+    while current_ip and current_ip not in visited_IPs:
+        visited_IPs.append(current_ip)
+        result = query_switch_for_mac(current_ip, formatted_mac, username, password)
+        if result['error']:
+            print(f"{RED}Error when checking {get_switch_identifier(current_ip, switch_details_by_ip)}: {result['error']}{RESET}")
+            return None, visited_IPs
+        entries = [entry for entry in parse_mac_table_output(result['output']) if entry['mac'] == formatted_mac]
+        if not entries:
+            print(f"  {get_switch_identifier(current_ip, switch_details_by_ip)}: MAC unknown to this switch")
+            return None, visited_IPs
+
+        port = entries[0]['port']
+        try:
+            next_ip = topology_map.neighbor_switch(current_ip, port, switch_IPs, username, password)
+        except RuntimeError as e:
+            print(f"{RED}Error fetching LLDP neighbors from {get_switch_identifier(current_ip, switch_details_by_ip)}: {e}{RESET}")
+            return None, visited_IPs
+
+        if next_ip is None:
+            if result['edge_entries']:
+                print(f"{GREEN}  {get_switch_identifier(current_ip, switch_details_by_ip)}{GREEN}: found on port {port}{RESET}")
+                return result, visited_IPs
+            print(f"  {get_switch_identifier(current_ip, switch_details_by_ip)}: learned on {port}, but no known switch behind it")
+            return None, visited_IPs
+        print(f"  {get_switch_identifier(current_ip, switch_details_by_ip)}: learned on uplink {port}, following it to {get_switch_identifier(next_ip, switch_details_by_ip)}")
+        current_ip = next_ip
+    return None, visited_IPs
+
+
+# with follow_uplinks the MAC is first searched by walking the LLDP topology (see topology_mac_search),
+#   all switches are only asked in parallel if the walk doesn't lead to the MAC
+def mac_search_workflow(switch_IPs, username, password, follow_uplinks=False):
     mac = input("Please enter the MAC-address to find: ")
     device_found = False
 
@@ -569,53 +2648,328 @@ def mac_search_workflow(switch_IPs, username, password):
 
     print(f"Formatted MAC: {formatted_mac}")
 
-    switches_checked = []
-    for ip in switch_IPs:
-        print(f"Checking switch {ip}...")
-        switches_checked.append(get_switch_identifier(ip, switch_details_by_ip)) # Store formatted identifier
-        command = f"show mac address-table address {formatted_mac}"
-        output, error = exec_ssh_command(command, ip, username, password)
+    # first look into the MAC index: if the MAC is known there, only switches without fresh data have to be asked
+    # a miss in the index is not trusted (the device might have come online since), then all switches are asked
+    cached_locations = [location for location in mac_location_index.lookup(formatted_mac, switch_IPs) if is_edge_port_entry(location)]
+    remaining_IPs = mac_location_index.stale_switches(switch_IPs) if cached_locations else list(switch_IPs)
+    switches_checked = [get_switch_identifier(ip, switch_details_by_ip) + " (cached)" for ip in switch_IPs if ip not in remaining_IPs]
+    hits = []
+    for location in cached_locations:
+        age = round(time.time() - location['fetched_at'])
+        print(f"{GREEN}  {get_switch_identifier(location['switch'], switch_details_by_ip)}{GREEN}: found on port {location['port']} (from MAC index, {age}s old){RESET}")
+        entry = {'vlan': location['vlan'], 'mac': formatted_mac, 'type': location['type'], 'port': location['port'],
+                 'line': f"{location['vlan']:<8} {formatted_mac:<21} {location['type']:<11} {location['port']}"}
+        hits.append({'ip': location['switch'], 'error': None, 'output': "", 'edge_entries': [entry]})
+
+    if follow_uplinks and not hits and switch_IPs:
+        print("Following the uplinks via LLDP...")
+        hit, visited_IPs = topology_mac_search(formatted_mac, switch_IPs, username, password)
+        switches_checked.extend(get_switch_identifier(ip, switch_details_by_ip) for ip in visited_IPs)
+        remaining_IPs = [ip for ip in remaining_IPs if ip not in visited_IPs]
+        if hit:
+            hits = [hit]
+        elif remaining_IPs:
+            print(f"{BLUE}The uplinks didn't lead to the MAC, falling back to searching all switches.{RESET}")
+
+    while hits or remaining_IPs:
+        if not hits:
+            # IPs that lead to the same stack are only asked once
+            remaining_IPs, stack_duplicates = stack_map.plan(remaining_IPs)
+            switches_checked.extend(describe_stack_duplicates(stack_duplicates))
+            # switches that were unreachable a moment ago are not waited for again
+            remaining_IPs, unreachable = switch_health.partition(remaining_IPs)
+            switches_checked.extend(describe_unreachable(unreachable))
+            for line in describe_unreachable(unreachable):
+                print(f"{RED}  {line}{RESET}")
+            print(f"Checking {len(remaining_IPs)} switch(es)...")
+            hits, checked_IPs, remaining_IPs = concurrent_mac_search(formatted_mac, remaining_IPs, username, password)
+            switches_checked.extend(get_switch_identifier(ip, switch_details_by_ip) for ip in checked_IPs) # Store formatted identifier
+            stack_map.discover(checked_IPs, username, password)
+
+        # the interactive questions are only asked once the (parallel) search is done
+        for hit in hits:
+            ip = hit['ip']
+            port_on_switch = hit['edge_entries'][0]['port']
+            print(f"\n{GREEN}>>> {formatted_mac} was found on switch {get_switch_identifier(ip, switch_details_by_ip)}{GREEN} on port {describe_switch_port(ip, port_on_switch)}.{RESET}")
+            print(f"Relevant output line(s):")
+            for entry in hit['edge_entries']:
+                print(entry['line'])
+
+            device_found = True
+            answer = input("\nDo you want to see the interface configuration for this port? [y|n] ").lower()
+            if answer == "y" or answer == "yes":
+                port_config_cmd = f"show interfaces switchport {port_on_switch}"
+                cfg_output, cfg_error = exec_ssh_command(port_config_cmd, ip, username, password)
+                if cfg_error: # Use original error message as it's already formatted
+                    print(f"Error fetching port configuration from {ip}: {cfg_error}")
+                else:
+                    print(cfg_output)
 
-        if error:
-            print(f"Error when checking {ip}: {error}")
-        else:
-            port_on_switch = get_port_from_output(output)
-            # Check if MAC is found, is dynamic, and on a Gi port
-            if formatted_mac.lower() in output.lower() and \
-               "dynamic" in output.lower().split() and \
-               port_on_switch and port_on_switch.startswith("Gi"):
-
-                print(f"\n{GREEN}>>> {formatted_mac} was found on switch {get_switch_identifier(ip, switch_details_by_ip)} on port {port_on_switch}.{RESET}")
-                print(f"Relevant output line(s):")
-                for line in output.splitlines():
-                    if formatted_mac.lower() in line.lower() and port_on_switch in line:
-                        print(line.strip())
-
-                device_found = True
-                answer = input("\nDo you want to see the interface configuration for this port? [y|n] ").lower()
-                if answer == "y" or answer == "yes":
-                    port_config_cmd = f"show interfaces switchport {port_on_switch}"
-                    cfg_output, cfg_error = exec_ssh_command(port_config_cmd, ip, username, password)
-                    if cfg_error: # Use original error message as it's already formatted
-                        print(f"Error fetching port configuration from {ip}: {cfg_error}")
-                    else:
-                        print(cfg_output)
-
-                if ip != switch_IPs[-1]: # If not the last switch
-                    answer_continue = input("\nContinue the search on other switches? [y|n] ").lower()
-                    if not (answer_continue == "y" or answer_continue == "yes"):
-                        return # Found, and user does not want to continue
-                else: # Last switch checked
-                    return # Found on last switch, end search
-
-            elif debug_mode_enabled and output:
-                print(f"{BLUE}Debug output for switch {get_switch_identifier(ip, switch_details_by_ip)} (MAC {formatted_mac}):{RESET}\n{output}")
+        if hits and remaining_IPs: # found, but not all switches have been checked yet
+            answer_continue = input(f"\nContinue the search on the {len(remaining_IPs)} remaining switch(es)? [y|n] ").lower()
+            if not (answer_continue == "y" or answer_continue == "yes"):
+                return # Found, and user does not want to continue
+        hits = []
 
     if not device_found:
         print(f"\n{RED}{formatted_mac} was not found directly connected to a Gi port on the checked switches.{RESET}")
+        if mac_history_store:
+            location = mac_history_store.last_known_location(formatted_mac)
+            if location:
+                print(f"{BLUE}Last known location: switch {get_switch_identifier(location['switch'], switch_details_by_ip)}{BLUE} port {location['port']} (VLAN {location['vlan']}), last seen {format_timestamp(location['last_seen'])}.{RESET}")
+            else:
+                print(f"{BLUE}{formatted_mac} was never seen before according to the MAC history.{RESET}")
     print(f"Switches checked: {', '.join(switches_checked)}")
 
 
+# the user can either enter several MAC addresses separated by commas/spaces or the path to a file containing them
+# returns the list of (unformatted) MAC addresses
+def read_mac_list(user_input):
+    user_input = user_input.strip()
+    if os.path.isfile(user_input):
+        with open(user_input, encoding='utf-8') as f:
+            text = f.read()
+    else:
+        text = user_input
+    return [m for m in re.split(r"[\s,;]+", text) if m]
+
+
+def batch_mac_search_workflow(switch_IPs, username, password):
+    user_input = input("Please enter the MAC-addresses to find (separated by comma/space) or the path to a file with one MAC per line: ")
+
+    formatted_macs = []
+    for mac in read_mac_list(user_input):
+        formatted_mac = format_mac_address(mac)
+        if not formatted_mac:
+            print(f"{RED}Skipping '{mac}'.{RESET}")
+        elif formatted_mac not in formatted_macs:
+            formatted_macs.append(formatted_mac)
+    if not formatted_macs:
+        print(f"{RED}No valid MAC addresses entered.{RESET}")
+        return
+
+    # instead of asking every switch for every MAC, fetch each switch's table once and answer all MACs from it
+    # switches whose table is still fresh in the MAC index don't have to be asked at all
+    # of several IPs of the same stack only one is asked
+    switch_IPs, stack_duplicates = stack_map.plan(switch_IPs)
+    stale_IPs, unreachable = switch_health.partition(mac_location_index.stale_switches(switch_IPs))
+    errors = {}
+    if stack_duplicates:
+        print(f"{BLUE}Skipping {len(stack_duplicates)} switch(es) that belong to a stack which is queried under another IP.{RESET}")
+    for line in describe_unreachable(unreachable):
+        print(f"{RED}Skipping {line}{RESET}")
+    if stale_IPs:
+        print(f"Fetching the MAC address tables of {len(stale_IPs)} switch(es) to search for {len(formatted_macs)} MAC address(es)...")
+        tables, errors = fetch_mac_tables(stale_IPs, username, password)
+        stack_map.discover(list(tables), username, password)
+    if len(stale_IPs) + len(unreachable) < len(switch_IPs):
+        print(f"{BLUE}Using cached MAC tables for {len(switch_IPs) - len(stale_IPs) - len(unreachable)} switch(es).{RESET}")
+
+    print("\nSummary:")
+    print("--------------------------------------------------------------------------------------------------------------------")
+    print(f"{'MAC Address':<16} | {'Switch':<18} | {'Location':<15} | {'Rack/Details':<20} | {'Port':<10} | {'VLAN':<6}")
+    print("--------------------------------------------------------------------------------------------------------------------")
+    found_count = 0
+    for formatted_mac in formatted_macs:
+        locations = [location for location in mac_location_index.lookup(formatted_mac, switch_IPs) if is_edge_port_entry(location)]
+        if not locations:
+            print(f"{RED}{formatted_mac:<16} | {'not found':<18} |{RESET}")
+            continue
+        found_count += 1
+        for location in locations:
+            ip = location['switch']
+            details = switch_details_by_ip.get(ip, {})
+            print(f"{GREEN}{formatted_mac:<16}{RESET} | {ip:<18} | {details.get('location', ''):<15} | {details.get('rack_details', ''):<20} | {location['port']:<10} | {location['vlan']:<6} {stack_map.describe_port(ip, location['port'])}")
+    print("--------------------------------------------------------------------------------------------------------------------")
+    print(f"{found_count} of {len(formatted_macs)} MAC address(es) found directly connected to a Gi port.")
+    if errors:
+        print(f"{RED}Switches that could not be searched: {', '.join(get_switch_identifier(ip, switch_details_by_ip) for ip in errors)}{RESET}")
+
+
+# stream the MAC address tables of the switches straight into a CSV, JSON Lines (*.jsonl) or JSON (*.json, one array) file
+# the tables are read in parallel and every entry is written as soon as it was received and parsed,
+#   so not even a table with 10k+ entries ever has to be held in memory completely
+# if writing fails (e.g. the disk is full), the readers are stopped and the error is raised
+# returns dicts switch IP -> number of exported entries / switch IP -> error message
+def export_mac_tables(switch_IPs, username, password, output_path, edge_ports_only=True):
+    file_format = output_path.lower().rsplit(".", 1)[-1] if output_path.lower().endswith((".jsonl", ".json")) else "csv"
+    rows = queue.Queue(maxsize=10000) # bounded, so a slow disk throttles the readers instead of filling up memory
+    switch_done = object()
+    cancelled = threading.Event() # set when writing failed, the readers stop at their next line
+
+    def export_switch(ip):
+        count = 0
+        try:
+            if cancelled.is_set():
+                return count, "export cancelled"
+            with closing(stream_ssh_command("show mac address-table", ip, username, password, timeout=300)) as lines:
+                for line in lines:
+                    if cancelled.is_set():
+                        return count, "export cancelled"
+                    entry = parse_mac_table_line(line)
+                    if entry and (not edge_ports_only or is_edge_port_entry(entry)):
+                        rows.put((ip, entry))
+                        count += 1
+            return count, None
+        except Exception as e:
+            return count, f"SSH/command execution error: {str(e)}"
+        finally:
+            rows.put(switch_done)
+
+    fields = ['switch', 'location', 'rack_details', 'vlan', 'mac', 'type', 'port']
+    counts = {}
+    errors = {}
+    with open(output_path, 'w', newline='', encoding='utf-8') as f, \
+         ThreadPoolExecutor(max_workers=max(1, min(MAX_PARALLEL_SWITCHES, len(switch_IPs)))) as executor:
+        writer = csv.DictWriter(f, fieldnames=fields) if file_format == "csv" else None
+        futures = {executor.submit(export_switch, ip): ip for ip in switch_IPs}
+
+        finished_switches = 0
+        try:
+            if writer:
+                writer.writeheader()
+            elif file_format == "json":
+                f.write("[")
+            row_separator = "\n"
+            while finished_switches < len(switch_IPs):
+                item = rows.get()
+                if item is switch_done:
+                    finished_switches += 1
+                    continue
+                ip, entry = item
+                details = switch_details_by_ip.get(ip, {})
+                row = {'switch': ip, 'location': details.get('location', ''), 'rack_details': details.get('rack_details', ''),
+                       'vlan': entry['vlan'], 'mac': entry['mac'], 'type': entry['type'], 'port': entry['port']}
+                if writer:
+                    writer.writerow(row)
+                elif file_format == "json":
+                    f.write(row_separator + json.dumps(row))
+                    row_separator = ",\n"
+                else:
+                    f.write(json.dumps(row) + "\n")
+            if file_format == "json":
+                f.write("\n]\n")
+        except BaseException:
+            # the readers might be blocked on the full queue, keep taking rows until all of them have stopped
+            # (otherwise leaving the with block would wait for them forever)
+            cancelled.set()
+            while finished_switches < len(switch_IPs):
+                if rows.get() is switch_done:
+                    finished_switches += 1
+            raise
+
+        for future, ip in futures.items():
+            counts[ip], error = future.result()
+            if error:
+                errors[ip] = error
+    return counts, errors
+
+
+def export_mac_tables_workflow(switch_IPs, username, password):
+    target_IPs_str = input("Enter IP(s) or selector(s) of the switch(es) to export (comma-separated, e.g. location=Fertigung, press Enter for all switches): ").strip()
+    if target_IPs_str:
+        target_IPs, unmatched = switch_inventory.select(target_IPs_str.split(","), within=switch_IPs)
+        if unmatched or not target_IPs:
+            print(f"No switch matches {', '.join(unmatched) or target_IPs_str}. Please choose from the inventory or add to it.")
+            return
+    else:
+        target_IPs = switch_IPs
+    output_path = input("Enter the file to export to (*.csv, *.jsonl or *.json): ").strip()
+    if not output_path:
+        print(f"{RED}No file entered.{RESET}")
+        return
+    include_uplinks = input("Also export MACs learned on uplinks/port channels (not only Gi access ports)? [y|n] ").lower() in ['y', 'yes']
+
+    target_IPs, stack_duplicates = stack_map.plan(target_IPs) # a stack reachable under several IPs is only exported once
+    for line in describe_stack_duplicates(stack_duplicates):
+        print(f"  Skipping {line}")
+    print(f"{BLUE}Exporting the MAC address tables of {len(target_IPs)} switch(es) to {output_path}...{RESET}")
+    try:
+        counts, errors = export_mac_tables(target_IPs, username, password, output_path, edge_ports_only=not include_uplinks)
+    except OSError as e:
+        print(f"{RED}Could not write {output_path}: {e}{RESET}")
+        return
+    for ip in target_IPs:
+        if ip in errors:
+            print(f"{RED}Error exporting from {get_switch_identifier(ip, switch_details_by_ip)}: {errors[ip]}{RESET}")
+        else:
+            print(f"  {get_switch_identifier(ip, switch_details_by_ip)}: {counts[ip]} entries")
+    print(f"{GREEN}{sum(counts.values())} entries exported to {output_path}.{RESET}")
+
+
+def refresh_mac_index_workflow(switch_IPs, username, password):
+    target_IPs_str = input("Enter IP(s) or selector(s) of the switches to refresh (comma-separated, press Enter to refresh all switches): ").strip()
+    if target_IPs_str:
+        refresh_IPs, unmatched = switch_inventory.select(target_IPs_str.split(","), within=switch_IPs)
+        if unmatched or not refresh_IPs:
+            print(f"No switch matches {', '.join(unmatched) or target_IPs_str}. Please choose from the inventory or add to it.")
+            return
+    else:
+        refresh_IPs = switch_IPs
+    refresh_mac_index(refresh_IPs, username, password)
+
+
+def refresh_mac_index(refresh_IPs, username, password):
+    refresh_IPs, stack_duplicates = stack_map.plan(refresh_IPs)
+    for line in describe_stack_duplicates(stack_duplicates):
+        print(f"  Skipping {line}")
+    print(f"Fetching the MAC address tables of {len(refresh_IPs)} switch(es)...")
+    tables, errors = mac_location_index.refresh(refresh_IPs, username, password)
+    stack_map.discover(list(tables), username, password)
+    print(f"{GREEN}MAC index refreshed: {sum(len(entries) for entries in tables.values())} entries from {len(tables)} switch(es).{RESET}")
+
+
+# pings/TCP-probes an IP range, so the switches learn the MACs (and ARP entries) of hosts that have been quiet for a while
+def sweep_workflow(switch_IPs, username, password):
+    targets_str = input("Enter subnet(s), range(s) or IP(s) to sweep (comma-separated, e.g. 192.168.20.0/22, 192.168.23.10-200): ").strip()
+    if not targets_str:
+        return
+    try:
+        addresses = network_sweep.parse_targets(targets_str.split(","))
+    except ValueError as e:
+        print(f"{RED}Invalid sweep target: {e}{RESET}")
+        return
+    method = "ping, then TCP" if network_sweep.icmp_available() else "TCP only, ICMP needs admin/root rights"
+    print(f"Sweeping {len(addresses)} address(es) ({method})...")
+    sweep_started = time.time()
+    alive = network_sweep.sweep(addresses)
+    for row_start in range(0, len(alive), 6):
+        print("  " + "".join(f"{address:<17}" for address in list(alive)[row_start:row_start + 6]))
+    print(f"{GREEN}{len(alive)} of {len(addresses)} address(es) alive, swept in {time.time() - sweep_started:.1f}s.{RESET}")
+    if alive and switch_IPs and input("Refresh the MAC index now, so it contains the hosts that just answered? [y|n]: ").strip().lower() in ['y', 'yes']:
+        refresh_mac_index(switch_IPs, username, password)
+
+
+def mac_history_workflow():
+    if not mac_history_store:
+        print(f"{RED}The MAC history is not enabled. Start the program with the 'history' argument to enable it.{RESET}")
+        return
+    formatted_mac = format_mac_address(input("Please enter the MAC-address to show the history for: "))
+    if not formatted_mac:
+        return
+    hours_str = input("Show locations of the last N hours (press Enter for the complete history): ").strip()
+    since = None
+    if hours_str:
+        try:
+            since = time.time() - float(hours_str) * 3600
+        except ValueError:
+            print(f"{RED}Invalid number of hours: '{hours_str}'.{RESET}")
+            return
+
+    locations = mac_history_store.locations_between(formatted_mac, since=since)
+    if not locations:
+        print(f"{RED}No history for {formatted_mac} in the given time range.{RESET}")
+        return
+    print(f"\nHistory of {formatted_mac}:")
+    print("--------------------------------------------------------------------------------------------------------------------")
+    print(f"{'Switch':<18} | {'Location':<15} | {'Port':<10} | {'VLAN':<6} | {'Type':<10} | {'First seen':<19} | {'Last seen':<19}")
+    print("--------------------------------------------------------------------------------------------------------------------")
+    for location in locations:
+        details = switch_details_by_ip.get(location['switch'], {})
+        print(f"{location['switch']:<18} | {details.get('location', ''):<15} | {location['port']:<10} | {location['vlan']:<6} | {location['type']:<10} | {format_timestamp(location['first_seen']):<19} | {format_timestamp(location['last_seen']):<19}")
+    print("--------------------------------------------------------------------------------------------------------------------")
+
+
 def display_switch_inventory(inventory_data):
     """Displays the switch inventory information in a formatted table."""
     if not inventory_data:
@@ -636,72 +2990,448 @@ def display_switch_inventory(inventory_data):
     print("--------------------------------------------------------------------------------------------------------------------")
 
 
-def main_menu(switch_IPs_list, user, passwd):
+def ssh_metrics_workflow():
+    ssh_metrics.print_summary()
+    output_path = input("\nEnter a file to export the metrics to (*.json, or *.prom for Prometheus text format, press Enter to skip): ").strip()
+    if not output_path:
+        return
+    try:
+        ssh_metrics.export(output_path)
+    except OSError as e:
+        print(f"{RED}Could not write {output_path}: {e}{RESET}")
+        return
+    print(f"{GREEN}SSH timing metrics exported to {output_path}.{RESET}")
+
+
+# with many switches only the number is shown in the prompts
+def switch_choice_hint(switch_IPs):
+    if len(switch_IPs) <= 20:
+        return f"available: {', '.join(switch_IPs)}"
+    return f"{len(switch_IPs)} switches, see the inventory"
+
+
+def main_menu(inventory, user, passwd):
     global debug_mode_enabled
+    search_scope = [] # selectors that limit the searches, exports and refreshes, empty = all switches
 
     while True:
+        # the inventory is re-read when its file changes, so the lists are taken from it every time
+        all_switch_IPs = inventory.queryable_ips()
+        switch_IPs_list = inventory.select(search_scope)[0] if search_scope else all_switch_IPs
+
         print("\nDell N1500 MAC Finder & VLAN Configurator")
         print("------------------------------------------")
+        if prewarmer.started:
+            print(f"{BLUE}{prewarmer.status_line()}{RESET}")
         print("1. Find MAC address")
-        print("2. Configure VLANs on a port")
-        print("3. Show VLAN configuration of a switch")
-        print("4. Show Switch Inventory")
+        print("2. Find multiple MAC addresses (batch)")
+        print("3. Find MAC address (follow uplinks via LLDP)")
+        print("4. Configure VLANs on a port")
+        print("5. Show VLAN configuration of a switch")
+        print("6. Show Switch Inventory")
+        print("7. Refresh MAC index")
+        print("8. Show MAC location history")
+        print("9. Export MAC tables to CSV/JSON Lines")
+        print("10. Configure VLANs on many ports (CSV file)")
+        print("11. Show/export SSH timing metrics")
+        scope_status = f"{', '.join(search_scope)} ({len(switch_IPs_list)} switches)" if search_scope else f"all {len(switch_IPs_list)} switches"
+        print("12. Sweep IP range (ping/TCP) to fill the ARP/MAC tables")
+        print(f"13. Limit searches to some switches (currently: {scope_status})")
         
         # Display current debug mode status in the menu
         debug_status = f"{GREEN}ON{RESET}" if debug_mode_enabled else f"{RED}OFF{RESET}"
-        print(f"5. Toggle Debug Mode ({debug_status})")
+        print(f"14. Toggle Debug Mode ({debug_status})")
         
-        print("6. Exit")
+        print("15. Exit")
         
         # Adjust available choices based on menu options
-        valid_choices = ['1', '2', '3', '4', '5', '6']
+        valid_choices = ['1', '2', '3', '4', '5', '6', '7', '8', '9', '10', '11', '12', '13', '14', '15']
         
         choice = input("Enter your choice: ")
+        workflow_started = time.time()
 
         if choice == '1':
             mac_search_workflow(switch_IPs_list, user, passwd)
         elif choice == '2':
-            if not switch_IPs_list: print("No switches defined."); continue
-            target_ip = input(f"Enter IP of the switch to configure (available: {', '.join(switch_IPs_list)}): ").strip()
-            # Find the switch details for the prompt
-            switch_info_for_prompt = switch_details_by_ip.get(target_ip)
-            if target_ip not in switch_IPs_list:
-                print(f"Invalid switch IP. Please choose from the predefined list or add to script.")
+            batch_mac_search_workflow(switch_IPs_list, user, passwd)
+        elif choice == '3':
+            mac_search_workflow(switch_IPs_list, user, passwd, follow_uplinks=True)
+        elif choice == '4':
+            if not all_switch_IPs: print("No switches defined."); continue
+            target_ip = input(f"Enter IP of the switch to configure ({switch_choice_hint(all_switch_IPs)}): ").strip()
+            if not inventory.is_queryable(target_ip):
+                print(f"Invalid switch IP. Please choose from the inventory or add to it.")
                 # Optionally print available switches again
-                display_switch_inventory(switch_inventory)
+                display_switch_inventory(inventory)
                 continue
             port_str = input("Enter port to configure (e.g., Gi1/0/8): ").strip()
             if not port_id_pattern.match(port_str):
                  print(f"Invalid port format: '{port_str}'. Expected format like 'Gi1/0/1', 'Te1/0/1', 'Po1'.")
                  continue
             configure_vlans_on_port(target_ip, port_str, user, passwd)
-        elif choice == '3':
-            if not switch_IPs_list: print("No switches defined."); continue
-            target_ip_show = input(f"Enter IP of the switch to show VLANs from (available: {', '.join(switch_IPs_list)}): ").strip()
-            # Find the switch details for the prompt
-            switch_info_for_prompt_show = switch_details_by_ip.get(target_ip_show)
-            if target_ip_show not in switch_IPs_list:
-                print(f"Invalid switch IP. Please choose from the predefined list or add to script.")
+        elif choice == '5':
+            if not all_switch_IPs: print("No switches defined."); continue
+            target_ip_show = input(f"Enter IP of the switch to show VLANs from ({switch_choice_hint(all_switch_IPs)}): ").strip()
+            if not inventory.is_queryable(target_ip_show):
+                print(f"Invalid switch IP. Please choose from the inventory or add to it.")
                 # Optionally print available switches again
-                display_switch_inventory(switch_inventory)
+                display_switch_inventory(inventory)
                 continue
             display_vlan_names(target_ip_show, user, passwd)
-        elif choice == '4':
-            # Pass the global switch_inventory list
-            display_switch_inventory(switch_inventory)
-        elif choice == '5':
+        elif choice == '6':
+            display_switch_inventory(inventory)
+        elif choice == '7':
+            refresh_mac_index_workflow(switch_IPs_list, user, passwd)
+        elif choice == '8':
+            mac_history_workflow()
+        elif choice == '9':
+            export_mac_tables_workflow(switch_IPs_list, user, passwd)
+        elif choice == '10':
+            bulk_vlan_change_workflow(all_switch_IPs, user, passwd)
+        elif choice == '11':
+            ssh_metrics_workflow()
+        elif choice == '12':
+            sweep_workflow(switch_IPs_list, user, passwd)
+        elif choice == '13':
+            selectors_str = input("Enter IP(s), subnets or selectors like location=Fertigung, model=*N1524P, rack=Verteiler* (comma-separated, press Enter for all switches): ").strip()
+            selected_IPs, unmatched = inventory.select(selectors_str.split(","))
+            if unmatched:
+                print(f"{RED}No queryable switch matches {', '.join(unmatched)}, the limit was not changed.{RESET}")
+            else:
+                search_scope = [selector.strip() for selector in selectors_str.split(",") if selector.strip()]
+                print(f"{BLUE}Searches now cover {len(selected_IPs) if search_scope else len(all_switch_IPs)} switch(es).{RESET}")
+        elif choice == '14':
             # Toggle debug mode
             debug_mode_enabled = not debug_mode_enabled
             status = "enabled" if debug_mode_enabled else "disabled"
             print(f"{BLUE}Debug mode is now {status}.{RESET}")
-        elif choice == '6':
+        elif choice == '15':
             print("Exiting.")
             sys.exit()
         else:
             print("Invalid choice. Please try again.")
+        if SSH_TIMING_SUMMARY and choice in valid_choices and choice != '11' and ssh_metrics.spans(since=workflow_started):
+            ssh_metrics.print_summary(since=workflow_started)
         print("--------------------------------------------------")
 
 
+############ Command Line Interface ############
+#
+# Besides the interactive menu, the most common tasks can be run non-interactively (e.g. from scripts, cron jobs or
+#   ticketing workflows). The result is written to stdout as JSON, progress messages go to stderr.
+#
+#   python MAC_Finder_DELL_N1500.py find-mac 0011.2233.4455 [more MACs, files, or - for stdin]
+#   python MAC_Finder_DELL_N1500.py dump-macs [--switches IPs] [--all-ports] [--output table.csv]
+#   python MAC_Finder_DELL_N1500.py show-vlan --switches 192.168.23.39
+#   python MAC_Finder_DELL_N1500.py set-vlan 192.168.23.39 Gi1/0/8 Gi1/0/9 --pvid 1010 --tagged 1020,1030
+#   python MAC_Finder_DELL_N1500.py bulk-vlan changes.csv [--dry-run]   (see "Bulk VLAN Changes")
+#   python MAC_Finder_DELL_N1500.py sweep 192.168.20.0/22 [--method auto|icmp|tcp]   (no password needed)
+#
+# find-mac and dump-macs accept --sweep <subnet/range> to ping/TCP-probe the hosts first, so quiet hosts show up in the
+#   MAC tables (see network_sweep.py).
+#
+# The password is taken from --password-file, --password-stdin or the MAC_FINDER_PASSWORD environment variable
+#   (in that order), only if none of them is given it is asked for interactively.
+# The exit code is 0 if all switches could be asked, 1 otherwise.
+#
+################################################
+
+CLI_PASSWORD_ENV_VAR = "MAC_FINDER_PASSWORD"
+
+
+# every value can be a single item, a comma/space separated list, the path to a file or "-" to read from stdin
+def read_cli_values(values):
+    items = []
+    for value in values:
+        if value == "-":
+            items.extend(v for v in re.split(r"[\s,;]+", sys.stdin.read()) if v)
+        else:
+            items.extend(read_mac_list(value))
+    return items
+
+
+def read_cli_password(args):
+    if args.password_file:
+        with open(args.password_file, encoding='utf-8') as f:
+            return f.readline().rstrip("\r\n")
+    if args.password_stdin:
+        return sys.stdin.readline().rstrip("\r\n")
+    if os.environ.get(CLI_PASSWORD_ENV_VAR):
+        return os.environ[CLI_PASSWORD_ENV_VAR]
+    return getpass.getpass(prompt='Enter SSH password for switches: ')
+
+
+def cli_location(location):
+    details = switch_details_by_ip.get(location['switch'], {})
+    return {'switch': location['switch'], 'location': details.get('location', ''), 'rack_details': details.get('rack_details', ''),
+            'port': location['port'], 'stack_unit': port_unit(location['port']) if stack_map.describe_port(location['switch'], location['port']) else None,
+            'vlan': location['vlan'], 'type': location['type']}
+
+
+# a single MAC is searched with "show mac address-table address ..." on all switches in parallel,
+#   for several MACs the full tables are fetched once per switch (or taken from the MAC index) instead
+def cli_find_mac(args, switch_IPs, username, password):
+    formatted_macs = []
+    for mac in read_cli_values(args.macs):
+        formatted_mac = format_mac_address(mac)
+        if formatted_mac and formatted_mac not in formatted_macs:
+            formatted_macs.append(formatted_mac)
+    if not formatted_macs:
+        return {'error': "no valid MAC addresses given"}, False
+
+    locations = {formatted_mac: [] for formatted_mac in formatted_macs}
+    errors = {}
+    switch_IPs, stack_duplicates = stack_map.plan(switch_IPs)
+    switch_IPs, unreachable = switch_health.partition(switch_IPs)
+    if len(formatted_macs) == 1:
+        formatted_mac = formatted_macs[0]
+        with ThreadPoolExecutor(max_workers=max(1, min(MAX_PARALLEL_SWITCHES, len(switch_IPs)))) as executor:
+            for result in executor.map(lambda ip: query_switch_for_mac(ip, formatted_mac, username, password), switch_IPs):
+                if result['error']:
+                    errors[result['ip']] = result['error']
+                for entry in result['edge_entries']:
+                    locations[formatted_mac].append(cli_location({'switch': result['ip'], **entry}))
+    else:
+        stale_IPs = mac_location_index.stale_switches(switch_IPs)
+        if stale_IPs:
+            _, errors = fetch_mac_tables(stale_IPs, username, password)
+        for formatted_mac in formatted_macs:
+            locations[formatted_mac] = [cli_location(location) for location in mac_location_index.lookup(formatted_mac, switch_IPs)
+                                        if is_edge_port_entry(location)]
+
+    result = {
+        'results': [{'mac': formatted_mac, 'found': bool(locations[formatted_mac]), 'locations': locations[formatted_mac]}
+                    for formatted_mac in formatted_macs],
+        'switches_checked': [ip for ip in switch_IPs if ip not in errors],
+        'stack_duplicates': stack_duplicates, # skipped IP -> IP of the same stack that was checked instead
+        'unreachable': unreachable, # skipped IP -> reason, see "Switch Health"
+        'errors': errors
+    }
+    stack_map.discover([ip for ip in switch_IPs if ip not in errors], username, password)
+    return result, not errors and not unreachable
+
+
+def cli_dump_macs(args, switch_IPs, username, password):
+    switch_IPs, _ = stack_map.plan(switch_IPs)
+    if args.output:
+        counts, errors = export_mac_tables(switch_IPs, username, password, args.output, edge_ports_only=not args.all_ports)
+        return {'output': args.output, 'entries': counts, 'errors': errors}, not errors
+
+    tables, errors = fetch_mac_tables(switch_IPs, username, password)
+    switches = {}
+    for ip in switch_IPs:
+        if ip in tables:
+            switches[ip] = [entry for entry in tables[ip] if args.all_ports or is_edge_port_entry(entry)]
+    return {'switches': switches, 'errors': errors}, not errors
+
+
+# with --vlan only the switches that have this VLAN are listed
+def cli_show_vlan(args, switch_IPs, username, password):
+    if args.vlan:
+        switches, errors = vlan_database.switches_with_vlan(args.vlan, switch_IPs, username, password)
+    else:
+        switches, errors = vlan_database.get_many(switch_IPs, username, password)
+    return {'switches': switches, 'errors': errors}, not errors
+
+
+def cli_set_vlan(args, switch_IPs, username, password):
+    switch_IP = args.switch
+    new_pvid = args.pvid
+    try:
+        VlanSet([new_pvid] if new_pvid is not None else []) # rejects 0 as well
+        # the list is split directly (like in read_vlan_change_list), it is never the name of a file
+        new_tagged_vlans = VlanSet.parse(",".join(re.split(r"[\s,;]+", args.tagged.strip()))) if args.tagged else VlanSet()
+    except ValueError:
+        return {'error': "invalid VLAN ID, must be a number between 1 and 4094"}, False
+    if new_pvid and new_pvid in new_tagged_vlans:
+        return {'error': f"VLAN {new_pvid} cannot be both untagged (as PVID) and tagged"}, False
+    if not new_pvid and not new_tagged_vlans:
+        return {'error': "neither --pvid nor --tagged given"}, False
+
+    # like in configure_vlans_on_port: only VLANs that exist on the switch can be configured
+    switch_vlans, vlan_error = vlan_database.get(switch_IP, username, password)
+    if vlan_error:
+        print(f"Could not read the VLANs of {switch_IP} ({vlan_error}), VLAN IDs will not be checked.")
+    missing = (VlanSet([new_pvid] if new_pvid else []) | new_tagged_vlans) - VlanSet(switch_vlans) if switch_vlans else VlanSet()
+    if missing:
+        return {'error': f"VLAN(s) {missing} do not exist on {switch_IP}"}, False
+
+    # the ports of one switch share its pooled session, so they are configured one after the other
+    ports = []
+    for port_id in read_cli_values(args.ports):
+        port_result = {'port': port_id, 'before': None, 'commands': [], 'after': None, 'error': None}
+        ports.append(port_result)
+        if not port_id_pattern.match(port_id):
+            port_result['error'] = f"invalid port '{port_id}'"
+            continue
+        output, error = exec_ssh_command(f"show interfaces switchport {port_id}", switch_IP, username, password)
+        if error:
+            port_result['error'] = error
+            continue
+        port_result['before'] = parse_port_vlan_config(output)
+        commands = plan_vlan_commands(port_id, port_result['before'], new_pvid, new_tagged_vlans)
+        if not commands[2:] or args.dry_run:
+            port_result['commands'] = commands if commands[2:] else []
+            continue
+        port_result['commands'] = commands
+        _, error = exec_ssh_config_commands(commands, switch_IP, username, password)
+        vlan_database.invalidate(switch_IP)
+        if error:
+            port_result['error'] = re.sub(r"\x1b\[\d+m", "", error) # no color codes in the JSON output
+            continue
+        output, error = exec_ssh_command(f"show interfaces switchport {port_id}", switch_IP, username, password)
+        port_result['after'] = parse_port_vlan_config(output) if not error else None
+    return {'switch': switch_IP, 'dry_run': args.dry_run, 'ports': ports}, not any(port['error'] for port in ports)
+
+
+def cli_bulk_vlan(args, switch_IPs, username, password):
+    try:
+        changes, problems = read_vlan_change_list(args.csv_file, switch_IPs)
+    except OSError as e:
+        return {'error': f"could not read {args.csv_file}: {e}"}, False
+    if problems and not args.force: # a change list is applied completely or not at all
+        return {'error': f"{args.csv_file} has invalid lines, nothing was changed (use --force to apply the valid lines anyway)",
+                'dry_run': args.dry_run, 'problems': problems, 'changes': []}, False
+    plan_vlan_changes(changes, username, password)
+    if not args.dry_run:
+        apply_vlan_changes(changes, username, password)
+        verify_vlan_changes(changes, username, password)
+    for change in changes:
+        if change['error']:
+            change['error'] = re.sub(r"\x1b\[\d+m", "", change['error']) # no color codes in the JSON output
+    success = not problems and all(change.get('verified') or (not change['error'] and (args.dry_run or not change['commands'])) for change in changes)
+    return {'dry_run': args.dry_run, 'problems': problems, 'changes': changes}, success
+
+
+def cli_sweep(args, switch_IPs, username, password):
+    try:
+        addresses = network_sweep.parse_targets(read_cli_values(args.targets))
+        ports = network_sweep.parse_ports(args.ports)
+    except ValueError as e:
+        return {'error': str(e)}, False
+    print(f"Sweeping {len(addresses)} address(es)...")
+    try:
+        alive = network_sweep.sweep(addresses, args.method, ports, args.timeout)
+    except PermissionError as e:
+        return {'error': str(e)}, False
+    hosts = [{'ip': address, 'method': result['method'], 'rtt_ms': round(result['rtt'] * 1000, 1)} for address, result in alive.items()]
+    return {'probed': len(addresses), 'alive': hosts}, bool(hosts)
+
+
+# --sweep of find-mac/dump-macs: wake up the hosts right before the MAC tables are read
+def cli_sweep_before_collection(addresses):
+    sweep_started = time.time()
+    alive = network_sweep.sweep(addresses)
+    print(f"{len(alive)} of {len(addresses)} swept address(es) alive ({time.time() - sweep_started:.1f}s).")
+
+
+def build_cli_parser():
+    parser = argparse.ArgumentParser(prog=os.path.basename(sys.argv[0]), description="Find MAC addresses and configure VLANs on Dell N1500 switches. Without a command the interactive menu is started.")
+    parser.add_argument("--username", default="admin", help="SSH username (default: admin)")
+    parser.add_argument("--password-file", help="read the SSH password from the first line of this file")
+    parser.add_argument("--password-stdin", action="store_true", help="read the SSH password from the first line of stdin")
+    parser.add_argument("--inventory", help="switch inventory file (.py, .json, .yaml or .csv, default: switch_config.py)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    find_mac = subparsers.add_parser("find-mac", help="find the access port(s) of one or more MAC addresses")
+    find_mac.add_argument("macs", nargs="+", help="MAC addresses, files with one MAC per line, or - for stdin")
+    find_mac.set_defaults(handler=cli_find_mac)
+
+    dump_macs = subparsers.add_parser("dump-macs", help="dump the MAC address tables")
+    dump_macs.add_argument("--all-ports", action="store_true", help="also include MACs learned on uplinks/port channels")
+    dump_macs.add_argument("--output", help="stream the tables into this *.csv, *.jsonl or *.json file instead of printing them")
+    dump_macs.set_defaults(handler=cli_dump_macs)
+
+    show_vlan = subparsers.add_parser("show-vlan", help="show the VLANs of switches")
+    show_vlan.add_argument("--vlan", type=int, help="only list the switches that have this VLAN")
+    show_vlan.set_defaults(handler=cli_show_vlan)
+
+    set_vlan = subparsers.add_parser("set-vlan", help="set the PVID and tagged VLANs of ports")
+    set_vlan.add_argument("switch", help="IP of the switch")
+    set_vlan.add_argument("ports", nargs="+", help="ports (e.g. Gi1/0/8), files with one port per line, or - for stdin")
+    set_vlan.add_argument("--pvid", type=int, help="new PVID (untagged VLAN)")
+    set_vlan.add_argument("--tagged", help="new tagged VLANs, comma-separated, ranges allowed (e.g. 1020,1100-1199)")
+    set_vlan.add_argument("--dry-run", action="store_true", help="only show the commands that would be sent")
+    set_vlan.set_defaults(handler=cli_set_vlan)
+
+    bulk_vlan = subparsers.add_parser("bulk-vlan", help="apply the VLAN changes from a CSV file (switch, port, pvid, tagged)")
+    bulk_vlan.add_argument("csv_file", help="CSV file with the changes")
+    bulk_vlan.add_argument("--dry-run", action="store_true", help="only show the commands that would be sent")
+    bulk_vlan.add_argument("--force", action="store_true", help="apply the valid lines even if other lines of the file are invalid")
+    bulk_vlan.set_defaults(handler=cli_bulk_vlan)
+
+    sweep = subparsers.add_parser("sweep", help="ping/TCP-probe IP ranges and list the hosts that answer")
+    sweep.add_argument("targets", nargs="+", help="subnets (192.168.20.0/22), ranges (192.168.23.10-200), addresses, files with one per line, or - for stdin")
+    sweep.add_argument("--method", choices=["auto", "icmp", "tcp"], default="auto", help="how to probe (default: auto = ping, then TCP for the hosts that didn't answer)")
+    sweep.add_argument("--ports", default=",".join(map(str, network_sweep.DEFAULT_TCP_PORTS)), help="TCP ports to probe (default: %(default)s)")
+    sweep.add_argument("--timeout", type=float, default=network_sweep.DEFAULT_TIMEOUT, help="seconds to wait for answers (default: %(default)s)")
+    sweep.set_defaults(handler=cli_sweep)
+
+    for subparser in (find_mac, dump_macs):
+        subparser.add_argument("--sweep", action="append", metavar="TARGETS", help="ping/TCP-probe these subnets/ranges first, so quiet hosts are in the MAC tables (can be repeated)")
+
+    for subparser in (find_mac, dump_macs, show_vlan):
+        subparser.add_argument("--switches", nargs="+", help="switch IPs, files with one IP per line, or - for stdin (default: all queryable switches)")
+        subparser.add_argument("--select", action="append", metavar="SELECTOR", help="add the switches matching a selector, e.g. location=Fertigung, rack=Verteiler*, 192.168.23.0/24 (can be repeated)")
+    return parser
+
+
+def run_cli(argv):
+    global switch_inventory, switch_details_by_ip
+    args = build_cli_parser().parse_args(argv)
+    if args.inventory:
+        switch_inventory = switch_details_by_ip = SwitchInventory(args.inventory)
+    switch_IPs = switch_inventory.queryable_ips()
+    if args.command == "sweep":
+        with redirect_stdout(sys.stderr):
+            result, success = args.handler(args, [], None, None) # no switches involved, so no password needed
+        json.dump(result, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        return 0 if success else 1
+    if args.command == "set-vlan":
+        target_IPs = [args.switch]
+    elif args.command == "bulk-vlan":
+        target_IPs = switch_IPs # the switches are taken from the CSV file
+    elif args.switches or args.select:
+        target_IPs = read_cli_values(args.switches) if args.switches else []
+        if args.select:
+            selected_IPs, unmatched = switch_inventory.select(args.select)
+            if unmatched:
+                print(f"No queryable switch matches {', '.join(unmatched)}.", file=sys.stderr)
+                return 2
+            listed_IPs = set(target_IPs)
+            target_IPs += [ip for ip in selected_IPs if ip not in listed_IPs]
+    else:
+        target_IPs = switch_IPs
+    invalid_IPs = [ip for ip in target_IPs if not switch_inventory.is_queryable(ip)]
+    if invalid_IPs:
+        print(f"Invalid switch IP(s): {', '.join(invalid_IPs)}. Please choose from the inventory or add to it.", file=sys.stderr)
+        return 2
+    if not target_IPs:
+        print("No switches defined.", file=sys.stderr)
+        return 2
+    sweep_addresses = []
+    if getattr(args, "sweep", None):
+        try:
+            sweep_addresses = network_sweep.parse_targets(read_cli_values(args.sweep))
+        except ValueError as e:
+            print(f"Invalid sweep target: {e}", file=sys.stderr)
+            return 2
+
+    preload_ssh_modules()
+    password = read_cli_password(args)
+    json_output = sys.stdout
+    with redirect_stdout(sys.stderr): # keep stdout clean for the JSON result
+        if sweep_addresses:
+            cli_sweep_before_collection(sweep_addresses)
+        result, success = args.handler(args, target_IPs, args.username, password)
+        if SSH_TIMING_SUMMARY:
+            ssh_metrics.print_summary()
+    json.dump(result, json_output, indent=2, default=str) # VlanSet/PortSet are written in range syntax
+    json_output.write("\n")
+    return 0 if success else 1
+
+
 if __name__ == "__main__":
     # Check if debug mode was enabled via command line initially
     # This allows starting with debug enabled if desired
@@ -709,22 +3439,39 @@ if __name__ == "__main__":
         debug_mode_enabled = True
         sys.argv.remove("debug") # Remove it so it doesn't interfere later
 
+    # Optionally record every MAC location that is seen in a persistent history
+    if "history" in sys.argv:
+        mac_history_store = MacHistoryStore(MAC_HISTORY_DB_PATH)
+        atexit.register(mac_history_store.close)
+        sys.argv.remove("history")
+
+    # Optionally open the sessions (and fetch the MAC tables) in the background right after the password is entered
+    prewarm_mode = None
+    for prewarm_argument in ("prewarm", "prewarm-macs"):
+        if prewarm_argument in sys.argv:
+            prewarm_mode = prewarm_argument
+            sys.argv.remove(prewarm_argument)
+
+    # Optionally show where the time went (TCP connect, key exchange, auth, commands, ...) after each workflow
+    if "timing" in sys.argv:
+        SSH_TIMING_SUMMARY = True
+        sys.argv.remove("timing")
+
+    # non-interactive mode, see "Command Line Interface"
+    if len(sys.argv) > 1:
+        sys.exit(run_cli(sys.argv[1:]))
+
     username = "admin"
 
     # get password once from user and store encrypted for runtime
+    # (paramiko is imported in the background meanwhile, so the prompt shows up immediately)
+    preload_ssh_modules()
     password = getpass.getpass(prompt='Enter SSH password for switches: ')
 
-    # Create a dictionary for quick lookup of switch details by IP
-    # Filter out entries with 'no IP set'
-    # Also create a list of IPs to be queried
-    switch_details_by_ip = {}
-    queryable_switch_ips = []
-    for s_info in switch_inventory:
-        if s_info.get('ip') and s_info['query'] == 'yes':
-            switch_details_by_ip[s_info['ip']] = s_info
-            queryable_switch_ips.append(s_info['ip'])
-
-    main_menu(queryable_switch_ips, username, password)
+    if prewarm_mode:
+        prewarmer.start(switch_inventory.queryable_ips(), username, password, mac_tables=(prewarm_mode == "prewarm-macs"))
+
+    main_menu(switch_inventory, username, password)
 
 
 """
@@ -0,0 +1,194 @@
+import argparse
+import builtins
+import contextlib
+import csv
+import io
+import itertools
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import dns_stub_server
+import switch_emulator
+
+
+############ End-to-end Benchmark ############
+#
+# Starts emulated switches (see switch_emulator.py) and times the workflows of MAC_Finder_DELL_N1500.py against them:
+#   - a single command on a new SSH session (cold) and on a pooled session (warm)
+#   - a MAC search where the MAC is connected to the last switch, asking all switches or following the uplinks via LLDP
+#     (the switches are connected as a chain, switch 1 is the root)
+#   - a batch search for one MAC on every switch
+#   - reading the complete MAC tables of all switches
+#   - a VLAN change on a port, and a bulk VLAN change of 4 ports on every switch (from a CSV file)
+#   - resolving many asset names with the DNS resolver of for_review.py against a stub DNS server (see dns_stub_server.py)
+# Results can be saved as JSON and compared against an earlier run to see whether a change made things faster or slower.
+#
+# Usage: python benchmark.py --switches 20 --entries 2000 --latency 0.05 --save before.json
+#        python benchmark.py --switches 20 --entries 2000 --latency 0.05 --baseline before.json
+#
+##############################################
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="End-to-end benchmark of the MAC finder against emulated switches.")
+    parser.add_argument("--switches", type=int, default=10, help="number of emulated switches (default: 10)")
+    parser.add_argument("--entries", type=int, default=1000, help="MAC table entries per switch (default: 1000)")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds each switch needs to answer a command (default: 0)")
+    parser.add_argument("--connect-latency", type=float, default=0.0, help="seconds until a switch shows its first prompt (default: 0)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per scenario (default: 3)")
+    parser.add_argument("--dns-names", type=int, default=2000, help="asset names to resolve in the DNS scenarios (default: 2000)")
+    parser.add_argument("--dns-latency", type=float, default=0.0, help="seconds the stub DNS server needs to answer (default: 0)")
+    parser.add_argument("--port", type=int, default=switch_emulator.DEFAULT_PORT, help="SSH port of the emulated switches")
+    parser.add_argument("--save", metavar="FILE", help="save the results as JSON")
+    parser.add_argument("--baseline", metavar="FILE", help="compare against results saved earlier with --save")
+    return parser.parse_args()
+
+
+# feeds the answers to the interactive questions of a workflow, every further question is answered with "n"
+@contextlib.contextmanager
+def scripted_input(answers):
+    answers = list(answers)
+    original_input = builtins.input
+    builtins.input = lambda prompt="": answers.pop(0) if answers else "n"
+    try:
+        yield
+    finally:
+        builtins.input = original_input
+
+
+def measure(name, scenario, repeat, setup=None):
+    durations = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            scenario()
+        durations.append(time.perf_counter() - start)
+    result = {'median': statistics.median(durations), 'min': min(durations), 'runs': len(durations)}
+    print(f"  {name:<28} median {result['median']:8.3f}s   min {result['min']:8.3f}s")
+    return result
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    print(f"\nCompared to {baseline_path}:")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]['median'], result['median']
+        delta = (after - before) / before * 100 if before else 0.0
+        print(f"  {name:<28} {before:8.3f}s -> {after:8.3f}s   {delta:+7.1f}%")
+
+
+def main():
+    args = parse_args()
+
+    print(f"Starting {args.switches} emulated switches with {args.entries} MAC entries each...")
+    emulator = switch_emulator.start_emulator(args.switches, port=args.port, mac_entries=args.entries,
+                                              latency=args.latency, connect_latency=args.connect_latency)
+    emulator.link_as_chain()
+
+    import MAC_Finder_DELL_N1500 as mac_finder
+    mac_finder.SSH_PORT = args.port
+    mac_finder.switch_details_by_ip = {s['ip']: s for s in emulator.inventory()}
+    switch_IPs = [switch.address for switch in emulator.switches]
+    username, password = "admin", switch_emulator.DEFAULT_PASSWORD
+    target_switch = emulator.switches[-1]
+    target_mac = target_switch.edge_macs()[0]
+    target_port = "Gi1/0/8"
+
+    import for_review
+    dns_server = dns_stub_server.DnsStubServer(dns_stub_server.asset_records(args.dns_names), port=0, latency=args.dns_latency)
+    asset_names = list(dns_server.records)
+    cached_resolver = for_review.DnsResolver(dns_server.address)
+
+    def reset_sessions():
+        mac_finder.ssh_session_pool.close_all()
+
+    def reset_caches():
+        mac_finder.mac_location_index.clear()
+
+    def single_command():
+        mac_finder.exec_ssh_command("show interfaces switchport Gi1/0/1", switch_IPs[0], username, password)
+
+    def mac_search():
+        with scripted_input([target_mac]):
+            mac_finder.mac_search_workflow(switch_IPs, username, password)
+
+    def mac_search_lldp():
+        with scripted_input([target_mac]):
+            mac_finder.mac_search_workflow(switch_IPs, username, password, follow_uplinks=True)
+
+    batch_macs = [switch.edge_macs()[0] for switch in emulator.switches]
+
+    def batch_search():
+        with scripted_input([" ".join(batch_macs)]):
+            mac_finder.batch_mac_search_workflow(switch_IPs, username, password)
+
+    def mac_table_dump():
+        mac_finder.fetch_mac_tables(switch_IPs, username, password)
+
+    # every run changes the port(s) to the other configuration, otherwise all runs but the first would have nothing to do
+    vlan_change_answers = itertools.cycle([["1010", "1020,1030", "y"], ["1020", "1030,1722", "y"]])
+
+    def vlan_change():
+        with scripted_input(next(vlan_change_answers)):
+            mac_finder.configure_vlans_on_port(switch_IPs[0], target_port, username, password)
+
+    bulk_vlan_path = os.path.join(tempfile.mkdtemp(), "bulk_vlan.csv")
+    bulk_vlan_configs = itertools.cycle([("1010", "1020;1030"), ("1020", "1030;1722")])
+
+    def write_bulk_vlan_changes():
+        pvid, tagged = next(bulk_vlan_configs)
+        with open(bulk_vlan_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(["switch", "port", "pvid", "tagged"])
+            for ip in switch_IPs:
+                for port_number in range(1, 5):
+                    writer.writerow([ip, f"Gi1/0/{port_number}", pvid, tagged])
+
+    def bulk_vlan_change():
+        with scripted_input([bulk_vlan_path, "y"]):
+            mac_finder.bulk_vlan_change_workflow(switch_IPs, username, password)
+
+    def dns_resolve_cold():
+        for_review.DnsResolver(dns_server.address).resolve_many(asset_names)
+
+    def dns_resolve_cached():
+        cached_resolver.resolve_many(asset_names)
+
+    print(f"Running every scenario {args.repeat} time(s):")
+    results = {
+        'command_cold_session': measure("command (cold session)", single_command, args.repeat, setup=reset_sessions),
+        'command_warm_session': measure("command (warm session)", single_command, args.repeat),
+        'mac_search_cold': measure("MAC search (cold)", mac_search, args.repeat, setup=lambda: (reset_sessions(), reset_caches())),
+        'mac_search_warm': measure("MAC search (warm sessions)", mac_search, args.repeat, setup=reset_caches),
+        'mac_search_lldp': measure("MAC search (LLDP walk)", mac_search_lldp, args.repeat, setup=reset_caches),
+        'batch_search': measure(f"batch search ({len(batch_macs)} MACs)", batch_search, args.repeat, setup=reset_caches),
+        'mac_table_dump': measure("MAC table dump", mac_table_dump, args.repeat),
+        'vlan_change': measure("VLAN change", vlan_change, args.repeat),
+        'bulk_vlan_change': measure(f"bulk VLAN change ({4 * len(switch_IPs)} ports)", bulk_vlan_change, args.repeat, setup=write_bulk_vlan_changes),
+        'dns_resolve_cold': measure(f"DNS resolve {len(asset_names)} names", dns_resolve_cold, args.repeat),
+        'dns_resolve_cached': measure("DNS resolve (cached)", dns_resolve_cached, args.repeat, setup=lambda: cached_resolver.resolve_many(asset_names)),
+    }
+
+    if args.baseline:
+        compare(results, args.baseline)
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'parameters': vars(args), 'results': results}, f, indent=2)
+        print(f"\nResults saved to {args.save}")
+
+    mac_finder.ssh_session_pool.close_all()
+    emulator.stop()
+    dns_server.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
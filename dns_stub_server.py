@@ -0,0 +1,135 @@
+import socket
+import struct
+import sys
+import threading
+import time
+
+
+############ Stub DNS Server ############
+#
+# A minimal authoritative DNS server (UDP) for testing and benchmarking the DNS resolver of for_review.py without a
+#   real DNS server, e.g. with thousands of asset names.
+# Answers A queries from a dict hostname -> IP and PTR queries for all of these IPs. Unknown names get NXDOMAIN with
+#   an SOA record in the authority section, so negative caching can be tested. Answers use name compression like real
+#   servers do. Names in truncate_names are answered with the TC flag and no records, as if the answer didn't fit into UDP.
+#
+# Usage: python dns_stub_server.py [number of asset names] [port]
+#        (names DE00001.example.local ... with the IPs 10.200.0.1 ...)
+#
+#########################################
+
+DEFAULT_PORT = 5353
+DEFAULT_TTL = 300
+DEFAULT_NEGATIVE_TTL = 60 # SOA minimum field
+
+DNS_TYPE_A = 1
+DNS_TYPE_SOA = 6
+DNS_TYPE_PTR = 12
+
+
+def asset_records(count, domain="example.local", prefix="DE", first_ip="10.200.0.1"):
+    """{'de00001.example.local': '10.200.0.1', ...} for count asset names."""
+    first = struct.unpack(">I", socket.inet_aton(first_ip))[0]
+    return {f"{prefix}{n:05d}.{domain}".lower(): socket.inet_ntoa(struct.pack(">I", first + n - 1)) for n in range(1, count + 1)}
+
+
+def encode_name(name):
+    return b"".join(bytes([len(label)]) + label.encode('ascii') for label in name.rstrip(".").split(".") if label) + b"\x00"
+
+
+def read_question(query):
+    """Returns (id, name, record type) of the first question of a query."""
+    query_id = struct.unpack(">H", query[:2])[0]
+    labels = []
+    offset = 12
+    while query[offset]:
+        length = query[offset]
+        labels.append(query[offset + 1:offset + 1 + length].decode('ascii'))
+        offset += 1 + length
+    record_type = struct.unpack(">H", query[offset + 1:offset + 3])[0]
+    return query_id, ".".join(labels), record_type, query[12:offset + 5]
+
+
+class DnsStubServer:
+    """Answers DNS queries on 127.0.0.1:<port> from its records until stop() is called."""
+
+    def __init__(self, records, port=DEFAULT_PORT, address="127.0.0.1", ttl=DEFAULT_TTL, negative_ttl=DEFAULT_NEGATIVE_TTL,
+                 latency=0.0, zone="example.local"):
+        self.records = {name.lower().rstrip("."): ip for name, ip in records.items()}
+        self.reverse_records = {".".join(reversed(ip.split("."))) + ".in-addr.arpa": name for name, ip in self.records.items()}
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.latency = latency # seconds before every answer
+        self.zone = zone
+        self.truncate_names = set() # these names are answered with the TC flag and no records
+        self.query_count = 0
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((address, port))
+        self.address = self.sock.getsockname() # (ip, port), the port is chosen by the OS if 0 was given
+        self._stopped = threading.Event()
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def answer(self, query):
+        query_id, name, record_type, question = read_question(query)
+        name = name.lower()
+        flags = 0x8500 # response, authoritative, recursion desired
+        answers = []
+        if name in self.truncate_names:
+            flags |= 0x0200
+        elif record_type == DNS_TYPE_A and name in self.records:
+            # the name is a compression pointer to the question (offset 12)
+            answers.append(struct.pack(">HHHIH", 0xC00C, DNS_TYPE_A, 1, self.ttl, 4) + socket.inet_aton(self.records[name]))
+        elif record_type == DNS_TYPE_PTR and name in self.reverse_records:
+            target = encode_name(self.reverse_records[name])
+            answers.append(struct.pack(">HHHIH", 0xC00C, DNS_TYPE_PTR, 1, self.ttl, len(target)) + target)
+        authority = []
+        if not answers and not flags & 0x0200:
+            if record_type not in (DNS_TYPE_A, DNS_TYPE_PTR) or name in self.records or name in self.reverse_records:
+                pass # the name exists, but not with this type (NODATA)
+            else:
+                flags |= 3 # NXDOMAIN
+            # SOA of the zone: primary name server and mailbox, then serial, refresh, retry, expire, minimum
+            soa = encode_name(f"ns1.{self.zone}") + encode_name(f"hostmaster.{self.zone}") + \
+                struct.pack(">IIIII", 1, 3600, 600, 86400, self.negative_ttl)
+            authority.append(encode_name(self.zone) + struct.pack(">HHIH", DNS_TYPE_SOA, 1, self.ttl, len(soa)) + soa)
+        header = struct.pack(">HHHHHH", query_id, flags, 1, len(answers), len(authority), 0)
+        return header + question + b"".join(answers) + b"".join(authority)
+
+    def _serve(self):
+        while not self._stopped.is_set():
+            try:
+                query, client = self.sock.recvfrom(4096)
+            except OSError:
+                return
+            self.query_count += 1
+            try:
+                reply = self.answer(query)
+            except (IndexError, struct.error, UnicodeDecodeError):
+                continue # not a query we understand
+            if self.latency:
+                threading.Timer(self.latency, self._send, args=(reply, client)).start()
+            else:
+                self._send(reply, client)
+
+    def _send(self, reply, client):
+        try:
+            self.sock.sendto(reply, client)
+        except OSError:
+            pass
+
+    def stop(self):
+        self._stopped.set()
+        self.sock.close()
+
+
+if __name__ == "__main__":
+    name_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_PORT
+    server = DnsStubServer(asset_records(name_count), port=port)
+    print(f"Stub DNS server on {server.address[0]}:{server.address[1]} with {name_count} names (DE00001.example.local, ...).")
+    print(f"Set DNS_SERVER = {server.address} in for_review.py to use it. Press Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
@@ -4,8 +4,13 @@ import getpass
 import sys
 import re
 import socket # Added for hostname resolution
+import threading
+import struct
+import random
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import os # Import os module to check for Windows and potentially enable ANSI codes
 from switch_config import switch_inventory # Import switch_inventory from config file
+import network_sweep
 
 
 
@@ -583,52 +588,317 @@ def configure_vlans_on_port(switch_ip, port_id, username, password):
         print(f"{BLUE}Configuration aborted by user.{RESET}")
 
 
+# --- DNS ---
+# Hostnames are resolved in parallel and the answers (also "does not exist") are cached as long as their TTL allows.
+# By default the system resolver is used. It doesn't tell the TTL of an answer, so DNS_DEFAULT_TTL is used then.
+# If DNS_SERVER is set, that server is asked directly with a small built-in DNS client which honors the real TTLs
+#   (this is also how the resolver can be tested/benchmarked against a local stub DNS server).
+DNS_SERVER = None # e.g. ("192.168.23.10", 53), None = use the system resolver
+DNS_SEARCH_DOMAINS = [] # domains tried for short hostnames when DNS_SERVER is set, e.g. ["example.local"]
+DNS_TIMEOUT = 2 # seconds per query
+DNS_DEFAULT_TTL = 300 # seconds, for answers of the system resolver
+DNS_NEGATIVE_TTL = 60 # seconds a "does not exist" answer is cached if the server didn't say otherwise
+MAX_PARALLEL_DNS_QUERIES = 32
+
+DNS_TYPE_A = 1
+DNS_TYPE_SOA = 6
+DNS_TYPE_PTR = 12
+
+
+def _read_dns_name(message, offset):
+    """Reads a (possibly compressed) name from a DNS message. Returns (name, offset after the name)."""
+    labels = []
+    end_offset = None
+    for _ in range(128): # guard against compression pointer loops
+        length = message[offset]
+        if length & 0xC0 == 0xC0: # pointer to a name somewhere else in the message
+            if end_offset is None:
+                end_offset = offset + 2
+            offset = ((length & 0x3F) << 8) | message[offset + 1]
+        elif length == 0:
+            return ".".join(labels), (end_offset if end_offset is not None else offset + 1)
+        else:
+            labels.append(message[offset + 1:offset + 1 + length].decode('ascii', errors='replace'))
+            offset += 1 + length
+    raise ValueError("invalid DNS name in answer")
+
+
+def dns_query(name, record_type, server, timeout=DNS_TIMEOUT):
+    """
+    Sends a single query to the DNS server (ip, port) via UDP.
+    Returns (values, ttl): the IPs/names of all matching records and how long the answer may be cached.
+    If the name doesn't exist, values is empty and ttl is the negative caching time given by the server.
+    Raises ValueError for answers that are cut off or truncated (TC flag without records), these must not be cached.
+    """
+    query_id = random.getrandbits(16)
+    qname = b"".join(bytes([len(label)]) + label.encode('ascii') for label in name.rstrip(".").split(".")) + b"\x00"
+    query = struct.pack(">HHHHHH", query_id, 0x0100, 1, 0, 0, 0) + qname + struct.pack(">HH", record_type, 1) # recursion desired, class IN
+
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.settimeout(timeout)
+        sock.sendto(query, server)
+        while True:
+            message, _ = sock.recvfrom(4096)
+            if len(message) >= 12 and struct.unpack(">H", message[:2])[0] == query_id:
+                break # ignore late answers to earlier queries
+
+    _, flags, question_count, answer_count, authority_count, _ = struct.unpack(">HHHHHH", message[:12])
+    rcode = flags & 0x0F
+    if rcode not in (0, 3): # 3 = name does not exist
+        raise OSError(f"DNS server answered with error code {rcode} for {name}")
+    try:
+        values, ttls = _parse_dns_records(message, record_type, question_count, answer_count + authority_count)
+    except (IndexError, struct.error):
+        raise ValueError(f"DNS answer for {name} is cut off")
+    if flags & 0x0200 and not values: # truncated: the records didn't fit into the UDP answer
+        raise ValueError(f"DNS answer for {name} is truncated")
+    return values, (min(ttls) if ttls else DNS_NEGATIVE_TTL)
+
+
+def _parse_dns_records(message, record_type, question_count, record_count):
+    """Returns the values of the records of record_type and the TTLs that apply to the answer."""
+    offset = 12
+    for _ in range(question_count):
+        _, offset = _read_dns_name(message, offset)
+        offset += 4
+
+    values = []
+    ttls = []
+    for _ in range(record_count):
+        _, offset = _read_dns_name(message, offset)
+        rtype, _, ttl, rdlength = struct.unpack(">HHIH", message[offset:offset + 10])
+        offset += 10
+        rdata = offset
+        offset += rdlength
+        if offset > len(message):
+            raise IndexError("record data beyond the end of the message")
+        if rtype == record_type == DNS_TYPE_A and rdlength == 4:
+            values.append(socket.inet_ntoa(message[rdata:offset]))
+            ttls.append(ttl)
+        elif rtype == record_type == DNS_TYPE_PTR:
+            values.append(_read_dns_name(message, rdata)[0])
+            ttls.append(ttl)
+        elif rtype == DNS_TYPE_SOA and not values:
+            # negative answers may be cached for min(TTL of the SOA record, SOA minimum field)
+            _, soa_offset = _read_dns_name(message, rdata)
+            _, soa_offset = _read_dns_name(message, soa_offset)
+            minimum = struct.unpack(">IIIII", message[soa_offset:soa_offset + 20])[4]
+            ttls.append(min(ttl, minimum))
+    return values, ttls
+
+
+class DnsResolver:
+    """Resolves many hostnames (A) and IPs (PTR) concurrently, with positive and negative caching."""
+
+    def __init__(self, server=None, search_domains=None):
+        self.server = server
+        self.search_domains = search_domains or []
+        self._cache = {} # (record type, name) -> (value or None, expires at)
+        self._lock = threading.Lock()
+
+    def _cached(self, key):
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry and entry[1] > time.time():
+            return True, entry[0]
+        return False, None
+
+    def _store(self, key, value, ttl):
+        with self._lock:
+            self._cache[key] = (value, time.time() + ttl)
+
+    def _lookup_ip(self, hostname):
+        if self.server is None:
+            try:
+                return socket.gethostbyname(hostname), DNS_DEFAULT_TTL
+            except socket.gaierror: # getaddrinfo error
+                return None, DNS_NEGATIVE_TTL
+        candidates = [hostname] if "." in hostname else [f"{hostname}.{domain}" for domain in self.search_domains] + [hostname]
+        ttl = DNS_NEGATIVE_TTL
+        errors = []
+        for candidate in candidates:
+            # a timeout or SERVFAIL for one candidate doesn't mean the others can't be found
+            try:
+                values, ttl = dns_query(candidate, DNS_TYPE_A, self.server)
+            except (OSError, ValueError) as e:
+                errors.append(e)
+                continue
+            if values:
+                return values[0], ttl
+        if len(errors) == len(candidates):
+            raise errors[0] # no answer at all, not cached
+        return None, ttl
+
+    def _lookup_hostname(self, ip):
+        if self.server is None:
+            try:
+                return socket.gethostbyaddr(ip)[0], DNS_DEFAULT_TTL
+            except (socket.herror, socket.gaierror):
+                return None, DNS_NEGATIVE_TTL
+        values, ttl = dns_query(".".join(reversed(ip.split("."))) + ".in-addr.arpa", DNS_TYPE_PTR, self.server)
+        return (values[0] if values else None), ttl
+
+    def _resolve(self, record_type, name, lookup):
+        key = (record_type, name.lower())
+        found, value = self._cached(key)
+        if found:
+            return value
+        try:
+            value, ttl = lookup(name)
+        except (OSError, ValueError) as e: # timeouts and broken answers are not cached
+            if debug_mode_enabled: print(f"{BLUE}DEBUG: DNS lookup of {name} failed: {e}{RESET}")
+            return None
+        self._store(key, value, ttl)
+        return value
+
+    def resolve(self, hostname):
+        """Hostname -> IP (None if it can't be resolved)."""
+        return self._resolve('A', hostname, self._lookup_ip)
+
+    def reverse(self, ip):
+        """IP -> hostname (None if there is no PTR record)."""
+        return self._resolve('PTR', ip, self._lookup_hostname)
+
+    def _resolve_many(self, names, resolve_function):
+        names = list(dict.fromkeys(names)) # remove duplicates, keep order
+        if not names:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_DNS_QUERIES, len(names))) as executor:
+            return dict(zip(names, executor.map(resolve_function, names)))
+
+    def resolve_many(self, hostnames):
+        """Resolves all hostnames concurrently. Returns dict hostname -> IP or None."""
+        return self._resolve_many(hostnames, self.resolve)
+
+    def reverse_many(self, IPs):
+        """Reverse lookup of all IPs concurrently. Returns dict IP -> hostname or None."""
+        return self._resolve_many(IPs, self.reverse)
+
+
+dns_resolver = DnsResolver(DNS_SERVER, DNS_SEARCH_DOMAINS)
+
+
 def resolve_hostname_to_ip(hostname):
     """Resolves a hostname to an IP address."""
-    try:
-        ip_address = socket.gethostbyname(hostname)
-        return ip_address
-    except socket.gaierror: # getaddrinfo error
-        return None
+    return dns_resolver.resolve(hostname)
 
-def find_mac_from_arp_table(target_ip, arp_table_output):
-    """Parses 'show arp' output to find MAC for a given IP."""
-    # Dell MAC format is typically xxxx.xxxx.xxxx but ARP might show other formats
-    mac_pattern_dell = r"([0-9A-Fa-f]{4}\.[0-9A-Fa-f]{4}\.[0-9A-Fa-f]{4})"
-    mac_pattern_common = r"([0-9A-Fa-f]{2}[:-]){5}[0-9A-Fa-f]{2}"
 
+# Dell MAC format is typically xxxx.xxxx.xxxx but ARP might show other formats
+mac_pattern_dell = re.compile(r"[0-9A-Fa-f]{4}\.[0-9A-Fa-f]{4}\.[0-9A-Fa-f]{4}")
+mac_pattern_common = re.compile(r"(?:[0-9A-Fa-f]{2}[:-]){5}[0-9A-Fa-f]{2}")
+
+def parse_arp_table(arp_table_output):
+    """Parses 'show arp' output into a dict IP -> MAC (in one pass over the output)."""
+    macs_by_ip = {}
     for line in arp_table_output.splitlines():
         parts = line.split()
-        if not parts or len(parts) < 2:
+        if len(parts) < 2:
             continue
-        
-        # Check if the first part is the target_ip
-        if parts[0] == target_ip:
-            potential_mac = parts[1]
-            # Check if potential_mac matches known MAC address patterns
-            if re.fullmatch(mac_pattern_dell, potential_mac, re.IGNORECASE) or \
-               re.fullmatch(mac_pattern_common, potential_mac, re.IGNORECASE):
-                return potential_mac # Return as found, formatting will be done by format_mac_address
-    return None
+        potential_mac = parts[1]
+        # Check if potential_mac matches known MAC address patterns
+        if mac_pattern_dell.fullmatch(potential_mac) or mac_pattern_common.fullmatch(potential_mac):
+            macs_by_ip[parts[0]] = potential_mac # formatting will be done by format_mac_address
+    return macs_by_ip
+
+def find_mac_from_arp_table(target_ip, arp_table_output):
+    """Parses 'show arp' output to find MAC for a given IP."""
+    return parse_arp_table(arp_table_output).get(target_ip)
+
+
+ARP_INDEX_TTL = 300 # seconds the collected ARP tables are trusted
+MAX_PARALLEL_SWITCHES = 8 # number of switches whose ARP table is fetched at the same time
+
+class ArpIndex:
+    """
+    IP -> MAC index collected from the ARP tables of the switches.
+    All ARP tables are fetched in parallel at once and kept for ARP_INDEX_TTL seconds, so that
+    hostname lookups (and batch IP lookups) don't need to query every switch again.
+    Switches marked with 'layer3': 'yes' in the inventory are preferred, as only they route and thus
+    have the complete ARP tables. If none is marked, all switches are asked.
+    """
+
+    def __init__(self, ttl=ARP_INDEX_TTL):
+        self.ttl = ttl
+        self._macs_by_ip = {}
+        self._fetched_at = None
+        self._lock = threading.Lock()
+
+    def is_fresh(self):
+        return self._fetched_at is not None and time.time() - self._fetched_at < self.ttl
+
+    def refresh(self, switch_IPs, username, password, switch_details_map):
+        layer3_IPs = [ip for ip in switch_IPs if switch_details_map.get(ip, {}).get('layer3') == 'yes']
+        arp_switch_IPs = layer3_IPs or switch_IPs
+        print(f"{BLUE}Collecting the ARP tables of {len(arp_switch_IPs)} switch(es)...{RESET}")
+
+        macs_by_ip = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(MAX_PARALLEL_SWITCHES, len(arp_switch_IPs)))) as executor:
+            futures = {executor.submit(exec_ssh_command, "show arp", ip, username, password): ip for ip in arp_switch_IPs}
+            for future in as_completed(futures):
+                switch_ip = futures[future]
+                output, error = future.result()
+                if error:
+                    print(f"{RED}Error querying ARP table on {get_switch_identifier(switch_ip, switch_details_map)}: {error}{RESET}")
+                    continue
+                if debug_mode_enabled:
+                    print(f"{BLUE}DEBUG: ARP table from {get_switch_identifier(switch_ip, switch_details_map)}:{RESET}\n{output}")
+                macs_by_ip.update(parse_arp_table(output))
+
+        with self._lock:
+            self._macs_by_ip = macs_by_ip
+            self._fetched_at = time.time()
+
+    # returns dict IP -> MAC (None if unknown) for all given IPs
+    # the ARP tables are collected again at most once: if the index is outdated or an IP is missing in it
+    # with sweep_missing, IPs that are missing are pinged/TCP-probed right before, so the routing switch has to resolve them
+    #   (ARP entries age out after a while, e.g. for hosts that only receive traffic). This takes a few seconds.
+    def lookup(self, target_IPs, switch_IPs, username, password, switch_details_map, sweep_missing=False):
+        with self._lock:
+            missing_IPs = [ip for ip in target_IPs if ip not in self._macs_by_ip]
+            refresh_needed = not self.is_fresh() or missing_IPs
+        if missing_IPs and sweep_missing:
+            print(f"{BLUE}Pinging {len(missing_IPs)} IP(s) that are not in the ARP tables yet...{RESET}")
+            alive = network_sweep.sweep(missing_IPs)
+            if debug_mode_enabled:
+                print(f"{BLUE}DEBUG: {len(alive)} of {len(missing_IPs)} IP(s) answered: {', '.join(alive)}{RESET}")
+        if refresh_needed:
+            self.refresh(switch_IPs, username, password, switch_details_map)
+        with self._lock:
+            return {ip: self._macs_by_ip.get(ip) for ip in target_IPs}
+
+    # all IPs the MAC has according to the (already collected) ARP tables
+    def ips_for_mac(self, formatted_mac):
+        wanted = re.sub(r"[^0-9A-F]", "", formatted_mac.upper())
+        with self._lock:
+            return [ip for ip, mac in self._macs_by_ip.items() if re.sub(r"[^0-9A-F]", "", mac.upper()) == wanted]
+
+
+arp_index = ArpIndex()
+
+
+def hostnames_for_macs(formatted_macs):
+    """
+    Labels MACs with hostnames: MAC -> IPs from the ARP index (only if it is fresh, no switch is asked for this)
+    and IPs -> hostnames by bulk reverse DNS lookups. Returns dict MAC -> list of hostnames.
+    """
+    if not arp_index.is_fresh():
+        return {mac: [] for mac in formatted_macs}
+    IPs_by_mac = {mac: arp_index.ips_for_mac(mac) for mac in formatted_macs}
+    hostnames = dns_resolver.reverse_many([ip for IPs in IPs_by_mac.values() for ip in IPs])
+    return {mac: [hostnames[ip] for ip in IPs if hostnames.get(ip)] for mac, IPs in IPs_by_mac.items()}
+
+
+def get_macs_for_ips(target_IPs, switch_IPs, username, password, switch_details_map, sweep_missing=False):
+    """Finds the MAC addresses of several IPs at once using the (cached) ARP index. Returns dict IP -> MAC or None."""
+    return arp_index.lookup(target_IPs, switch_IPs, username, password, switch_details_map, sweep_missing)
 
 def get_mac_for_ip_via_switches(target_ip, switch_IPs, username, password, switch_details_map):
     """Attempts to find the MAC address for a given IP by querying ARP tables of switches."""
     print(f"\n{BLUE}Attempting to find MAC address for IP {target_ip} from switch ARP tables...{RESET}")
-    for switch_ip in switch_IPs:
-        print(f"Querying ARP table on switch {get_switch_identifier(switch_ip, switch_details_map)}...")
-        command = "show arp" # General command, could also try "show ip arp"
-        
-        output, error = exec_ssh_command(command, switch_ip, username, password)
-        if error:
-            print(f"{RED}Error querying ARP table on {get_switch_identifier(switch_ip, switch_details_map)}: {error}{RESET}")
-            continue
-        if output:
-            if debug_mode_enabled:
-                print(f"{BLUE}DEBUG: ARP table from {get_switch_identifier(switch_ip, switch_details_map)}:{RESET}\n{output}")
-            mac_address = find_mac_from_arp_table(target_ip, output)
-            if mac_address:
-                print(f"{GREEN}MAC address {mac_address} for IP {target_ip} found on switch {get_switch_identifier(switch_ip, switch_details_map)}'s ARP table.{RESET}")
-                return mac_address
+    mac_address = get_macs_for_ips([target_ip], switch_IPs, username, password, switch_details_map)[target_ip]
+    if mac_address:
+        print(f"{GREEN}MAC address {mac_address} for IP {target_ip} found in the switches' ARP tables.{RESET}")
+        return mac_address
     print(f"{RED}Could not find MAC address for IP {target_ip} in the ARP tables of the queried switches.{RESET}")
     return None
 
@@ -675,6 +945,9 @@ def _perform_mac_search_on_switches(formatted_mac, target_identifier, switch_IPs
             if mac_found_in_line and port_on_switch:
                 print(f"\n{GREEN}>>> MAC {formatted_mac} (for {target_identifier}) was found on switch {get_switch_identifier(ip, switch_details_map)} on port {port_on_switch}.{RESET}")
                 print(f"Relevant output line: {relevant_line_info}")
+                hostnames = hostnames_for_macs([formatted_mac])[formatted_mac]
+                if hostnames:
+                    print(f"Hostname(s): {', '.join(hostnames)}")
                 device_found_on_port = True
 
                 answer = input("\nDo you want to see the interface configuration for this port? [y|n] ").lower()
@@ -728,37 +1001,54 @@ def mac_search_workflow(switch_IPs, username, password):
 
 
 def hostname_search_workflow(switch_IPs, username, password, switch_details_map):
-    hostname_input = input("Please enter the hostname to find (e.g., DE11465 or DE11465.example.com): ").strip()
-    if not hostname_input:
+    hostname_input = input("Please enter the hostname(s) to find (e.g., DE11465 or DE11465.example.com, several separated by comma): ").strip()
+    hostnames = [h for h in re.split(r"[\s,;]+", hostname_input) if h]
+    if not hostnames:
         print(f"{RED}No hostname entered.{RESET}")
         return
 
-    print(f"\n{BLUE}Resolving hostname '{hostname_input}'...{RESET}")
-    target_ip = resolve_hostname_to_ip(hostname_input)
-
-    if not target_ip:
-        print(f"{RED}Could not resolve hostname '{hostname_input}' to an IP address.{RESET}")
+    # resolve all hostnames at once and look up all their MACs with a single ARP collection
+    print(f"\n{BLUE}Resolving {len(hostnames)} hostname(s)...{RESET}")
+    IPs_by_hostname = dns_resolver.resolve_many(hostnames)
+    for hostname in hostnames:
+        if IPs_by_hostname[hostname]:
+            print(f"{GREEN}Hostname '{hostname}' resolved to IP address: {IPs_by_hostname[hostname]}{RESET}")
+        else:
+            print(f"{RED}Could not resolve hostname '{hostname}' to an IP address.{RESET}")
+    resolved_IPs = [ip for ip in IPs_by_hostname.values() if ip]
+    if not resolved_IPs:
         return
-    
-    print(f"{GREEN}Hostname '{hostname_input}' resolved to IP address: {target_ip}{RESET}")
-
-    mac_address_raw = get_mac_for_ip_via_switches(target_ip, switch_IPs, username, password, switch_details_map)
+    print(f"\n{BLUE}Attempting to find the MAC addresses from switch ARP tables...{RESET}")
+    macs_by_ip = get_macs_for_ips(resolved_IPs, switch_IPs, username, password, switch_details_map)
+    missing_IPs = [ip for ip in resolved_IPs if not macs_by_ip.get(ip)]
+    pinged = False
+    if missing_IPs:
+        answer = input(f"{len(missing_IPs)} IP(s) are not in the ARP tables. Ping them and collect the ARP tables again (takes a few seconds)? [y|n] ").strip().lower()
+        if answer in ["y", "yes"]:
+            macs_by_ip.update(get_macs_for_ips(missing_IPs, switch_IPs, username, password, switch_details_map, sweep_missing=True))
+            pinged = True
+
+    for hostname_input in hostnames:
+        target_ip = IPs_by_hostname[hostname_input]
+        if not target_ip:
+            continue
+        mac_address_raw = macs_by_ip.get(target_ip)
 
-    if not mac_address_raw:
-        print(f"{RED}Failed to find a MAC address for IP {target_ip} using switch ARP tables.{RESET}")
-        print(f"You can try finding the MAC address manually and use option 1 (Find MAC address).")
-        return
+        if not mac_address_raw:
+            print(f"{RED}Failed to find a MAC address for IP {target_ip} using switch ARP tables{', even after pinging it' if pinged else ''}.{RESET}")
+            print(f"The device is probably switched off. You can try finding the MAC address manually and use option 1 (Find MAC address).")
+            continue
 
-    formatted_mac = format_mac_address(mac_address_raw)
-    if not formatted_mac:
-        # format_mac_address already prints an error if MAC is invalid
-        print(f"The MAC address '{mac_address_raw}' (from IP {target_ip} for hostname '{hostname_input}') could not be formatted correctly.")
-        return
-    
-    print(f"MAC address for IP {target_ip} (from hostname '{hostname_input}') is {mac_address_raw}, formatted as {formatted_mac}.")
-    print(f"\n{BLUE}Now searching for port connected to MAC {formatted_mac} (from {hostname_input} / {target_ip})...{RESET}")
-    
-    _perform_mac_search_on_switches(formatted_mac, f"{hostname_input}/{target_ip}", switch_IPs, username, password, switch_details_map)
+        formatted_mac = format_mac_address(mac_address_raw)
+        if not formatted_mac:
+            # format_mac_address already prints an error if MAC is invalid
+            print(f"The MAC address '{mac_address_raw}' (from IP {target_ip} for hostname '{hostname_input}') could not be formatted correctly.")
+            continue
+        
+        print(f"MAC address for IP {target_ip} (from hostname '{hostname_input}') is {mac_address_raw}, formatted as {formatted_mac}.")
+        print(f"\n{BLUE}Now searching for port connected to MAC {formatted_mac} (from {hostname_input} / {target_ip})...{RESET}")
+        
+        _perform_mac_search_on_switches(formatted_mac, f"{hostname_input}/{target_ip}", switch_IPs, username, password, switch_details_map)
 
     
 
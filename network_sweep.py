@@ -0,0 +1,274 @@
+import argparse
+import errno
+import ipaddress
+import os
+import selectors
+import socket
+import struct
+import sys
+import time
+from collections import deque
+
+
+############ Network Sweep ############
+#
+# Pings (ICMP echo) and/or TCP-probes every address of an IP range or subnet, with thousands of probes in flight at once:
+#   - ICMP: all echo requests go out through a single socket and the replies are collected as they come in
+#   - TCP: non-blocking connects to a few common ports, watched with one selector; an answer of any kind
+#     (connection accepted or refused) means the host is alive
+# "auto" pings first and then TCP-probes the hosts that didn't answer (Windows clients drop pings by default).
+#
+# Besides finding live hosts this fills the ARP tables of the routing switches and the MAC tables of all switches on
+#   the way, as every host that answers has to be resolved/forwarded. Running it right before collecting ARP or MAC tables
+#   finds devices that have been quiet for longer than the aging time.
+#
+# ICMP needs either an unprivileged ICMP socket (Linux with net.ipv4.ping_group_range, macOS) or admin/root rights
+#   for a raw socket. If neither is available, "auto" only uses TCP.
+#
+# Usage: python network_sweep.py 192.168.20.0/22 192.168.23.10-200 [--method auto|icmp|tcp] [--ports 445,3389]
+#
+#######################################
+
+DEFAULT_TCP_PORTS = (445, 3389, 22, 80, 443) # SMB/RDP answer on most Windows clients, SSH/HTTP(S) on most devices
+DEFAULT_TIMEOUT = 1.0 # seconds to wait for an answer after the last probe of a host was sent
+ICMP_ATTEMPTS = 2 # echo requests per host, the second one only to hosts that didn't answer the first
+MAX_TARGETS = 65536 # a /16, to protect against typos like /8
+ALIVE_TCP_ERRORS = {0, errno.ECONNREFUSED} # connected or actively refused: somebody is there
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+
+
+# "192.168.20.0/22", "192.168.23.10-192.168.23.200", "192.168.23.10-200" or a single address
+# returns the IPv4 addresses as strings, in order and without duplicates; raises ValueError for invalid input
+def parse_targets(specs):
+    addresses = {}
+    for spec in specs:
+        spec = spec.strip()
+        if not spec:
+            continue
+        if "/" in spec:
+            network = ipaddress.IPv4Network(spec, strict=False)
+            hosts = network.hosts() if network.num_addresses > 2 else iter(network)
+            first, count = None, network.num_addresses
+        elif "-" in spec:
+            start_str, end_str = spec.split("-", 1)
+            start = ipaddress.IPv4Address(start_str.strip())
+            end_str = end_str.strip()
+            end = ipaddress.IPv4Address(end_str if "." in end_str else start_str.strip().rsplit(".", 1)[0] + "." + end_str)
+            if end < start:
+                raise ValueError(f"the range {spec} ends before it starts")
+            first, count = start, int(end) - int(start) + 1
+            hosts = None
+        else:
+            first, count = ipaddress.IPv4Address(spec), 1
+            hosts = None
+        if len(addresses) + count > MAX_TARGETS:
+            raise ValueError(f"more than {MAX_TARGETS} addresses, please sweep smaller ranges")
+        if hosts is None:
+            hosts = (first + i for i in range(count))
+        for address in hosts:
+            addresses[str(address)] = None
+    return list(addresses)
+
+
+def max_sockets_in_flight():
+    if os.name == 'nt':
+        return 500 # select() on Windows handles at most 512 sockets
+    import resource
+    soft_limit, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    return max(16, min(4000, soft_limit - 100))
+
+
+def icmp_checksum(data):
+    if len(data) % 2:
+        data += b"\0"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def icmp_echo_request(identifier, sequence):
+    payload = b"mac-finder-sweep"
+    header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, identifier, sequence)
+    return struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, icmp_checksum(header + payload), identifier, sequence) + payload
+
+
+# returns (socket, is_raw) or (None, None) if ICMP is not allowed for this user
+def open_icmp_socket():
+    for socket_type in (socket.SOCK_DGRAM, socket.SOCK_RAW):
+        try:
+            sock = socket.socket(socket.AF_INET, socket_type, socket.IPPROTO_ICMP)
+        except OSError:
+            continue
+        return sock, socket_type == socket.SOCK_RAW
+    return None, None
+
+
+def icmp_available():
+    sock, _ = open_icmp_socket()
+    if sock is None:
+        return False
+    sock.close()
+    return True
+
+
+def icmp_sweep(addresses, timeout=DEFAULT_TIMEOUT, attempts=ICMP_ATTEMPTS):
+    """Pings all addresses. Returns {address: round trip time in seconds} of the hosts that answered."""
+    sock, is_raw = open_icmp_socket()
+    if sock is None:
+        raise PermissionError("ICMP sockets are not allowed for this user, run as admin/root or use TCP")
+    identifier = os.getpid() & 0xFFFF # a raw socket sees all replies, only ours count; a datagram socket gets its own
+    alive = {}
+    sent_at = {}
+    try:
+        sock.setblocking(False)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        except OSError:
+            pass
+
+        def receive_replies():
+            while True:
+                try:
+                    data, (address, _) = sock.recvfrom(2048)
+                except (BlockingIOError, InterruptedError):
+                    return
+                except OSError:
+                    continue # e.g. ICMP errors reported on the socket
+                received_at = time.perf_counter()
+                if is_raw:
+                    data = data[(data[0] & 0x0F) * 4:] # skip the IP header
+                if len(data) < 8:
+                    continue
+                icmp_type, _, _, reply_identifier, _ = struct.unpack("!BBHHH", data[:8])
+                if icmp_type != ICMP_ECHO_REPLY or (is_raw and reply_identifier != identifier):
+                    continue
+                if address in sent_at and address not in alive:
+                    alive[address] = received_at - sent_at[address]
+
+        selector = selectors.DefaultSelector()
+        selector.register(sock, selectors.EVENT_READ)
+        for attempt in range(attempts):
+            for sequence, address in enumerate(a for a in addresses if a not in alive):
+                try:
+                    sock.sendto(icmp_echo_request(identifier, (attempt << 14 | sequence) & 0xFFFF), (address, 0))
+                except OSError as e:
+                    if e.errno != errno.ENOBUFS:
+                        continue # e.g. no route to this address
+                    time.sleep(0.01) # the send buffer is full, give it a moment
+                    receive_replies()
+                    continue
+                sent_at[address] = time.perf_counter()
+                if sequence % 64 == 63:
+                    receive_replies() # don't let the replies pile up while sending
+            deadline = time.perf_counter() + timeout
+            while time.perf_counter() < deadline and len(alive) < len(addresses):
+                if selector.select(max(0.0, deadline - time.perf_counter())):
+                    receive_replies()
+        selector.close()
+    finally:
+        sock.close()
+    return alive
+
+
+def tcp_sweep(addresses, ports=DEFAULT_TCP_PORTS, timeout=DEFAULT_TIMEOUT, max_in_flight=None):
+    """TCP-probes all addresses on the given ports. Returns {address: round trip time in seconds} of the hosts that answered."""
+    max_in_flight = max_in_flight or max_sockets_in_flight()
+    alive = {}
+    pending = deque((address, port) for address in addresses for port in ports)
+    in_flight = deque() # (started, socket), oldest first, for the timeouts
+    selector = selectors.DefaultSelector()
+
+    def finish(sock):
+        selector.unregister(sock)
+        sock.close()
+
+    try:
+        while pending or in_flight:
+            while pending and len(selector.get_map()) < max_in_flight:
+                address, port = pending.popleft()
+                if address in alive:
+                    continue # already answered on another port
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                sock.setblocking(False)
+                started = time.perf_counter()
+                result = sock.connect_ex((address, port))
+                if result in ALIVE_TCP_ERRORS:
+                    alive.setdefault(address, time.perf_counter() - started)
+                    sock.close()
+                elif result in (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN, getattr(errno, "WSAEWOULDBLOCK", -1)):
+                    selector.register(sock, selectors.EVENT_WRITE, (address, started))
+                    in_flight.append((started, sock))
+                else:
+                    sock.close() # e.g. network unreachable
+
+            for key, _ in selector.select(timeout=0.05):
+                sock = key.fileobj
+                address, started = key.data
+                if sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) in ALIVE_TCP_ERRORS:
+                    alive.setdefault(address, time.perf_counter() - started)
+                finish(sock)
+
+            now = time.perf_counter()
+            while in_flight and (in_flight[0][1].fileno() == -1 or now - in_flight[0][0] > timeout):
+                _, sock = in_flight.popleft()
+                if sock.fileno() != -1:
+                    finish(sock) # no answer in time
+    finally:
+        for key in list(selector.get_map().values()):
+            key.fileobj.close()
+        selector.close()
+    return alive
+
+
+def sweep(addresses, method="auto", ports=DEFAULT_TCP_PORTS, timeout=DEFAULT_TIMEOUT):
+    """
+    Returns {address: {'rtt': seconds, 'method': "icmp"/"tcp"}} of the live hosts, in the order of the addresses.
+    method "auto" pings (if allowed) and then TCP-probes the hosts that didn't answer.
+    """
+    results = {}
+    if method == "icmp" or (method == "auto" and icmp_available()):
+        for address, rtt in icmp_sweep(addresses, timeout).items():
+            results[address] = {'rtt': rtt, 'method': "icmp"}
+    if method in ("tcp", "auto"):
+        for address, rtt in tcp_sweep([a for a in addresses if a not in results], ports, timeout).items():
+            results[address] = {'rtt': rtt, 'method': "tcp"}
+    return {address: results[address] for address in addresses if address in results}
+
+
+def parse_ports(ports_str):
+    ports = tuple(int(port) for port in ports_str.replace(";", ",").split(",") if port.strip())
+    if not ports or any(not 1 <= port <= 65535 for port in ports):
+        raise ValueError(f"invalid port list '{ports_str}'")
+    return ports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ping/TCP sweep of IP ranges, e.g. to fill the ARP and MAC tables of the switches.")
+    parser.add_argument("targets", nargs="+", help="subnets (192.168.20.0/22), ranges (192.168.23.10-200) or addresses")
+    parser.add_argument("--method", choices=["auto", "icmp", "tcp"], default="auto", help="how to probe (default: auto = ping, then TCP)")
+    parser.add_argument("--ports", default=",".join(map(str, DEFAULT_TCP_PORTS)), help="TCP ports to probe (default: %(default)s)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="seconds to wait for answers (default: %(default)s)")
+    args = parser.parse_args()
+
+    try:
+        addresses = parse_targets(args.targets)
+        ports = parse_ports(args.ports)
+    except ValueError as e:
+        parser.error(str(e))
+    started = time.perf_counter()
+    try:
+        alive = sweep(addresses, args.method, ports, args.timeout)
+    except PermissionError as e:
+        print(e, file=sys.stderr)
+        return 2
+    for address, result in alive.items():
+        print(f"{address:<15} {result['method']:<4} {result['rtt'] * 1000:8.1f} ms")
+    print(f"{len(alive)} of {len(addresses)} address(es) alive, swept in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
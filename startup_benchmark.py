@@ -0,0 +1,120 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+
+############ Start-up Benchmark ############
+#
+# Measures how long the tool takes until the user can work with it, each in a fresh process:
+#   - import_time: importing MAC_Finder_DELL_N1500.py (without running it)
+#   - import_paramiko: importing paramiko, which the script only does on the first SSH connection
+#   - time_to_prompt: starting the script (or the packaged executable, see --command) until the password prompt appears
+# Results can be saved as JSON and compared against an earlier run, e.g. to track releases.
+#
+# Usage: python startup_benchmark.py --save v1.2.json
+#        python startup_benchmark.py --command dist/MAC_Finder_DELL_N1500.exe --baseline v1.2.json
+#
+# time_to_prompt reads the prompt from the output of the process, which works on Linux/macOS (getpass falls back to
+#   stderr without a terminal). On Windows getpass writes to the console directly, so it is reported as not measured.
+#
+############################################
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROMPT_TEXT = b"password"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Start-up time benchmark of the MAC finder.")
+    parser.add_argument("--command", nargs="+", help="command that starts the tool (default: this Python running MAC_Finder_DELL_N1500.py)")
+    parser.add_argument("--repeat", type=int, default=10, help="runs per measurement (default: 10)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for the password prompt (default: 30)")
+    parser.add_argument("--save", metavar="FILE", help="save the results as JSON")
+    parser.add_argument("--baseline", metavar="FILE", help="compare against results saved earlier with --save")
+    return parser.parse_args()
+
+
+# seconds a fresh interpreter needs for the import, measured inside the process so interpreter start-up is not included
+def import_duration(module):
+    code = f"import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=SCRIPT_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+# seconds from starting the process until the password prompt is written, None if it doesn't show up in time
+def prompt_duration(command, timeout):
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=SCRIPT_DIR, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                               start_new_session=(os.name != 'nt')) # no controlling terminal, so getpass prompts on stderr
+    prompt_seen = threading.Event()
+    seen_at = []
+
+    def read_output():
+        output = b""
+        while True:
+            chunk = os.read(process.stdout.fileno(), 4096)
+            if not chunk:
+                return
+            output += chunk
+            if PROMPT_TEXT in output.lower():
+                seen_at.append(time.perf_counter())
+                prompt_seen.set()
+                return
+
+    threading.Thread(target=read_output, daemon=True).start()
+    prompt_seen.wait(timeout)
+    process.kill()
+    process.wait()
+    return seen_at[0] - start if seen_at else None
+
+
+def measure(name, run_once, repeat):
+    durations = [run_once() for _ in range(repeat)]
+    durations = [d for d in durations if d is not None]
+    if not durations:
+        print(f"  {name:<20} not measured")
+        return None
+    result = {'median': statistics.median(durations), 'min': min(durations), 'runs': len(durations)}
+    print(f"  {name:<20} median {result['median'] * 1000:8.1f}ms   min {result['min'] * 1000:8.1f}ms")
+    return result
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    print(f"\nCompared to {baseline_path}:")
+    for name, result in results.items():
+        if not result or not baseline.get(name):
+            continue
+        before, after = baseline[name]['median'], result['median']
+        delta = (after - before) / before * 100 if before else 0.0
+        print(f"  {name:<20} {before * 1000:8.1f}ms -> {after * 1000:8.1f}ms   {delta:+7.1f}%")
+
+
+def main():
+    args = parse_args()
+    command = args.command or [sys.executable, os.path.join(SCRIPT_DIR, "MAC_Finder_DELL_N1500.py")]
+
+    print(f"Running every measurement {args.repeat} time(s):")
+    results = {
+        'import_time': measure("import script", lambda: import_duration("MAC_Finder_DELL_N1500"), args.repeat),
+        'import_paramiko': measure("import paramiko", lambda: import_duration("paramiko"), args.repeat),
+        'time_to_prompt': measure("time to prompt", lambda: prompt_duration(command, args.timeout), args.repeat),
+    }
+
+    if args.baseline:
+        compare(results, args.baseline)
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'parameters': {'command': command, 'repeat': args.repeat}, 'results': results}, f, indent=2)
+        print(f"\nResults saved to {args.save}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,8 @@
 
 # Define switch inventory data
 # This list will be imported by the main script.
+# Optional keys: 'layer3': 'yes' marks routing switches whose ARP tables are used for hostname/IP lookups.
+#   'stack_master': '<IP of the stack>' and 'stack_unit': '<unit number>' tell where a stack unit is mounted (stacks are detected automatically).
 switch_inventory = [
     {'ip': '192.168.23.31', 'location': 'Serverraum', 'rack_details': '1', 'model': 'Dell N1548P', 'query': 'yes', 'notes': ''},
     {'ip': '192.168.23.32', 'location': 'Serverraum', 'rack_details': '2', 'model': 'Dell N1548P', 'query': 'yes', 'notes': ''},
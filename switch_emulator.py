@@ -0,0 +1,530 @@
+import paramiko
+import socket
+import threading
+import time
+import random
+import sys
+
+
+############ Dell N1500 Switch Emulator ############
+#
+# Emulates the SSH CLI of Dell N1500 switches closely enough for MAC_Finder_DELL_N1500.py to work against it,
+#   so that the tool can be tested and benchmarked without real switches.
+# Every emulated switch listens on its own loopback address (127.0.1.1, 127.0.1.2, ...), which allows to spin up
+#   hundreds of them on a single machine. The port is the same for all of them (default 2222).
+#
+# Supported commands (output formats as documented at the bottom of MAC_Finder_DELL_N1500.py):
+#   enable, terminal length <n>, configure terminal, interface <port>, exit, end,
+#   switchport mode general, switchport general pvid <id>, switchport general allowed vlan add|remove <ids> [tagged|untagged],
+#   show mac address-table [address <mac>], show interfaces switchport <port>, show vlan, show arp,
+#   show lldp remote-device all, show interfaces port-channel
+# Long outputs are paged with "--More--" until "terminal length 0" is sent.
+#
+# Usage: python switch_emulator.py [number of switches] [MAC entries per switch]
+#
+####################################################
+
+DEFAULT_PORT = 2222
+DEFAULT_PASSWORD = "admin"
+DEFAULT_PAGE_LENGTH = 24
+
+host_key = None # generated once and shared by all emulated switches
+host_key_lock = threading.Lock()
+
+
+def get_host_key():
+    global host_key
+    with host_key_lock:
+        if host_key is None:
+            host_key = paramiko.RSAKey.generate(2048)
+        return host_key
+
+
+def switch_address(number):
+    """Loopback address of the n-th emulated switch (starting with 1)."""
+    return f"127.0.{1 + (number - 1) // 254}.{1 + (number - 1) % 254}"
+
+
+def format_mac(mac_int):
+    mac = f"{mac_int:012X}"
+    return f"{mac[:4]}.{mac[4:8]}.{mac[8:]}"
+
+
+def parse_vlan_list(vlans_str):
+    """'10,20-22' -> {10, 20, 21, 22}"""
+    vlans = set()
+    for part in vlans_str.split(","):
+        part = part.strip()
+        if "-" in part:
+            start, end = part.split("-", 1)
+            vlans.update(range(int(start), int(end) + 1))
+        elif part:
+            vlans.add(int(part))
+    return vlans
+
+
+def format_vlan_list(vlans):
+    """{10, 20, 21, 22} -> '10,20-22'"""
+    ranges = []
+    for vlan in sorted(vlans):
+        if ranges and vlan == ranges[-1][1] + 1:
+            ranges[-1][1] = vlan
+        else:
+            ranges.append([vlan, vlan])
+    return ",".join(str(start) if start == end else f"{start}-{end}" for start, end in ranges)
+
+
+class EmulatedSwitch:
+    """State (MAC table, VLANs, port configuration, ...) of one emulated switch."""
+
+    def __init__(self, number, mac_entries=1000, ports=48, latency=0.0, command_latency=None,
+                 connect_latency=0.0, password=DEFAULT_PASSWORD, uplink="Po1", stack_units=1):
+        self.number = number
+        self.address = switch_address(number)
+        self.hostname = f"dell-n1548p-{number}"
+        self.burned_in_mac = format_mac((0xF8B156 << 24) | number) # unique per switch, like on real switches
+        self.password = password
+        self.ports = ports
+        self.latency = latency # seconds before the answer to any command
+        self.command_latency = command_latency or {} # command prefix -> seconds, e.g. {"show mac address-table": 0.5}
+        self.connect_latency = connect_latency # seconds before the first prompt appears
+        self.uplink = uplink
+        self.stack_units = stack_units # directly connected MACs are spread over the units (Gi1/0/x, Gi2/0/x, ...)
+        self.lock = threading.Lock()
+
+        self.vlans = {1: "default", 1010: "Clients", 1020: "Phones", 1030: "Printers", 1722: "Production"}
+        self.port_config = {f"Gi{u}/0/{p}": {'pvid': 1, 'untagged': {1}, 'tagged': set()} for u in range(1, stack_units + 1) for p in range(1, ports + 1)}
+        self.neighbors = {} # local port -> (system name, remote port)
+        self.port_channels = {uplink: [f"Gi1/0/{ports - 1}", f"Gi1/0/{ports}"]} if uplink.startswith("Po") else {}
+
+        # every switch gets its own MAC range, every 4th entry is directly connected, the rest is learned on the uplink
+        # the last 4 ports are kept free for the uplink (Po1) and the downlink to the next switch (Po2, see link_as_chain)
+        self.mac_table = [] # sorted list of (vlan, mac, type, port)
+        self.arp_table = [] # list of (ip, mac)
+        rng = random.Random(number)
+        for i in range(mac_entries):
+            mac_int = (number << 24) | i
+            if i % 4 == 0:
+                port = f"Gi{1 + (i // 4) % stack_units}/0/{1 + (i // 4) % (ports - 4)}"
+                vlan = rng.choice([1010, 1020, 1030])
+            else:
+                port = uplink
+                vlan = 1
+            self.mac_table.append((vlan, format_mac(mac_int), "Dynamic", port))
+            if i % 4 == 0:
+                self.arp_table.append((f"10.{number % 256}.{(i // 256) % 256}.{i % 256}", format_mac(mac_int)))
+
+    def edge_macs(self):
+        """MACs that are directly connected to a Gi port of this switch."""
+        return [mac for _, mac, _, port in self.mac_table if port.startswith("Gi")]
+
+    # --- command output ---
+
+    def show_mac_address_table(self, mac=None):
+        lines = ["", "Aging time is 300 Sec", "",
+                 "Vlan     Mac Address           Type        Port",
+                 "-------- --------------------- ----------- ---------------------"]
+        entries = [e for e in self.mac_table if mac is None or e[1] == mac.upper()]
+        for vlan, entry_mac, entry_type, port in entries:
+            lines.append(f"{vlan:<8} {entry_mac:<21} {entry_type:<11} {port}")
+        if not entries:
+            lines += ["", "Forwarding Database Empty."]
+        return lines
+
+    def show_interfaces_switchport(self, port):
+        config = self.port_config.get(port)
+        if config is None:
+            return ["", "An invalid interface has been used for this function."]
+        members = [f"({config['pvid']})"] + [str(v) for v in sorted(config['tagged'] | config['untagged']) if v != config['pvid']]
+        return [
+            "",
+            f"Port: {port}",
+            "VLAN Membership Mode: General Mode",
+            f"Member of VLANs : {','.join(members)}",
+            "Access Mode VLAN: 1 (default)",
+            f"General Mode PVID: {config['pvid']}",
+            "General Mode Ingress Filtering: Enabled",
+            "General Mode Acceptable Frame Type: Admit All",
+            "General Mode Dynamically Added VLANs:",
+            f"General Mode Untagged VLANs: {format_vlan_list(config['untagged'])}",
+            f"General Mode Tagged VLANs: {format_vlan_list(config['tagged'])}",
+            "General Mode Forbidden VLANs:",
+            "Trunking Mode Native VLAN: 1 (default)",
+            "Trunking Mode Native VLAN Tagging: Disabled",
+            "Trunking Mode VLANs Enabled: All",
+            "Private VLAN Host Association: none",
+            "Private VLAN Mapping:",
+            "Private VLAN Operational Bindings:",
+            "Default Priority: 0",
+            "Protected: Disabled",
+            ""
+        ]
+
+    def show_switch(self):
+        lines = ["",
+                 "    Management Standby   Preconfig     Plugged-in    Switch        Code",
+                 "SW  Status     Status    Model ID      Model ID      Status        Version",
+                 "--- ---------- --------- ------------- ------------- ------------- -----------"]
+        for unit in range(1, self.stack_units + 1):
+            management = "Mgmt Sw" if unit == 1 else "Stack Mbr"
+            standby = "Oper Stby" if unit == 2 else ""
+            lines.append(f"{unit:<3} {management:<10} {standby:<9} {'N1548P':<13} {'N1548P':<13} {'OK':<13} 6.6.0.2")
+        return lines
+
+    def show_system(self):
+        return ["",
+                "System Description: Dell Networking N1548P, 6.6.0.2, Linux 3.6.5",
+                "System Up Time: 12 days, 03h:17m:45s",
+                "System Contact:",
+                f"System Name: {self.hostname}",
+                "System Location:",
+                f"Burned In MAC Address: {self.burned_in_mac}",
+                "System Object ID: 1.3.6.1.4.1.674.10895.3082",
+                "System Model ID: N1548P",
+                "Machine Type: Dell Networking N1548P"]
+
+    def show_vlan(self):
+        lines = ["",
+                 "VLAN   Name                             Ports          Type",
+                 "-----  ---------------                  -------------  --------------"]
+        for vlan_id, name in sorted(self.vlans.items()):
+            port_numbers = {int(p.rsplit('/', 1)[1]) for p, c in self.port_config.items() if vlan_id in c['untagged'] | c['tagged']}
+            port_ranges = [f"Gi1/0/{r}," for r in format_vlan_list(port_numbers).split(",") if r]
+            if vlan_id == 1:
+                port_ranges.insert(0, "Po1-128,")
+            if port_ranges:
+                port_ranges[-1] = port_ranges[-1].rstrip(",")
+            # the ports column is wrapped over several lines, one range per line
+            first = port_ranges.pop(0) if port_ranges else ""
+            lines.append(f"{vlan_id:<6} {name:<32} {first:<14} {'Default' if vlan_id == 1 else 'Static'}")
+            for port_range in port_ranges:
+                lines.append(f"{'':<6} {'':<32} {port_range}")
+        return lines
+
+    def show_arp(self):
+        lines = ["",
+                 "Age Time (seconds)............................. 1200",
+                 "Response Time (seconds)........................ 1",
+                 "Retries........................................ 4",
+                 f"Total Entry Count Current / Peak .............. {len(self.arp_table)} / {len(self.arp_table)}",
+                 "",
+                 "IP Address      MAC Address        Interface    Type     Age",
+                 "--------------- ------------------ ------------ -------- -----------"]
+        for ip, mac in self.arp_table:
+            lines.append(f"{ip:<15} {mac:<18} {'Vl1':<12} {'Dynamic':<8} 0h 5m 3s")
+        return lines
+
+    def show_lldp_remote_devices(self):
+        lines = ["", "LLDP Remote Device Summary", "", "Local",
+                 "Interface RemID   Chassis ID          Port ID           System Name",
+                 "--------- ------- ------------------- ----------------- -----------------"]
+        for rem_id, (port, (system_name, remote_port)) in enumerate(sorted(self.neighbors.items()), start=1):
+            lines.append(f"{port:<9} {rem_id:<7} {'F8:B1:56:00:00:%02X' % rem_id:<19} {remote_port:<17} {system_name}")
+        return lines
+
+    def show_port_channels(self):
+        lines = ["",
+                 "Channel   Ports                             Ch-Type Hash Type Min-links Local Prf",
+                 "-------   -----------------------------     -------- --------- --------- ---------"]
+        for channel, members in sorted(self.port_channels.items()):
+            lines.append(f"{channel:<9} {'Active: ' + ', '.join(members):<33} Dynamic  7         1         Disabled")
+        return lines
+
+    # --- configuration ---
+
+    def configure_port(self, port, command):
+        """Applies a 'switchport ...' command to the port. Returns an error line or None."""
+        config = self.port_config.get(port)
+        if config is None:
+            return "An invalid interface has been used for this function."
+        words = command.split()
+        try:
+            if words[:3] == ["switchport", "mode", "general"]:
+                return None
+            if words[:3] == ["switchport", "general", "pvid"]:
+                config['pvid'] = int(words[3])
+                return None
+            if words[:4] == ["switchport", "general", "allowed", "vlan"] and words[4] in ("add", "remove"):
+                vlans = parse_vlan_list(words[5])
+                if any(not 1 <= v <= 4094 for v in vlans):
+                    return "% Invalid input detected at '^' marker."
+                with self.lock:
+                    if words[4] == "add":
+                        target = 'untagged' if len(words) > 6 and words[6] == "untagged" else 'tagged'
+                        other = 'tagged' if target == 'untagged' else 'untagged'
+                        config[target] |= vlans
+                        config[other] -= vlans
+                    else:
+                        config['tagged'] -= vlans
+                        config['untagged'] -= vlans
+                return None
+        except (IndexError, ValueError):
+            pass
+        return "% Invalid input detected at '^' marker."
+
+    def latency_for(self, command):
+        for prefix, latency in self.command_latency.items():
+            if command.startswith(prefix):
+                return latency
+        return self.latency
+
+
+class SwitchServer(paramiko.ServerInterface):
+    """SSH authentication/channel handling for one emulated switch."""
+
+    def __init__(self, switch):
+        self.switch = switch
+        self.shell_requested = threading.Event()
+
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL if password == self.switch.password else paramiko.AUTH_FAILED
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_channel_request(self, kind, chanid):
+        return paramiko.OPEN_SUCCEEDED if kind == "session" else paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_pty_request(self, channel, term, width, height, pixelwidth, pixelheight, modes):
+        return True
+
+    def check_channel_shell_request(self, channel):
+        self.shell_requested.set()
+        return True
+
+
+class SwitchShell:
+    """The interactive CLI on one SSH channel."""
+
+    def __init__(self, switch, channel):
+        self.switch = switch
+        self.channel = channel
+        self.mode = ">" # ">", "#", "(config)#", "(config-if-Gi1/0/8)#"
+        self.interface = None
+        self.page_length = DEFAULT_PAGE_LENGTH
+        self.last_char_was_cr = False
+
+    def prompt(self):
+        return f"{self.switch.hostname}{self.mode}"
+
+    def send(self, text):
+        self.channel.sendall(text.encode('utf-8'))
+
+    # send the lines of a command's output, paged with "--More--" unless "terminal length 0" was sent
+    # returns False if the connection was closed while waiting for a key press
+    def send_output(self, lines):
+        if self.page_length == 0 or len(lines) <= self.page_length:
+            if lines:
+                self.send("\r\n".join(lines) + "\r\n")
+            return True
+        for start in range(0, len(lines), self.page_length):
+            self.send("\r\n".join(lines[start:start + self.page_length]) + "\r\n")
+            if start + self.page_length >= len(lines):
+                break
+            more = "--More-- or (q)uit"
+            self.send(more)
+            key = self.channel.recv(1)
+            if not key:
+                return False
+            self.send("\b" * len(more) + " " * len(more) + "\b" * len(more))
+            if key in (b"q", b"Q"):
+                break
+        return True
+
+    def execute(self, command):
+        """Runs a command and returns the output lines."""
+        switch = self.switch
+        words = command.split()
+        if not words:
+            return []
+
+        if self.mode == ">":
+            if command == "enable":
+                self.mode = "#"
+                return []
+            return ["% Invalid input detected at '^' marker."]
+
+        if self.mode.startswith("(config"):
+            if command == "end":
+                self.mode, self.interface = "#", None
+                return []
+            if command == "exit":
+                if self.interface:
+                    self.mode, self.interface = "(config)#", None
+                else:
+                    self.mode = "#"
+                return []
+            if words[0] == "interface" and len(words) == 2:
+                if words[1] not in switch.port_config:
+                    return ["An invalid interface has been used for this function."]
+                self.interface = words[1]
+                self.mode = f"(config-if-{words[1]})#"
+                return []
+            if words[0] == "switchport" and self.interface:
+                error = switch.configure_port(self.interface, command)
+                return [error] if error else []
+            return ["% Invalid input detected at '^' marker."]
+
+        if words[:2] == ["terminal", "length"] and len(words) == 3 and words[2].isdigit():
+            self.page_length = int(words[2])
+            return []
+        if command == "configure terminal":
+            self.mode = "(config)#"
+            return []
+        if command == "show mac address-table":
+            return switch.show_mac_address_table()
+        if words[:4] == ["show", "mac", "address-table", "address"] and len(words) == 5:
+            return switch.show_mac_address_table(words[4])
+        if words[:3] == ["show", "interfaces", "switchport"] and len(words) == 4:
+            return switch.show_interfaces_switchport(words[3])
+        if command == "show vlan":
+            return switch.show_vlan()
+        if command == "show switch":
+            return switch.show_switch()
+        if command == "show system":
+            return switch.show_system()
+        if command in ("show arp", "show ip arp"):
+            return switch.show_arp()
+        if command == "show lldp remote-device all":
+            return switch.show_lldp_remote_devices()
+        if command == "show interfaces port-channel":
+            return switch.show_port_channels()
+        return ["% Invalid input detected at '^' marker."]
+
+    def run(self):
+        time.sleep(self.switch.connect_latency)
+        self.send("\r\n" + self.prompt())
+        line = ""
+        while True:
+            data = self.channel.recv(1024)
+            if not data:
+                return
+            for char in data.decode('utf-8', errors='ignore'):
+                if char in "\r\n":
+                    if char == "\n" and not line and self.last_char_was_cr:
+                        self.last_char_was_cr = False
+                        continue # "\r\n" counts as a single enter
+                    self.last_char_was_cr = char == "\r"
+                    self.send("\r\n")
+                    command = " ".join(line.split())
+                    line = ""
+                    if command:
+                        time.sleep(self.switch.latency_for(command))
+                        if not self.send_output(self.execute(command)):
+                            return
+                    self.send(self.prompt())
+                elif char in "\x08\x7f":
+                    line = line[:-1]
+                else:
+                    self.last_char_was_cr = False
+                    line += char
+                    self.send(char) # echo
+
+
+def handle_connection(switch, client_socket):
+    transport = paramiko.Transport(client_socket)
+    transport.add_server_key(get_host_key())
+    server = SwitchServer(switch)
+    try:
+        transport.start_server(server=server)
+        channel = transport.accept(20)
+        if channel is None:
+            return
+        server.shell_requested.wait(10)
+        SwitchShell(switch, channel).run()
+    except (EOFError, OSError, paramiko.SSHException):
+        pass
+    finally:
+        transport.close()
+
+
+class SwitchEmulator:
+    """Runs any number of emulated switches, each with its own listening socket and accept thread."""
+
+    def __init__(self, port=DEFAULT_PORT):
+        self.port = port
+        self.switches = []
+        self._sockets = []
+        self._stopped = threading.Event()
+
+    def add_switch(self, **kwargs):
+        switch = EmulatedSwitch(len(self.switches) + 1, **kwargs)
+        listen_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listen_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listen_socket.bind((switch.address, self.port))
+        listen_socket.listen(100)
+        self.switches.append(switch)
+        self._sockets.append(listen_socket)
+        threading.Thread(target=self._accept_loop, args=(switch, listen_socket), daemon=True).start()
+        return switch
+
+    def _accept_loop(self, switch, listen_socket):
+        while not self._stopped.is_set():
+            try:
+                client_socket, _ = listen_socket.accept()
+            except OSError:
+                return
+            threading.Thread(target=handle_connection, args=(switch, client_socket), daemon=True).start()
+
+    def add_address(self, switch):
+        """Makes an existing switch (e.g. a stack) reachable under one more address, like a stale inventory entry."""
+        # additional addresses come from 127.1.x.y, so they never collide with the switches' own addresses
+        address = "127.1." + switch_address(len(self._sockets) - len(self.switches) + 1).split(".", 2)[2]
+        listen_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listen_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listen_socket.bind((address, self.port))
+        listen_socket.listen(100)
+        self._sockets.append(listen_socket)
+        threading.Thread(target=self._accept_loop, args=(switch, listen_socket), daemon=True).start()
+        return address
+
+    # connect the switches as a chain over LLDP: switch n's uplink Po1 leads to the downlink Po2 of switch n-1
+    # like on real switches, every switch learns the MACs connected to the others on the port channel facing them,
+    #   so a MAC can be followed from switch 1 down to the switch it is connected to (call this only once)
+    def link_as_chain(self):
+        for lower, upper in zip(self.switches, self.switches[1:]):
+            downlink_members = [f"Gi1/0/{lower.ports - 3}", f"Gi1/0/{lower.ports - 2}"]
+            lower.port_channels["Po2"] = downlink_members
+            for lower_port, upper_port in zip(downlink_members, upper.port_channels[upper.uplink]):
+                upper.neighbors[upper_port] = (lower.hostname, lower_port)
+                lower.neighbors[lower_port] = (upper.hostname, upper_port)
+
+        edge_entries = {switch.number: [e for e in switch.mac_table if e[3].startswith("Gi")] for switch in self.switches}
+        for switch in self.switches:
+            for other in self.switches:
+                if other is not switch:
+                    port = switch.uplink if other.number < switch.number else "Po2"
+                    switch.mac_table += [(vlan, mac, entry_type, port) for vlan, mac, entry_type, _ in edge_entries[other.number]]
+            switch.mac_table.sort()
+
+    def inventory(self):
+        """Switch inventory in the format of switch_config.py."""
+        return [{'ip': s.address, 'location': 'Emulator', 'rack_details': str(s.number), 'model': 'Dell N1548P',
+                 'query': 'yes', 'notes': 'emulated', 'hostname': s.hostname} for s in self.switches]
+
+    def stop(self):
+        self._stopped.set()
+        for listen_socket in self._sockets:
+            listen_socket.close()
+
+
+def start_emulator(switch_count, port=DEFAULT_PORT, **switch_kwargs):
+    emulator = SwitchEmulator(port)
+    for _ in range(switch_count):
+        emulator.add_switch(**switch_kwargs)
+    return emulator
+
+
+if __name__ == "__main__":
+    switch_count = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    mac_entries = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    emulator = start_emulator(switch_count, mac_entries=mac_entries)
+    print(f"{switch_count} emulated switches with {mac_entries} MAC entries each, password '{DEFAULT_PASSWORD}':")
+    for switch in emulator.switches:
+        print(f"  {switch.address}:{emulator.port}  {switch.hostname}")
+    print("Press Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        emulator.stop()
@@ -0,0 +1,42 @@
+import contextlib
+import io
+import unittest
+from unittest import mock
+
+import for_review
+from for_review import ArpIndex
+
+
+class ArpIndexLookupTest(unittest.TestCase):
+    def setUp(self):
+        self.arp_table = {"10.0.0.1": "aaaa.bbbb.cccc"}
+        self.swept = []
+        self.arp_index = ArpIndex()
+
+    def show_arp(self, command, ip, username, password):
+        return "\n".join(f"{ip}  {mac}  vlan 1010  Gi1/0/1" for ip, mac in self.arp_table.items()), None
+
+    def sweep(self, addresses):
+        self.swept.append(addresses)
+        self.arp_table["10.0.0.2"] = "aaaa.bbbb.dddd" # the routing switch had to resolve it
+        return {}
+
+    def lookup(self, target_IPs, **kwargs):
+        with mock.patch.object(for_review, "exec_ssh_command", self.show_arp), \
+             mock.patch.object(for_review.network_sweep, "sweep", self.sweep), \
+             contextlib.redirect_stdout(io.StringIO()):
+            return self.arp_index.lookup(target_IPs, ["192.168.23.39"], "admin", "secret", {}, **kwargs)
+
+    def test_missing_ips_are_not_swept_by_default(self):
+        self.assertEqual(self.lookup(["10.0.0.1", "10.0.0.2"]), {"10.0.0.1": "aaaa.bbbb.cccc", "10.0.0.2": None})
+        self.assertEqual(self.swept, [])
+
+    def test_sweep_missing(self):
+        self.lookup(["10.0.0.1"])
+        macs_by_ip = self.lookup(["10.0.0.1", "10.0.0.2"], sweep_missing=True)
+        self.assertEqual(self.swept, [["10.0.0.2"]])
+        self.assertEqual(macs_by_ip["10.0.0.2"], "aaaa.bbbb.dddd")
+
+
+if __name__ == "__main__":
+    unittest.main()
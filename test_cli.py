@@ -0,0 +1,62 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import MAC_Finder_DELL_N1500 as mac_finder
+import switch_emulator
+
+
+EMULATOR_PORT = 22023
+
+
+class SetVlanCliTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.emulator = switch_emulator.start_emulator(1, port=EMULATOR_PORT, mac_entries=10)
+        cls.switch = cls.emulator.switches[0]
+        cls.port_patch = mock.patch.object(mac_finder, "SSH_PORT", EMULATOR_PORT)
+        cls.port_patch.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        mac_finder.ssh_session_pool.close_all()
+        cls.port_patch.stop()
+        cls.emulator.stop()
+
+    def set_vlan(self, *arguments):
+        args = mac_finder.build_cli_parser().parse_args(["set-vlan", self.switch.address, *arguments])
+        with contextlib.redirect_stdout(io.StringIO()):
+            return args.handler(args, [self.switch.address], "admin", switch_emulator.DEFAULT_PASSWORD)
+
+    def test_tagged_vlans_are_never_read_from_a_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "1020"), 'w', encoding='utf-8') as f:
+                f.write("1722\n")
+            cwd = os.getcwd()
+            os.chdir(directory)
+            try:
+                result, success = self.set_vlan("Gi1/0/8", "--pvid", "1010", "--tagged", "1020", "--dry-run")
+            finally:
+                os.chdir(cwd)
+        self.assertTrue(success, result)
+        commands = result['ports'][0]['commands']
+        self.assertIn("switchport general allowed vlan add 1020 tagged", commands)
+        self.assertFalse(any("1722" in command for command in commands))
+
+    def test_vlans_that_dont_exist_on_the_switch_are_rejected(self):
+        result, success = self.set_vlan("Gi1/0/9", "--pvid", "1010", "--tagged", "1020,2000-2001")
+        self.assertFalse(success)
+        self.assertIn("2000-2001", result['error'])
+        self.assertEqual(self.switch.port_config["Gi1/0/9"]['pvid'], 1) # nothing was sent
+
+    def test_pvid_0_is_rejected(self):
+        result, success = self.set_vlan("Gi1/0/9", "--pvid", "0")
+        self.assertFalse(success)
+        self.assertIn("invalid VLAN ID", result['error'])
+
+
+if __name__ == "__main__":
+    unittest.main()
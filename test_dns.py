@@ -0,0 +1,107 @@
+import unittest
+
+from dns_stub_server import DnsStubServer, asset_records, encode_name
+from for_review import DNS_TYPE_A, DNS_TYPE_PTR, DnsResolver, _read_dns_name, dns_query
+
+
+class ReadDnsNameTest(unittest.TestCase):
+    def test_plain_name(self):
+        message = b"\x00" * 12 + encode_name("de11465.example.local") + b"rest"
+        self.assertEqual(_read_dns_name(message, 12), ("de11465.example.local", 12 + 23))
+
+    def test_compression_pointer(self):
+        # the second name is "www" followed by a pointer to "example.local" inside the first one
+        first = encode_name("ns1.example.local")
+        message = b"\x00" * 12 + first + b"\x03www\xc0\x10"
+        name, offset = _read_dns_name(message, 12 + len(first))
+        self.assertEqual(name, "www.example.local")
+        self.assertEqual(offset, len(message)) # continues right after the pointer, not after the name it points to
+
+    def test_pointer_loop(self):
+        message = b"\x00" * 12 + b"\xc0\x0c"
+        with self.assertRaises(ValueError):
+            _read_dns_name(message, 12)
+
+
+class DnsQueryTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = DnsStubServer(asset_records(50), port=0, ttl=120, negative_ttl=30)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def test_a_record(self):
+        self.assertEqual(dns_query("DE00002.example.local", DNS_TYPE_A, self.server.address), (["10.200.0.2"], 120))
+
+    def test_ptr_record(self):
+        self.assertEqual(dns_query("2.0.200.10.in-addr.arpa", DNS_TYPE_PTR, self.server.address), (["de00002.example.local"], 120))
+
+    def test_nxdomain_is_cached_for_the_soa_minimum(self):
+        self.assertEqual(dns_query("missing.example.local", DNS_TYPE_A, self.server.address), ([], 30))
+
+    def test_nxdomain_is_cached_for_the_soa_ttl_if_lower(self):
+        server = DnsStubServer({}, port=0, ttl=10, negative_ttl=30)
+        try:
+            self.assertEqual(dns_query("missing.example.local", DNS_TYPE_A, server.address), ([], 10))
+        finally:
+            server.stop()
+
+    def test_truncated_answer(self):
+        self.server.truncate_names.add("de00003.example.local")
+        with self.assertRaises(ValueError):
+            dns_query("DE00003.example.local", DNS_TYPE_A, self.server.address)
+
+    def test_cut_off_answer(self):
+        server = DnsStubServer(asset_records(5), port=0)
+        server.answer = lambda query: DnsStubServer.answer(server, query)[:-2] # the last two bytes of the IP are missing
+        try:
+            with self.assertRaises(ValueError):
+                dns_query("DE00004.example.local", DNS_TYPE_A, server.address)
+        finally:
+            server.stop()
+
+
+class DnsResolverTest(unittest.TestCase):
+    def setUp(self):
+        self.server = DnsStubServer(asset_records(200), port=0)
+        self.resolver = DnsResolver(self.server.address, search_domains=["example.local"])
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_resolve_many_with_search_domain(self):
+        result = self.resolver.resolve_many(["DE00001", "de00200.example.local", "DE99999"])
+        self.assertEqual(result, {"DE00001": "10.200.0.1", "de00200.example.local": "10.200.0.200", "DE99999": None})
+
+    def test_answers_are_cached(self):
+        names = [f"DE{n:05d}" for n in range(1, 201)]
+        self.resolver.resolve_many(names)
+        queries = self.server.query_count
+        self.assertEqual(len(set(self.resolver.resolve_many(names).values())), 200)
+        self.assertEqual(self.server.query_count, queries)
+
+    def test_truncated_answers_are_not_cached(self):
+        self.server.truncate_names.add("de00005.example.local")
+        self.assertIsNone(self.resolver.resolve("de00005.example.local"))
+        self.server.truncate_names.clear()
+        self.assertEqual(self.resolver.resolve("de00005.example.local"), "10.200.0.5")
+
+    def test_failing_search_domain_does_not_stop_the_search(self):
+        resolver = DnsResolver(self.server.address, search_domains=["broken.local", "example.local"])
+        self.server.truncate_names.add("de00003.broken.local") # fails like a timeout or SERVFAIL would
+        self.assertEqual(resolver.resolve("DE00003"), "10.200.0.3")
+
+    def test_all_candidates_failing_is_not_cached(self):
+        self.server.truncate_names.update(["de00004.example.local", "de00004"])
+        self.assertIsNone(self.resolver.resolve("DE00004"))
+        self.server.truncate_names.clear()
+        self.assertEqual(self.resolver.resolve("DE00004"), "10.200.0.4")
+
+    def test_reverse_many(self):
+        self.assertEqual(self.resolver.reverse_many(["10.200.0.7", "10.9.9.9"]), {"10.200.0.7": "de00007.example.local", "10.9.9.9": None})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import csv
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import MAC_Finder_DELL_N1500 as mac_finder
+
+
+SWITCH_IPS = ["192.168.23.39", "192.168.23.40"]
+
+
+def fake_mac_table(command, ip, username, password, timeout=None):
+    yield "Vlan     Mac Address           Type        Port"
+    yield "-------- --------------------- ----------- ---------------------"
+    for i in range(30000): # more than fit into the queue between the readers and the writer
+        yield f"1010     {mac_finder.int_to_mac(int(ip.rsplit('.', 1)[1]) << 24 | i):<21} Dynamic     Gi1/0/{1 + i % 40}"
+
+
+class FailingDetails:
+    """Switch details whose lookup fails after some rows, like a write error in the middle of the export."""
+
+    def __init__(self, fail_after):
+        self.calls = 0
+        self.fail_after = fail_after
+
+    def get(self, ip, default=None):
+        self.calls += 1
+        if self.calls > self.fail_after:
+            raise OSError(28, "No space left on device")
+        return {'location': "Fertigung", 'rack_details': "Verteiler 1.1"}
+
+
+@mock.patch.object(mac_finder, "stream_ssh_command", fake_mac_table)
+class ExportMacTablesTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def export(self, file_name):
+        path = os.path.join(self.directory.name, file_name)
+        counts, errors = mac_finder.export_mac_tables(SWITCH_IPS, "admin", "secret", path)
+        self.assertEqual(errors, {})
+        self.assertEqual(counts, {ip: 30000 for ip in SWITCH_IPS})
+        return path
+
+    def test_csv(self):
+        with open(self.export("macs.csv"), newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), 60000)
+        self.assertEqual(set(rows[0]), {'switch', 'location', 'rack_details', 'vlan', 'mac', 'type', 'port'})
+
+    def test_json_lines(self):
+        with open(self.export("macs.jsonl"), encoding='utf-8') as f:
+            self.assertEqual(len([json.loads(line) for line in f]), 60000)
+
+    def test_json_is_one_array(self):
+        with open(self.export("macs.json"), encoding='utf-8') as f:
+            self.assertEqual(len(json.load(f)), 60000)
+
+    def test_write_error_stops_the_readers(self):
+        path = os.path.join(self.directory.name, "macs.csv")
+        outcome = []
+
+        def run_export():
+            try:
+                mac_finder.export_mac_tables(SWITCH_IPS, "admin", "secret", path)
+            except OSError as e:
+                outcome.append(e)
+
+        with mock.patch.object(mac_finder, "switch_details_by_ip", FailingDetails(fail_after=100)):
+            export_thread = threading.Thread(target=run_export, daemon=True)
+            export_thread.start()
+            export_thread.join(timeout=30)
+        self.assertFalse(export_thread.is_alive(), "the export hangs after a write error")
+        self.assertEqual(len(outcome), 1)
+        self.assertEqual(outcome[0].errno, 28)
+
+
+if __name__ == "__main__":
+    unittest.main()
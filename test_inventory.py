@@ -0,0 +1,86 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import MAC_Finder_DELL_N1500 as mac_finder
+from MAC_Finder_DELL_N1500 import SwitchInventory
+
+
+SWITCHES = [
+    {"ip": "192.168.23.39", "location": "Fertigung", "rack_details": "Rack 1", "model": "N1548P", "query": "yes"},
+    {"ip": "192.168.23.40", "location": "Fertigung", "rack_details": "Rack 2", "model": "N1524", "query": "yes"},
+    {"ip": "192.168.24.10", "location": "Lager", "rack_details": "Rack 1", "model": "N1548P", "query": True},
+    {"ip": "192.168.24.11", "location": "Lager", "rack_details": "Rack 3", "model": "N1524", "query": "no"},
+    {"ip": "no IP set", "location": "Lager", "rack_details": "Rack 3", "model": "N1524", "query": "yes"},
+]
+
+
+class SwitchInventoryTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.inventory = self.write("inventory.json", json.dumps(SWITCHES))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return SwitchInventory(path)
+
+    def test_queryable_switches(self):
+        self.assertEqual(self.inventory.queryable_ips(), ["192.168.23.39", "192.168.23.40", "192.168.24.10"])
+        self.assertEqual(len(self.inventory), 5)
+        self.assertEqual(self.inventory.get("192.168.24.10")['query'], "yes") # JSON true
+        self.assertFalse(self.inventory.is_queryable("192.168.24.11"))
+        self.assertIsNone(self.inventory.get("no IP set"))
+
+    def test_select_by_ip_and_subnet(self):
+        self.assertEqual(self.inventory.select(["192.168.23.40"]), (["192.168.23.40"], []))
+        self.assertEqual(self.inventory.select(["192.168.24.0/24"]), (["192.168.24.10"], []))
+        self.assertEqual(self.inventory.select(["ip=192.168.23.*"]), (["192.168.23.39", "192.168.23.40"], []))
+        # not queryable switches are never selected
+        self.assertEqual(self.inventory.select(["192.168.24.11"]), ([], ["192.168.24.11"]))
+
+    def test_select_by_key(self):
+        self.assertEqual(self.inventory.select(["location=lager"])[0], ["192.168.24.10"])
+        self.assertEqual(self.inventory.select(["model=N1548*"])[0], ["192.168.23.39", "192.168.24.10"])
+        self.assertEqual(self.inventory.select(["rack=Rack ?"])[0], self.inventory.queryable_ips())
+        self.assertEqual(self.inventory.select(["color=red"]), ([], ["color=red"]))
+
+    def test_bare_word_and_all(self):
+        self.assertEqual(self.inventory.select(["Fertigung"])[0], ["192.168.23.39", "192.168.23.40"])
+        self.assertEqual(self.inventory.select(["n1524"])[0], ["192.168.23.40"])
+        self.assertEqual(self.inventory.select(["all"])[0], self.inventory.queryable_ips())
+
+    def test_combined_selectors_keep_the_inventory_order(self):
+        IPs, unmatched = self.inventory.select(["192.168.24.10", "  ", "nowhere", "location=Fertigung"])
+        self.assertEqual(IPs, ["192.168.23.39", "192.168.23.40", "192.168.24.10"])
+        self.assertEqual(unmatched, ["nowhere"])
+        within = ["192.168.24.10", "192.168.23.39"]
+        self.assertEqual(self.inventory.select(["all"], within=within)[0], within)
+
+    def test_csv_inventory(self):
+        inventory = self.write("inventory.csv", "ip,location,rack,model\n10.0.0.1,Büro,Rack A,N1524\n")
+        self.assertEqual(inventory.get("10.0.0.1")['rack_details'], "Rack A")
+        self.assertEqual(inventory.select(["rack=rack a"])[0], ["10.0.0.1"])
+
+    def test_reload_after_change(self):
+        with mock.patch.object(mac_finder, "INVENTORY_RELOAD_CHECK_INTERVAL", 0), mock.patch("builtins.print"):
+            self.assertEqual(len(self.inventory.queryable_ips()), 3)
+            with open(self.inventory.path, 'w', encoding='utf-8') as f:
+                json.dump(SWITCHES[:1], f)
+            os.utime(self.inventory.path, ns=(0, 1)) # the mtime must change even if the file system is coarse
+            self.assertEqual(self.inventory.queryable_ips(), ["192.168.23.39"])
+            # a broken file keeps the previously loaded switches
+            with open(self.inventory.path, 'w', encoding='utf-8') as f:
+                f.write("[{")
+            os.utime(self.inventory.path, ns=(0, 2))
+            self.assertEqual(self.inventory.queryable_ips(), ["192.168.23.39"])
+
+
+if __name__ == "__main__":
+    unittest.main()
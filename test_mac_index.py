@@ -0,0 +1,62 @@
+import time
+import unittest
+
+import MAC_Finder_DELL_N1500 as mac_finder
+from MAC_Finder_DELL_N1500 import CompactMacTable, MacLocationIndex
+
+
+MAC_TABLE_OUTPUT = """
+Aging time is 300 Sec
+
+Vlan     Mac Address           Type        Port
+-------- --------------------- ----------- ---------------------
+1010     0011.2233.4455        Dynamic     Gi1/0/8
+1        0000.AAAA.0001        Dynamic     Po1
+1020     0011.2233.4455        Dynamic     Gi1/0/9
+1        001a.2b3c.4d5e        Static      Gi2/0/1
+"""
+
+
+class CompactMacTableTest(unittest.TestCase):
+    def setUp(self):
+        self.table = CompactMacTable.from_entries(mac_finder.parse_mac_table_output(MAC_TABLE_OUTPUT))
+
+    def test_entries_are_sorted_by_mac(self):
+        self.assertEqual([entry['mac'] for entry in self.table],
+                         ["0000.AAAA.0001", "0011.2233.4455", "0011.2233.4455", "001A.2B3C.4D5E"])
+        self.assertEqual(len(self.table), 4)
+
+    def test_lookup_returns_all_vlans_of_a_mac(self):
+        entries = self.table.lookup(mac_finder.mac_to_int("0011.2233.4455"))
+        self.assertEqual(sorted((entry['vlan'], entry['port']) for entry in entries), [("1010", "Gi1/0/8"), ("1020", "Gi1/0/9")])
+
+    def test_lookup_of_unknown_mac(self):
+        self.assertEqual(self.table.lookup(mac_finder.mac_to_int("FFFF.FFFF.FFFF")), [])
+        self.assertEqual(CompactMacTable().finish().lookup(0), [])
+
+    def test_entries_round_trip(self):
+        entry = self.table.lookup(mac_finder.mac_to_int("001A.2B3C.4D5E"))[0]
+        self.assertEqual(entry, {'vlan': "1", 'mac': "001A.2B3C.4D5E", 'type': "Static", 'port': "Gi2/0/1"})
+
+    def test_mac_int_conversion(self):
+        self.assertEqual(mac_finder.int_to_mac(mac_finder.mac_to_int("0011.2233.4455")), "0011.2233.4455")
+        self.assertEqual(mac_finder.int_to_mac(0xA), "0000.0000.000A")
+
+
+class MacLocationIndexTest(unittest.TestCase):
+    def test_lookup_only_returns_fresh_switches(self):
+        index = MacLocationIndex(ttl=60)
+        entries = mac_finder.parse_mac_table_output(MAC_TABLE_OUTPUT)
+        index.update_switch("192.168.23.39", entries)
+        index.update_switch("192.168.23.40", entries, fetched_at=time.time() - 120)
+        self.assertEqual({location['switch'] for location in index.lookup("0011.2233.4455")}, {"192.168.23.39"})
+        self.assertEqual(index.stale_switches(["192.168.23.39", "192.168.23.40", "192.168.23.41"]), ["192.168.23.40", "192.168.23.41"])
+
+    def test_ttl_follows_the_aging_time_of_the_switch(self):
+        index = MacLocationIndex(ttl=None)
+        index.update_switch("192.168.23.39", [], aging_time=10, fetched_at=time.time() - 20)
+        self.assertFalse(index.is_fresh("192.168.23.39"))
+
+
+if __name__ == "__main__":
+    unittest.main()
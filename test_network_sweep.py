@@ -0,0 +1,90 @@
+import socket
+import struct
+import unittest
+
+import network_sweep
+from network_sweep import icmp_checksum, parse_ports, parse_targets, tcp_sweep
+
+
+class ParseTargetsTest(unittest.TestCase):
+    def test_ranges(self):
+        self.assertEqual(parse_targets(["192.168.23.10-12"]), ["192.168.23.10", "192.168.23.11", "192.168.23.12"])
+        self.assertEqual(parse_targets([" 10.0.0.255 - 10.0.1.1 "]), ["10.0.0.255", "10.0.1.0", "10.0.1.1"])
+        self.assertEqual(parse_targets(["192.168.23.40"]), ["192.168.23.40"])
+
+    def test_range_ending_before_it_starts(self):
+        with self.assertRaises(ValueError):
+            parse_targets(["192.168.23.200-10"])
+
+    def test_subnets(self):
+        self.assertEqual(parse_targets(["192.168.23.0/30"]), ["192.168.23.1", "192.168.23.2"]) # without network and broadcast
+        self.assertEqual(parse_targets(["192.168.23.5/30"]), ["192.168.23.5", "192.168.23.6"]) # strict=False
+        self.assertEqual(parse_targets(["10.0.0.0/31"]), ["10.0.0.0", "10.0.0.1"]) # point-to-point, both are hosts
+        self.assertEqual(parse_targets(["10.0.0.7/32"]), ["10.0.0.7"])
+
+    def test_duplicates_are_removed_in_order(self):
+        addresses = parse_targets(["10.0.0.5", "10.0.0.3-6", "", "10.0.0.0/29"])
+        self.assertEqual(addresses, ["10.0.0.5", "10.0.0.3", "10.0.0.4", "10.0.0.6", "10.0.0.1", "10.0.0.2"])
+
+    def test_too_many_targets(self):
+        parse_targets(["10.0.0.0/16"]) # exactly MAX_TARGETS
+        for specs in (["10.0.0.0/15"], ["10.0.0.0/16", "10.1.0.0/24"], ["10.0.0.0-10.1.0.0"]):
+            with self.subTest(specs):
+                with self.assertRaises(ValueError):
+                    parse_targets(specs)
+
+    def test_invalid_addresses(self):
+        for spec in ("192.168.23.300", "192.168.23.1-x", "host.example"):
+            with self.subTest(spec):
+                with self.assertRaises(ValueError):
+                    parse_targets([spec])
+
+
+class ParsePortsTest(unittest.TestCase):
+    def test_separators(self):
+        self.assertEqual(parse_ports("445;3389, 22"), (445, 3389, 22))
+        self.assertEqual(parse_ports("80,"), (80,))
+
+    def test_invalid_ports(self):
+        for ports_str in ("", "0", "65536", "80,-1", "http"):
+            with self.subTest(ports_str):
+                with self.assertRaises(ValueError):
+                    parse_ports(ports_str)
+
+
+class IcmpChecksumTest(unittest.TestCase):
+    def test_valid_packet_sums_to_zero(self):
+        packet = network_sweep.icmp_echo_request(0x1234, 7)
+        self.assertEqual(icmp_checksum(packet), 0)
+        self.assertEqual(struct.unpack("!BBHHH", packet[:8])[3:], (0x1234, 7))
+
+    def test_odd_length(self):
+        # an odd byte is padded with a zero byte
+        self.assertEqual(icmp_checksum(b"\x01\x02\x03"), icmp_checksum(b"\x01\x02\x03\x00"))
+        self.assertEqual(icmp_checksum(b"\x01\x02\x03"), ~(0x0102 + 0x0300) & 0xFFFF)
+
+
+class TcpSweepTest(unittest.TestCase):
+    def setUp(self):
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.bind(("127.0.0.1", 0))
+        self.listener.listen(8)
+        self.port = self.listener.getsockname()[1]
+
+    def tearDown(self):
+        self.listener.close()
+
+    def test_listening_and_refusing_hosts_are_alive(self):
+        # nothing listens on 127.0.0.2 (the listener is bound to 127.0.0.1 only), so the connection is refused
+        alive = tcp_sweep(["127.0.0.1", "127.0.0.2"], ports=(self.port,), timeout=2.0)
+        self.assertEqual(sorted(alive), ["127.0.0.1", "127.0.0.2"])
+        self.assertTrue(all(rtt >= 0 for rtt in alive.values()))
+
+    def test_many_probes_with_few_sockets(self):
+        addresses = [f"127.0.0.{n}" for n in range(1, 21)]
+        alive = tcp_sweep(addresses, ports=(self.port, self.port), timeout=2.0, max_in_flight=4)
+        self.assertEqual(sorted(alive), sorted(addresses))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+
+from MAC_Finder_DELL_N1500 import PortSet, VlanSet, bits_to_ranges, parse_range_bits
+
+
+class RangeBitsTest(unittest.TestCase):
+    def test_parse_and_back(self):
+        bits = parse_range_bits("1-3,5, 7-7", 1, 4094)
+        self.assertEqual(bits, 0b10101110)
+        self.assertEqual(bits_to_ranges(bits), [(1, 3), (5, 5), (7, 7)])
+
+    def test_ranges_at_the_limits(self):
+        self.assertEqual(bits_to_ranges(parse_range_bits("1,4094", 1, 4094)), [(1, 1), (4094, 4094)])
+        self.assertEqual(bits_to_ranges(parse_range_bits("1-4094", 1, 4094)), [(1, 4094)])
+        self.assertEqual(bits_to_ranges(0), [])
+
+    def test_invalid_ranges(self):
+        for ranges_str in ("0", "4095", "5-3", "a", "1-b"):
+            with self.subTest(ranges_str):
+                with self.assertRaises(ValueError):
+                    parse_range_bits(ranges_str, 1, 4094)
+
+
+class VlanSetTest(unittest.TestCase):
+    def test_parse_and_render(self):
+        vlans = VlanSet.parse("1100-1102,1,1104,1103")
+        self.assertEqual(str(vlans), "1,1100-1104")
+        self.assertEqual(list(vlans), [1, 1100, 1101, 1102, 1103, 1104])
+        self.assertEqual(len(vlans), 6)
+        self.assertEqual(vlans.ranges(), [(1, 1), (1100, 1104)])
+
+    def test_set_operations(self):
+        a = VlanSet.parse("1010,1020-1030")
+        b = VlanSet.parse("1025-1040")
+        self.assertEqual(str(a | b), "1010,1020-1040")
+        self.assertEqual(str(a - b), "1010,1020-1024")
+        self.assertEqual(str(a & b), "1025-1030")
+        self.assertIn(1027, a)
+        self.assertNotIn(1031, a)
+        self.assertEqual(VlanSet([1030, 1010]), VlanSet.parse("1010,1030"))
+        self.assertFalse(VlanSet())
+        self.assertEqual(str(VlanSet()), "")
+
+    def test_invalid_vlan_ids(self):
+        for vlan_ids in ([0], [4095], ["x"]):
+            with self.subTest(vlan_ids):
+                with self.assertRaises(ValueError):
+                    VlanSet(vlan_ids)
+        with self.assertRaises(ValueError):
+            VlanSet.parse("0-10")
+
+    def test_range_strings_are_split_at_max_length(self):
+        vlans = VlanSet(range(1000, 1100, 2))
+        strings = vlans.to_range_strings(20)
+        self.assertTrue(all(len(s) <= 20 for s in strings))
+        self.assertEqual(VlanSet.parse(",".join(strings)), vlans)
+        self.assertEqual(vlans.to_range_strings(), [str(vlans)])
+
+
+class PortSetTest(unittest.TestCase):
+    def test_parse_and_render(self):
+        ports = PortSet.parse("Gi1/0/1-3,Po1,Gi1/0/5,Gi2/0/1-2")
+        self.assertEqual(str(ports), "Gi1/0/1-3,Gi1/0/5,Po1,Gi2/0/1-2") # prefixes in the order they first appear
+        self.assertEqual(len(ports), 7)
+        self.assertEqual(list(ports)[:4], ["Gi1/0/1", "Gi1/0/2", "Gi1/0/3", "Gi1/0/5"])
+        self.assertIn("Gi2/0/2", ports)
+        self.assertNotIn("Gi1/0/4", ports)
+        self.assertNotIn("Te1/0/1", ports)
+
+    def test_set_operations(self):
+        a = PortSet.parse("Gi1/0/1-8,Po1")
+        b = PortSet.parse("Gi1/0/5-12")
+        self.assertEqual(str(a | b), "Gi1/0/1-12,Po1")
+        self.assertEqual(str(a - b), "Gi1/0/1-4,Po1")
+        self.assertEqual(str(a & b), "Gi1/0/5-8")
+        self.assertEqual(a - a, PortSet())
+        self.assertEqual(PortSet(["Gi1/0/2", "Gi1/0/1"]), PortSet.parse("Gi1/0/1-2"))
+
+    def test_invalid_ports(self):
+        for ports_str in ("Gi1/0/1-x", "1/0/1", "Gi1/0/5-3"):
+            with self.subTest(ports_str):
+                with self.assertRaises(ValueError):
+                    PortSet.parse(ports_str)
+        with self.assertRaises(ValueError):
+            PortSet().add("not a port")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import threading
+import time
+import unittest
+from contextlib import closing
+from unittest import mock
+
+import MAC_Finder_DELL_N1500 as mac_finder
+import switch_emulator
+
+
+EMULATOR_PORT = 22025
+
+
+class SessionPoolStreamTest(unittest.TestCase):
+    """Stops reading a streamed MAC table early and checks that the session of the switch is usable right away."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.emulator = switch_emulator.start_emulator(1, port=EMULATOR_PORT, mac_entries=2000)
+        cls.switch_IP = cls.emulator.switches[0].address
+        cls.patches = [mock.patch.object(mac_finder, "SSH_PORT", EMULATOR_PORT),
+                       mock.patch.object(mac_finder, "switch_details_by_ip", {s['ip']: s for s in cls.emulator.inventory()})]
+        for patch in cls.patches:
+            patch.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        mac_finder.ssh_session_pool.close_all()
+        for patch in cls.patches:
+            patch.stop()
+        cls.emulator.stop()
+
+    def stream_table(self):
+        return mac_finder.stream_ssh_command("show mac address-table", self.switch_IP, "admin", switch_emulator.DEFAULT_PASSWORD)
+
+    def run_in_thread(self, command):
+        result = {}
+        thread = threading.Thread(target=lambda: result.update(output=mac_finder.exec_ssh_command(
+            command, self.switch_IP, "admin", switch_emulator.DEFAULT_PASSWORD)))
+        thread.start()
+        thread.join(10)
+        return None if thread.is_alive() else result['output']
+
+    def test_closed_stream_releases_the_session(self):
+        with closing(self.stream_table()) as lines:
+            next(line for line in lines if "Dynamic" in line)
+            session = mac_finder.ssh_session_pool._sessions[self.switch_IP]
+            used_before = session.last_used
+            time.sleep(0.01)
+        self.assertGreater(session.last_used, used_before)
+        output, error = self.run_in_thread("show switch")
+        self.assertIsNone(error)
+        self.assertIn("Mgmt Sw", output) # the rest of the MAC table was skipped
+
+    def test_unclosed_stream_keeps_the_session_locked(self):
+        lines = self.stream_table()
+        next(lines)
+        lock = mac_finder.ssh_session_pool._sessions[self.switch_IP].lock
+        self.assertFalse(lock.acquire(timeout=0.2)) # why callers that stop early have to close the generator
+        lines.close()
+        self.assertTrue(lock.acquire(timeout=5))
+        lock.release()
+
+
+if __name__ == "__main__":
+    unittest.main()
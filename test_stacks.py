@@ -0,0 +1,85 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import MAC_Finder_DELL_N1500 as mac_finder
+import switch_emulator
+from MAC_Finder_DELL_N1500 import StackMap, parse_stack_mac
+
+
+EMULATOR_PORT = 22024
+
+
+class ParseStackMacTest(unittest.TestCase):
+    def test_burned_in_mac(self):
+        output = "System Name: console\nBurned In MAC Address: f8b1.5656.7b29\nSystem Model ID: N1548P\n"
+        self.assertEqual(parse_stack_mac(output), "F8B1.5656.7B29")
+        self.assertEqual(parse_stack_mac("Burned In MAC Address.......... F8:B1:56:56:7B:29"), "F8B1.5656.7B29")
+
+    def test_missing_mac(self):
+        self.assertIsNone(parse_stack_mac("% Invalid input detected at '^' marker."))
+        self.assertIsNone(parse_stack_mac("Burned In MAC Address: unknown"))
+
+
+class StackMapTest(unittest.TestCase):
+    """Discovers emulated switches that all have the same hostname and model."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.emulator = switch_emulator.start_emulator(3, port=EMULATOR_PORT, mac_entries=20)
+        for switch in cls.emulator.switches:
+            switch.hostname = "console" # the default hostname of a Dell switch
+        cls.switch_IPs = [switch.address for switch in cls.emulator.switches]
+        cls.patches = [mock.patch.object(mac_finder, "SSH_PORT", EMULATOR_PORT),
+                       mock.patch.object(mac_finder, "switch_details_by_ip", {s['ip']: s for s in cls.emulator.inventory()})]
+        for patch in cls.patches:
+            patch.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        mac_finder.ssh_session_pool.close_all()
+        for patch in cls.patches:
+            patch.stop()
+        cls.emulator.stop()
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.stack_map = StackMap(os.path.join(self.directory.name, "stack_cache.json"))
+
+    def tearDown(self):
+        self.emulator.switches[2].burned_in_mac = switch_emulator.format_mac((0xF8B156 << 24) | 3)
+        self.directory.cleanup()
+
+    def discover(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.stack_map.discover(self.switch_IPs, "admin", switch_emulator.DEFAULT_PASSWORD)
+
+    def test_standalone_switches_with_the_same_hostname_are_all_queried(self):
+        self.discover()
+        self.assertEqual(self.stack_map.info(self.switch_IPs[0])['hostname'], "console")
+        self.assertEqual(self.stack_map.plan(self.switch_IPs), (self.switch_IPs, {}))
+
+    def test_same_stack_is_queried_once(self):
+        # the third IP leads to the same stack as the first one
+        self.emulator.switches[2].burned_in_mac = self.emulator.switches[0].burned_in_mac
+        self.discover()
+        self.assertEqual(self.stack_map.plan(self.switch_IPs), (self.switch_IPs[:2], {self.switch_IPs[2]: self.switch_IPs[0]}))
+
+    def test_cache_survives_a_restart(self):
+        self.discover()
+        stack_map = StackMap(self.stack_map.path)
+        self.assertEqual(stack_map.info(self.switch_IPs[1])['stack_mac'], self.emulator.switches[1].burned_in_mac)
+
+    def test_cache_without_stack_macs_is_discovered_again(self):
+        with open(self.stack_map.path, 'w', encoding='utf-8') as f:
+            json.dump({self.switch_IPs[0]: {'fetched_at': time.time(), 'hostname': "console", 'units': {"1": {'model': "N1548P"}}}}, f)
+        self.assertIsNone(self.stack_map.info(self.switch_IPs[0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import builtins
+import contextlib
+import io
+import unittest
+from unittest import mock
+
+import MAC_Finder_DELL_N1500 as mac_finder
+import switch_emulator
+
+
+EMULATOR_PORT = 22022
+
+
+class TopologyMacSearchTest(unittest.TestCase):
+    """Follows a MAC through a chain of emulated switches: 1 (root) -> 2 -> 3 -> 4."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.emulator = switch_emulator.start_emulator(4, port=EMULATOR_PORT, mac_entries=200)
+        cls.emulator.link_as_chain()
+        cls.switch_IPs = [switch.address for switch in cls.emulator.switches]
+        cls.patches = [mock.patch.object(mac_finder, "SSH_PORT", EMULATOR_PORT),
+                       mock.patch.object(mac_finder, "switch_details_by_ip", {s['ip']: s for s in cls.emulator.inventory()})]
+        for patch in cls.patches:
+            patch.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        mac_finder.ssh_session_pool.close_all()
+        for patch in cls.patches:
+            patch.stop()
+        cls.emulator.stop()
+
+    def setUp(self):
+        mac_finder.topology_map.clear()
+        mac_finder.mac_location_index.clear()
+
+    def test_walk_finds_edge_mac_two_hops_down(self):
+        target = self.emulator.switches[2]
+        mac = target.edge_macs()[5]
+        with contextlib.redirect_stdout(io.StringIO()):
+            hit, visited_IPs = mac_finder.topology_mac_search(mac, self.switch_IPs, "admin", switch_emulator.DEFAULT_PASSWORD)
+        self.assertEqual(visited_IPs, self.switch_IPs[:3])
+        self.assertEqual(hit['ip'], target.address)
+        expected_port = next(port for _, entry_mac, _, port in target.mac_table if entry_mac == mac)
+        self.assertEqual(hit['edge_entries'][0]['port'], expected_port)
+
+    def test_workflow_does_not_fall_back_to_all_switches(self):
+        mac = self.emulator.switches[2].edge_macs()[0]
+        answers = iter([mac])
+        output = io.StringIO()
+        with mock.patch.object(builtins, "input", lambda prompt="": next(answers, "n")), \
+             mock.patch.object(mac_finder, "concurrent_mac_search", side_effect=AssertionError("fell back to all switches")), \
+             contextlib.redirect_stdout(output):
+            mac_finder.mac_search_workflow(self.switch_IPs, "admin", switch_emulator.DEFAULT_PASSWORD, follow_uplinks=True)
+        self.assertIn("found on port", output.getvalue())
+        self.assertNotIn("falling back", output.getvalue())
+
+    def test_unknown_mac_stops_at_the_root(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            hit, visited_IPs = mac_finder.topology_mac_search("0BAD.0BAD.0BAD", self.switch_IPs, "admin", switch_emulator.DEFAULT_PASSWORD)
+        self.assertIsNone(hit)
+        self.assertEqual(visited_IPs, self.switch_IPs[:1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+import MAC_Finder_DELL_N1500 as mac_finder
+from MAC_Finder_DELL_N1500 import read_vlan_change_list
+
+
+SWITCH_IPS = ["192.168.23.39", "192.168.23.40"]
+
+
+class ReadVlanChangeListTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, content):
+        path = os.path.join(self.directory.name, "changes.csv")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def test_valid_rows(self):
+        changes, problems = read_vlan_change_list(self.write(
+            "switch,port,pvid,tagged\n"
+            "192.168.23.39,Gi1/0/8,1010,1020;1100-1102\n"
+            "# comment\n"
+            "192.168.23.40,Gi1/0/9,,1030\n"
+            "192.168.23.40,Gi1/0/10,,\n"), SWITCH_IPS)
+        self.assertEqual(problems, [])
+        self.assertEqual([(c['switch'], c['port'], c['pvid'], str(c['tagged'])) for c in changes], [
+            ("192.168.23.39", "Gi1/0/8", 1010, "1020,1100-1102"),
+            ("192.168.23.40", "Gi1/0/9", None, "1030"),
+            ("192.168.23.40", "Gi1/0/10", 1, ""), # without any VLAN the port goes back to PVID 1
+        ])
+
+    def test_pvid_0_is_invalid(self):
+        changes, problems = read_vlan_change_list(self.write("192.168.23.39,Gi1/0/8,0,\n"), SWITCH_IPS)
+        self.assertEqual(changes, [])
+        self.assertEqual(problems, ["line 1: invalid VLAN ID, must be a number between 1 and 4094"])
+
+    def test_invalid_rows(self):
+        changes, problems = read_vlan_change_list(self.write(
+            "192.168.23.99,Gi1/0/8,1010,\n"
+            "192.168.23.39,Xe1/0/8,1010,\n"
+            "192.168.23.39,Gi1/0/8,4095,\n"
+            "192.168.23.39,Gi1/0/8,1010,1010\n"
+            "192.168.23.39,Gi1/0/8,1010,\n"
+            "192.168.23.39,Gi1/0/8,1020,\n"), SWITCH_IPS)
+        self.assertEqual(len(changes), 1)
+        self.assertEqual([problem.split(":")[0] for problem in problems], ["line 1", "line 2", "line 3", "line 4", "line 6"])
+
+    def test_cli_applies_nothing_if_a_line_is_invalid(self):
+        path = self.write("192.168.23.39,Gi1/0/8,1010,\n192.168.23.39,Gi1/0/9,0,\n")
+        args = mac_finder.build_cli_parser().parse_args(["bulk-vlan", path])
+        with contextlib.redirect_stdout(io.StringIO()):
+            result, success = args.handler(args, SWITCH_IPS, "admin", "secret") # would need a switch if it applied anything
+        self.assertFalse(success)
+        self.assertEqual(result['changes'], [])
+        self.assertEqual(len(result['problems']), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+
+from MAC_Finder_DELL_N1500 import VLAN_LIST_MAX_LENGTH, VlanSet, plan_vlan_commands
+
+
+def port_vlans(pvid, untagged, tagged):
+    return {'pvid': pvid, 'untagged_vlans': VlanSet(untagged), 'tagged_vlans': VlanSet(tagged)}
+
+
+class PlanVlanCommandsTest(unittest.TestCase):
+    def test_unchanged_port_only_enters_the_interface(self):
+        current = port_vlans(1010, [1010], [1020, 1030, 1031, 1032])
+        commands = plan_vlan_commands("Gi1/0/8", current, 1010, VlanSet([1020, 1030, 1031, 1032]))
+        self.assertEqual(commands, ["interface Gi1/0/8", "switchport mode general"])
+
+    def test_only_the_difference_is_sent_as_ranges(self):
+        current = port_vlans(1010, [1010], [1020, 1030])
+        commands = plan_vlan_commands("Gi1/0/8", current, 1010, VlanSet([1020, 1100, 1101, 1102, 1104]))
+        self.assertEqual(commands, [
+            "interface Gi1/0/8",
+            "switchport mode general",
+            "switchport general allowed vlan add 1100-1102,1104 tagged",
+            "switchport general allowed vlan remove 1030",
+        ])
+
+    def test_new_pvid(self):
+        current = port_vlans(1010, [1010], [1020])
+        commands = plan_vlan_commands("Gi1/0/8", current, 1020, VlanSet())
+        # 1020 stays on the port (now untagged), only 1010 is removed
+        self.assertEqual(commands, [
+            "interface Gi1/0/8",
+            "switchport mode general",
+            "switchport general pvid 1020",
+            "switchport general allowed vlan add 1020 untagged",
+            "switchport general allowed vlan remove 1010",
+        ])
+
+    def test_no_pvid_removes_the_untagged_vlan(self):
+        current = port_vlans(1010, [1010], [1020])
+        commands = plan_vlan_commands("Gi1/0/8", current, None, VlanSet([1020]))
+        self.assertEqual(commands[2:], ["switchport general allowed vlan remove 1010"])
+
+    def test_long_vlan_lists_are_split(self):
+        tagged = VlanSet(range(2, 4000, 2)) # no ranges possible, a very long list
+        commands = plan_vlan_commands("Gi1/0/8", port_vlans(1, [1], []), 1, tagged)
+        add_commands = [c for c in commands if c.startswith("switchport general allowed vlan add")]
+        self.assertGreater(len(add_commands), 1)
+        for command in add_commands:
+            self.assertLessEqual(len(command.split()[-2]), VLAN_LIST_MAX_LENGTH)
+        sent = VlanSet.parse(",".join(c.split()[-2] for c in add_commands))
+        self.assertEqual(sent, tagged)
+
+
+if __name__ == "__main__":
+    unittest.main()
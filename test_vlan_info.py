@@ -0,0 +1,60 @@
+import unittest
+
+from MAC_Finder_DELL_N1500 import PortSet, parse_vlan_info
+
+
+SHOW_VLAN = """
+VLAN   Name                             Ports          Type
+-----  ---------------                  -------------  --------------
+1      default                          Po1-128,       Default
+                                        Gi1/0/1-7,
+                                        Gi1/0/9-48
+1010   Clients                          Gi1/0/8        Static
+1020   Printers                                        Static
+1722   Management Network               Gi1/0/47-48,   Static
+                                        Po1
+
+"""
+
+
+class ParseVlanInfoTest(unittest.TestCase):
+    def test_vlans_with_name_type_and_ports(self):
+        vlans = parse_vlan_info(SHOW_VLAN)
+        self.assertEqual(sorted(vlans), [1, 1010, 1020, 1722])
+        self.assertEqual(vlans[1010], {'name': "Clients", 'type': "Static", 'ports': PortSet(["Gi1/0/8"])})
+        self.assertEqual(vlans[1722]['name'], "Management Network") # names can contain spaces
+        self.assertEqual(vlans[1020]['ports'], PortSet())
+
+    def test_continuation_lines(self):
+        vlans = parse_vlan_info(SHOW_VLAN)
+        self.assertEqual(vlans[1]['ports'], PortSet.parse("Po1-128,Gi1/0/1-7,Gi1/0/9-48"))
+        self.assertEqual(vlans[1]['type'], "Default")
+        self.assertNotIn("Gi1/0/8", vlans[1]['ports'])
+        self.assertEqual(vlans[1722]['ports'], PortSet.parse("Gi1/0/47-48,Po1"))
+
+    def test_column_positions_come_from_the_separator_line(self):
+        output = (
+            "VLAN Name       Ports   Type\n"
+            "---- ---------- ------- -------\n"
+            "10   Short      Gi1/0/1 Static\n"
+            "20   ServerRoom Gi1/0/2,\n"
+            "                Gi1/0/4 Static\n"
+        )
+        vlans = parse_vlan_info(output)
+        self.assertEqual(vlans[10]['name'], "Short")
+        self.assertEqual(vlans[20]['ports'], PortSet(["Gi1/0/2", "Gi1/0/4"]))
+
+    def test_no_header(self):
+        self.assertEqual(parse_vlan_info("% Invalid input detected at '^' marker."), {})
+
+    def test_unparsable_ports_give_an_empty_port_set(self):
+        vlans = parse_vlan_info(
+            "VLAN   Name      Ports          Type\n"
+            "-----  --------  -------------  -------\n"
+            "1010   Clients   ???            Static\n"
+        )
+        self.assertEqual(vlans[1010]['ports'], PortSet())
+
+
+if __name__ == "__main__":
+    unittest.main()